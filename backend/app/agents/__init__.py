@@ -1,26 +1,67 @@
 # Agent modules package
 
-from .code_analyzer import CodeAnalyzerAgent
-from .data_processor import DataProcessorAgent
-from .api_caller import APICallerAgent
-from .file_handler import FileHandlerAgent
-from .email_sender import EmailSenderAgent
-from .database_query import DatabaseQueryAgent
+import asyncio
+import importlib
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple
 
-# Agent registry for easy access
-AGENT_REGISTRY = {
-    'code_analyzer': CodeAnalyzerAgent,
-    'data_processor': DataProcessorAgent,
-    'api_caller': APICallerAgent,
-    'file_handler': FileHandlerAgent,
-    'email_sender': EmailSenderAgent,
-    'database_query': DatabaseQueryAgent,
+# Agent type -> (module path, class name). Modules are imported on first use so
+# that pandas, numpy and the database drivers only load when an agent needs them.
+AGENT_MODULES: Dict[str, Tuple[str, str]] = {
+    'code_analyzer': ('app.agents.code_analyzer', 'CodeAnalyzerAgent'),
+    'data_processor': ('app.agents.data_processor', 'DataProcessorAgent'),
+    'api_caller': ('app.agents.api_caller', 'APICallerAgent'),
+    'file_handler': ('app.agents.file_handler', 'FileHandlerAgent'),
+    'email_sender': ('app.agents.email_sender', 'EmailSenderAgent'),
+    'database_query': ('app.agents.database_query', 'DatabaseQueryAgent'),
 }
 
+class LazyAgentRegistry(Mapping):
+    """Agent registry that resolves agent classes on first access"""
+    
+    def __init__(self, modules: Dict[str, Tuple[str, str]]):
+        self._modules = modules
+        self._classes: Dict[str, type] = {}
+    
+    def __getitem__(self, agent_type: str) -> type:
+        agent_class = self._classes.get(agent_type)
+        if agent_class is None:
+            module_path, class_name = self._modules[agent_type]
+            agent_class = getattr(importlib.import_module(module_path), class_name)
+            self._classes[agent_type] = agent_class
+        return agent_class
+    
+    def __iter__(self):
+        return iter(self._modules)
+    
+    def __len__(self) -> int:
+        return len(self._modules)
+    
+    def is_loaded(self, agent_type: str) -> bool:
+        """Check whether an agent class has already been imported"""
+        return agent_type in self._classes
+
+# Agent registry for easy access
+AGENT_REGISTRY = LazyAgentRegistry(AGENT_MODULES)
+
 def get_agent_class(agent_type: str):
     """Get agent class by type"""
-    return AGENT_REGISTRY.get(agent_type)
+    if agent_type not in AGENT_REGISTRY:
+        return None
+    return AGENT_REGISTRY[agent_type]
 
 def list_available_agents():
     """List all available agent types"""
     return list(AGENT_REGISTRY.keys())
+
+async def warmup_agents(agent_types: Optional[List[str]] = None):
+    """Import agent modules in a worker thread ahead of first use"""
+    for agent_type in agent_types or list_available_agents():
+        await asyncio.to_thread(AGENT_REGISTRY.__getitem__, agent_type)
+
+def __getattr__(name: str):
+    """Keep `from app.agents import CodeAnalyzerAgent` working without eager imports"""
+    for agent_type, (_, class_name) in AGENT_MODULES.items():
+        if class_name == name:
+            return AGENT_REGISTRY[agent_type]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
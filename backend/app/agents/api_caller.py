@@ -46,6 +46,8 @@ class APICallerAgent:
             return {
                 'status': 'completed',
                 'output': processed_response,
+                # A server error says the host is failing, unlike a 4xx for a bad request
+                'dependency_error': (response_data.get('status_code') or 0) >= 500,
                 'metadata': {
                     'url': url,
                     'method': method,
@@ -65,6 +67,7 @@ class APICallerAgent:
             return {
                 'status': 'failed',
                 'error': str(e),
+                'dependency_error': isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)),
                 'metadata': {
                     'url': input_data.get('url'),
                     'method': input_data.get('method', 'GET'),
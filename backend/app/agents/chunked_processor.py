@@ -0,0 +1,434 @@
+import json
+import os
+from io import StringIO
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.agents.sketches import FrameSketch
+from app.agents.spill_aggregator import SpillingAggregator
+from app.services.columnar import ColumnarTable
+from app.services.file_streams import FileStream
+
+# Per-chunk partials needed for each mergeable aggregation
+PARTIALS = {
+    'sum': ['sum'],
+    'count': ['count'],
+    'mean': ['sum', 'count'],
+    'min': ['min'],
+    'max': ['max'],
+    'size': ['size'],
+}
+
+# How partials of the same group are merged
+MERGE_PARTIALS = {'sum': 'sum', 'count': 'sum', 'size': 'sum', 'min': 'min', 'max': 'max'}
+
+# Partial group frames kept before they are merged down
+MAX_PENDING_PARTIALS = 16
+
+class ChunkedDataProcessor:
+    """Runs DataProcessorAgent operations over fixed-size chunks of the input
+    
+    Streamable stages (filter, transform, clean, sample) handle one chunk at a
+    time. An aggregate or group_by stage that only uses sum, count, mean,
+    min, max or size merges per-chunk partials, and approximate statistics
+    merge per-chunk sketches, so memory is bounded by the chunk size and the
+    result rather than the input. With a memory budget, group_by and pivot
+    go through the spilling aggregator instead. Stages from the first one
+    that needs the whole input onwards run over the collected frame.
+    
+    Random samples keep the rows with the smallest random keys, so they differ
+    from the in-memory sample for the same seed; duplicate removal remembers a
+    64-bit hash per distinct row.
+    """
+    
+    DEFAULT_CHUNK_SIZE = 100_000
+    
+    def __init__(
+        self,
+        processor: Any,
+        chunk_size: Optional[int] = None,
+        memory_budget_mb: Optional[float] = None,
+        spill_directory: Optional[str] = None,
+        spill_workers: Optional[int] = None
+    ):
+        self.processor = processor
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_directory = spill_directory
+        self.spill_workers = spill_workers
+    
+    def iter_chunks(self, data: Any, source_path: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Yield the input as DataFrames of at most chunk_size rows"""
+        
+        source_format, encoding = None, None
+        if isinstance(data, FileStream):
+            source_path, source_format, encoding = data.path, data.format, data.encoding
+        
+        if source_path:
+            extension = os.path.splitext(source_path)[1].lower()
+            if source_format == 'jsonl' or extension in ('.jsonl', '.ndjson'):
+                reader = pd.read_json(source_path, lines=True, chunksize=self.chunk_size, encoding=encoding)
+            elif source_format == 'csv' or extension in ('.csv', '.tsv'):
+                reader = pd.read_csv(
+                    source_path, sep='\t' if extension == '.tsv' else ',', chunksize=self.chunk_size,
+                    encoding=encoding
+                )
+            else:
+                raise ValueError(f"Unsupported source file for streaming: {source_path}")
+            with reader:
+                yield from reader
+            return
+        
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                with pd.read_csv(StringIO(data), chunksize=self.chunk_size) as reader:
+                    yield from reader
+                return
+        
+        if isinstance(data, ColumnarTable):
+            for offset in range(0, max(len(data), 1), self.chunk_size):
+                yield ColumnarTable(data.frame.slice(offset, self.chunk_size)).to_pandas()
+        elif isinstance(data, pd.DataFrame):
+            for offset in range(0, max(len(data), 1), self.chunk_size):
+                yield data.iloc[offset:offset + self.chunk_size]
+        elif isinstance(data, list):
+            for offset in range(0, len(data), self.chunk_size):
+                yield self.processor._prepare_dataframe(data[offset:offset + self.chunk_size])
+        else:
+            yield self.processor._prepare_dataframe(data)
+    
+    def execute(
+        self,
+        chunks: Iterator[pd.DataFrame],
+        pipeline: List[Dict[str, Any]]
+    ) -> Tuple[pd.DataFrame, List[Dict[str, Any]], int]:
+        """Stream the leading stages of a pipeline
+        
+        Returns the frame after the streamed stages, a metadata dict per
+        streamed stage and how many stages were consumed.
+        """
+        
+        stream = chunks
+        stages = []
+        result_df = None
+        
+        for stage in pipeline:
+            if self.is_streamable(stage):
+                info = self._stage_info(stage)
+                stream = self._counted(self._stream_stage(self._counted(stream, info, 'input'), stage), info, 'output')
+                stages.append(info)
+            elif self.memory_budget_mb and SpillingAggregator.supports(stage):
+                info = self._stage_info(stage)
+                aggregator = SpillingAggregator(
+                    self.processor, self.memory_budget_mb, self.spill_directory, self.spill_workers
+                )
+                result_df = aggregator.aggregate(self._counted(stream, info, 'input'), stage)
+                info['rows'], info['columns'] = len(result_df), list(result_df.columns)
+                info['spill'] = aggregator.stats
+                stages.append(info)
+                break
+            elif self.is_mergeable(stage):
+                info = self._stage_info(stage)
+                result_df = self._merge_stage(self._counted(stream, info, 'input'), stage)
+                info['rows'], info['columns'] = len(result_df), list(result_df.columns)
+                if 'approximation' in result_df.attrs:
+                    info['approximation'] = result_df.attrs['approximation']
+                stages.append(info)
+                break
+            else:
+                break
+        
+        if result_df is None:
+            frames = list(stream)
+            result_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        
+        return result_df, [self._stage_metadata(info) for info in stages], len(stages)
+    
+    def is_streamable(self, stage: Dict[str, Any]) -> bool:
+        """Whether a stage can run on each chunk independently"""
+        
+        operation = stage['operation']
+        parameters = stage['parameters']
+        
+        if operation == 'filter':
+            return True
+        if operation == 'transform':
+            # Normalization needs the min/max or mean/std of the whole column
+            return all(
+                transform.get('operation') not in ('normalize', 'standardize')
+                for transform in parameters.get('transformations', [])
+            )
+        if operation == 'clean':
+            operations = parameters.get('operations', ['remove_duplicates', 'handle_missing'])
+            return set(operations) <= {'remove_duplicates', 'handle_missing'} and (
+                'handle_missing' not in operations
+                or parameters.get('missing_strategy', 'drop') in ('drop', 'forward_fill')
+            )
+        if operation == 'sample':
+            return parameters.get('method', 'random') in ('random', 'head', 'tail')
+        return False
+    
+    def is_mergeable(self, stage: Dict[str, Any]) -> bool:
+        """Whether an aggregate or group_by stage can be merged from chunk partials"""
+        
+        operation = stage['operation']
+        parameters = stage['parameters']
+        
+        if operation == 'aggregate':
+            return all(
+                func in PARTIALS and func != 'size'
+                for funcs in parameters.get('aggregations', {}).values()
+                for func in ([funcs] if isinstance(funcs, str) else funcs)
+            )
+        if operation == 'group_by':
+            return all(
+                func in PARTIALS for _, _, func in self._group_specs(parameters.get('aggregations', {'count': 'size'}))
+            )
+        if operation == 'statistics':
+            return bool(parameters.get('approximate'))
+        return False
+    
+    def _stage_info(self, stage: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'stage': stage,
+            'input_rows': 0,
+            'input_columns': 0,
+            'output_rows': 0,
+            'columns': [],
+            'chunks': 0
+        }
+    
+    def _stage_metadata(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        rows = info.get('rows', info['output_rows'])
+        metadata = {
+            'original_shape': (info['input_rows'], info['input_columns']),
+            'operation_parameters': info['stage']['parameters'],
+            'streaming': True,
+            'chunks': info['chunks'],
+            'result_shape': (rows, len(info['columns'])),
+            'columns': info['columns']
+        }
+        for key in ('spill', 'approximation'):
+            if key in info:
+                metadata[key] = info[key]
+        return metadata
+    
+    def _counted(self, chunks: Iterator[pd.DataFrame], info: Dict[str, Any], side: str) -> Iterator[pd.DataFrame]:
+        for chunk in chunks:
+            if side == 'input':
+                info['input_rows'] += len(chunk)
+                info['input_columns'] = len(chunk.columns)
+                info['chunks'] += 1
+            else:
+                info['output_rows'] += len(chunk)
+                info['columns'] = list(chunk.columns)
+            yield chunk
+    
+    def _stream_stage(self, chunks: Iterator[pd.DataFrame], stage: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        operation = stage['operation']
+        parameters = stage['parameters']
+        
+        if operation == 'filter':
+            for chunk in chunks:
+                yield self.processor._filter_data(chunk, parameters)
+        elif operation == 'transform':
+            for chunk in chunks:
+                yield self.processor._transform_data(chunk, parameters)
+        elif operation == 'clean':
+            yield from self._stream_clean(chunks, parameters)
+        elif operation == 'sample':
+            yield from self._stream_sample(chunks, parameters)
+    
+    def _stream_clean(self, chunks: Iterator[pd.DataFrame], parameters: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        operations = parameters.get('operations', ['remove_duplicates', 'handle_missing'])
+        strategy = parameters.get('missing_strategy', 'drop')
+        seen = np.empty(0, dtype=np.uint64)
+        last_row = None
+        
+        for chunk in chunks:
+            for operation in operations:
+                if operation == 'remove_duplicates':
+                    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+                    keep = ~pd.Series(hashes).duplicated().to_numpy()
+                    if len(seen):
+                        positions = np.searchsorted(seen, hashes).clip(max=len(seen) - 1)
+                        keep &= seen[positions] != hashes
+                    # Both runs are sorted, so the stable sort is a linear merge
+                    seen = np.concatenate([seen, np.sort(hashes[keep])])
+                    seen.sort(kind='stable')
+                    chunk = chunk[keep]
+                elif operation == 'handle_missing':
+                    if strategy == 'drop':
+                        chunk = chunk.dropna()
+                    elif strategy == 'forward_fill':
+                        # Carry the previous chunk's last row into this one
+                        if last_row is not None:
+                            chunk = pd.concat([last_row, chunk]).ffill().iloc[1:]
+                        else:
+                            chunk = chunk.ffill()
+                        if len(chunk):
+                            last_row = chunk.iloc[-1:]
+            yield chunk
+    
+    def _stream_sample(self, chunks: Iterator[pd.DataFrame], parameters: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        method = parameters.get('method', 'random')
+        size = parameters.get('size', 100)
+        
+        if method == 'head':
+            remaining = size
+            for chunk in chunks:
+                yield chunk.head(remaining)
+                remaining -= min(remaining, len(chunk))
+                if not remaining:
+                    # Stop reading the input
+                    return
+        elif method == 'tail':
+            kept = None
+            for chunk in chunks:
+                kept = chunk.tail(size) if kept is None else pd.concat([kept, chunk]).tail(size)
+            if kept is not None:
+                yield kept
+        else:
+            # Uniform sample without replacement: the rows with the smallest random keys
+            rng = np.random.default_rng(parameters.get('random_state', 42))
+            kept, kept_keys = None, np.empty(0)
+            for chunk in chunks:
+                keys = np.concatenate([kept_keys, rng.random(len(chunk))])
+                candidates = chunk if kept is None else pd.concat([kept, chunk])
+                order = np.argsort(keys, kind='stable')[:size]
+                kept, kept_keys = candidates.iloc[order], keys[order]
+            if kept is not None:
+                yield kept
+    
+    def _merge_stage(self, chunks: Iterator[pd.DataFrame], stage: Dict[str, Any]) -> pd.DataFrame:
+        if stage['operation'] == 'aggregate':
+            return self._merge_aggregate(chunks, stage['parameters'])
+        if stage['operation'] == 'statistics':
+            return self._merge_statistics(chunks, stage['parameters'])
+        return self._merge_group_by(chunks, stage['parameters'])
+    
+    def _merge_statistics(self, chunks: Iterator[pd.DataFrame], parameters: Dict[str, Any]) -> pd.DataFrame:
+        """Approximate statistics from one sketch fed chunk by chunk"""
+        
+        sketch = FrameSketch()
+        for chunk in chunks:
+            sketch.update(self.processor._statistics_columns(chunk, parameters.get('columns', 'all')))
+        return self.processor._approximate_statistics(sketch)
+    
+    def _merge_aggregate(self, chunks: Iterator[pd.DataFrame], parameters: Dict[str, Any]) -> pd.DataFrame:
+        """Aggregate with the same result layout as the in-memory `df.agg`"""
+        
+        agg_config = parameters.get('aggregations', {})
+        partials: Dict[str, Dict[str, Any]] = {}
+        
+        for chunk in chunks:
+            if not agg_config:
+                # Default aggregation, decided by the first chunk's dtypes
+                numeric_columns = chunk.select_dtypes(include=[np.number]).columns
+                agg_config = {col: ['mean', 'sum', 'count'] for col in numeric_columns}
+            
+            for column, funcs in agg_config.items():
+                funcs = [funcs] if isinstance(funcs, str) else funcs
+                values = chunk[column]
+                partial = partials.setdefault(column, {'sum': 0, 'count': 0, 'min': None, 'max': None})
+                needed = {part for func in funcs for part in PARTIALS[func]}
+                
+                if 'sum' in needed:
+                    partial['sum'] += values.sum()
+                if 'count' in needed:
+                    partial['count'] += values.count()
+                for part, pick in (('min', min), ('max', max)):
+                    if part in needed:
+                        value = getattr(values, part)()
+                        if not pd.isna(value):
+                            partial[part] = value if partial[part] is None else pick(partial[part], value)
+        
+        def final(column: str, func: str) -> Any:
+            partial = partials[column]
+            if func == 'mean':
+                return partial['sum'] / partial['count'] if partial['count'] else np.nan
+            value = partial[func]
+            return np.nan if value is None else value
+        
+        functions = []
+        columns = {}
+        for column, funcs in agg_config.items():
+            funcs = [funcs] if isinstance(funcs, str) else funcs
+            functions.extend(func for func in funcs if func not in functions)
+            columns[column] = pd.Series({func: final(column, func) for func in funcs})
+        
+        return pd.DataFrame(columns, index=functions).reset_index()
+    
+    def _group_specs(self, agg_functions: Dict[str, Any]) -> List[Tuple[str, Optional[str], str]]:
+        """(output name, column, function) for each aggregation, named as _group_data names them"""
+        
+        specs = []
+        for func_name, func_or_column in agg_functions.items():
+            if func_or_column == 'size':
+                specs.append((func_name, None, 'size'))
+            elif isinstance(func_or_column, dict):
+                for column, func in func_or_column.items():
+                    specs.append((f"{column}_{func}", column, func))
+            else:
+                specs.append((func_or_column, func_or_column, func_name))
+        return specs
+    
+    def _merge_group_by(self, chunks: Iterator[pd.DataFrame], parameters: Dict[str, Any]) -> pd.DataFrame:
+        """Group with the same result layout as the in-memory `_group_data`"""
+        
+        group_by = parameters.get('group_by', [])
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        specs = self._group_specs(parameters.get('aggregations', {'count': 'size'}))
+        
+        pending: List[pd.DataFrame] = []
+        merged = None
+        
+        for chunk in chunks:
+            grouped = chunk.groupby(group_by)
+            parts = {}
+            for i, (_, column, func) in enumerate(specs):
+                if func == 'size':
+                    parts[(i, 'size')] = grouped.size()
+                elif column in chunk.columns:
+                    for part in PARTIALS[func]:
+                        parts[(i, part)] = grouped[column].agg(part)
+            
+            if parts:
+                pending.append(pd.DataFrame(parts))
+            else:
+                pending.append(grouped.first())
+            
+            if len(pending) >= MAX_PENDING_PARTIALS:
+                merged = self._merge_partials(pending if merged is None else [merged] + pending, bool(specs))
+                pending = []
+        
+        if pending or merged is None:
+            merged = self._merge_partials(pending if merged is None else [merged] + pending, bool(specs))
+        
+        if not specs:
+            return merged.reset_index()
+        
+        result_parts = []
+        for i, (name, column, func) in enumerate(specs):
+            if func == 'mean' and (i, 'sum') in merged.columns:
+                result_parts.append((merged[(i, 'sum')] / merged[(i, 'count')]).rename(name))
+            elif (i, PARTIALS[func][0]) in merged.columns:
+                result_parts.append(merged[(i, PARTIALS[func][0])].rename(name))
+        
+        if not result_parts:
+            return merged.iloc[:, :0].reset_index()
+        return pd.concat(result_parts, axis=1).reset_index()
+    
+    def _merge_partials(self, frames: List[pd.DataFrame], has_specs: bool) -> pd.DataFrame:
+        if not frames:
+            return pd.DataFrame()
+        combined = pd.concat(frames)
+        grouped = combined.groupby(level=list(range(combined.index.nlevels)))
+        if not has_specs:
+            return grouped.first()
+        return grouped.agg({column: MERGE_PARTIALS[column[1]] for column in combined.columns})
@@ -0,0 +1,288 @@
+import ast
+import operator
+import re
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from app.services.expressions import ExpressionError
+
+if TYPE_CHECKING:
+    import polars as pl
+
+MAX_EXPRESSION_LENGTH = 4000
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.invert,
+    ast.Invert: operator.invert,
+}
+
+COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+def _string_method(value: Any, method: str) -> Any:
+    if np.ndim(value) == 0:
+        return value if pd.isna(value) else getattr(str(value), method)()
+    series = value if isinstance(value, pd.Series) else pd.Series(value)
+    # Missing values stay missing rather than becoming "NONE" or "nan"
+    result = getattr(series.astype(str).str, method)().where(series.notna(), None)
+    # Results of where() are arrays; keep them positional rather than indexed
+    return result if isinstance(value, pd.Series) else result.to_numpy()
+
+# name -> (argument count, pandas implementation)
+PANDAS_FUNCTIONS: Dict[str, Tuple[int, Callable[..., Any]]] = {
+    'abs': (1, np.abs),
+    'sqrt': (1, np.sqrt),
+    'log': (1, np.log),
+    'log10': (1, np.log10),
+    'exp': (1, np.exp),
+    'floor': (1, np.floor),
+    'ceil': (1, np.ceil),
+    'isnull': (1, pd.isna),
+    'notnull': (1, pd.notna),
+    'fillna': (2, lambda value, fill: np.where(pd.isna(value), fill, value)),
+    'upper': (1, lambda value: _string_method(value, 'upper')),
+    'lower': (1, lambda value: _string_method(value, 'lower')),
+    'where': (3, lambda condition, then, otherwise: np.where(condition, then, otherwise)),
+}
+
+BACKTICK_NAME = re.compile(r'`([^`]+)`')
+
+Assignment = Tuple[str, ast.expr, frozenset]
+
+@lru_cache(maxsize=256)
+def compile_expressions(source: str, target_column: Optional[str] = None) -> Tuple[Assignment, ...]:
+    """Parse `target = expression` assignments into checked ASTs
+    
+    Assignments are separated by newlines or semicolons and may read the
+    targets of earlier ones. A bare expression needs `target_column`. Names
+    are columns; names that are not identifiers are quoted in backticks.
+    Only arithmetic, comparisons, and/or/not, `x if c else y` and the
+    functions in PANDAS_FUNCTIONS are accepted.
+    """
+    
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    
+    quoted: Dict[str, str] = {}
+    
+    def quote(match: re.Match) -> str:
+        placeholder = f"__column_{len(quoted)}"
+        quoted[placeholder] = match.group(1)
+        return placeholder
+    
+    try:
+        module = ast.parse(BACKTICK_NAME.sub(quote, source).strip(), mode='exec')
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression {source!r}: {e.msg}")
+    
+    assignments = []
+    for statement in module.body:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+                and isinstance(statement.targets[0], ast.Name):
+            target, node = statement.targets[0].id, statement.value
+        elif isinstance(statement, ast.Expr) and target_column and len(module.body) == 1:
+            target, node = target_column, statement.value
+        else:
+            raise ExpressionError(f"Expected 'column = expression' in {source!r}")
+        names = frozenset(quoted.get(name, name) for name in _check(node, source))
+        assignments.append((quoted.get(target, target), _rename(node, quoted), names))
+    
+    if not assignments:
+        raise ExpressionError("Empty expression")
+    return tuple(assignments)
+
+def _check(node: ast.AST, source: str) -> List[str]:
+    """Reject anything outside the whitelist; returns the names read"""
+    
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (int, float, str, bool)) and node.value is not None:
+            raise ExpressionError(f"Unsupported constant {node.value!r} in {source!r}")
+        return []
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        # Repeating a string constant can allocate without bound
+        if isinstance(node.op, ast.Mult) and any(
+            isinstance(side, ast.Constant) and isinstance(side.value, str) for side in (node.left, node.right)
+        ):
+            raise ExpressionError(f"String repetition is not supported in {source!r}")
+        return _check(node.left, source) + _check(node.right, source)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return _check(node.operand, source)
+    if isinstance(node, ast.BoolOp):
+        return [name for value in node.values for name in _check(value, source)]
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARISONS for op in node.ops):
+        return _check(node.left, source) + [name for value in node.comparators for name in _check(value, source)]
+    if isinstance(node, ast.IfExp):
+        return _check(node.test, source) + _check(node.body, source) + _check(node.orelse, source)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        function = PANDAS_FUNCTIONS.get(node.func.id)
+        if function is None:
+            raise ExpressionError(
+                f"Unknown function {node.func.id}() in {source!r}. Supported: {', '.join(sorted(PANDAS_FUNCTIONS))}"
+            )
+        if len(node.args) != function[0]:
+            raise ExpressionError(f"{node.func.id}() takes {function[0]} argument(s) in {source!r}")
+        return [name for arg in node.args for name in _check(arg, source)]
+    raise ExpressionError(f"Unsupported syntax {type(node).__name__} in {source!r}")
+
+def _rename(node: ast.expr, quoted: Dict[str, str]) -> ast.expr:
+    """Put the backtick-quoted column names back in place of their placeholders"""
+    
+    if quoted:
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and child.id in quoted:
+                child.id = quoted[child.id]
+    return node
+
+def _constant(value: Any) -> Any:
+    # NumPy scalars overflow instead of growing without bound like Python
+    # ints, and `not` on them is logical rather than bitwise
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return np.bool_(value)
+    return np.int64(value) if isinstance(value, int) else np.float64(value)
+
+def evaluate_pandas(df: pd.DataFrame, assignments: Tuple[Assignment, ...]) -> Dict[str, Any]:
+    """Evaluate assignments over whole columns; returns the new columns in order"""
+    
+    results: Dict[str, Any] = {}
+    
+    def lookup(name: str) -> Any:
+        if name in results:
+            return results[name]
+        if name in df.columns:
+            return df[name]
+        raise ExpressionError(f"Unknown column '{name}' in expression")
+    
+    for target, node, _ in assignments:
+        try:
+            results[target] = _evaluate(node, lookup)
+        except (TypeError, ValueError) as e:
+            if isinstance(e, ExpressionError):
+                raise
+            raise ExpressionError(f"Cannot compute '{target}': {e}")
+    return results
+
+def _evaluate(node: ast.expr, lookup: Callable[[str], Any]) -> Any:
+    if isinstance(node, ast.Name):
+        return lookup(node.id)
+    if isinstance(node, ast.Constant):
+        return _constant(node.value)
+    if isinstance(node, ast.BinOp):
+        return BINARY_OPERATORS[type(node.op)](_evaluate(node.left, lookup), _evaluate(node.right, lookup))
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, lookup))
+    if isinstance(node, ast.BoolOp):
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+        result = _evaluate(node.values[0], lookup)
+        for value in node.values[1:]:
+            result = combine(result, _evaluate(value, lookup))
+        return result
+    if isinstance(node, ast.Compare):
+        # a < b < c is (a < b) & (b < c)
+        result, left = None, _evaluate(node.left, lookup)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _evaluate(comparator, lookup)
+            outcome = COMPARISONS[type(op)](left, right)
+            result = outcome if result is None else result & outcome
+            left = right
+        return result
+    if isinstance(node, ast.IfExp):
+        return np.where(_evaluate(node.test, lookup), _evaluate(node.body, lookup), _evaluate(node.orelse, lookup))
+    # Calls, the only node left after _check
+    return PANDAS_FUNCTIONS[node.func.id][1](*(_evaluate(arg, lookup) for arg in node.args))
+
+def compile_polars_expressions(
+    columns: List[str],
+    assignments: Tuple[Assignment, ...]
+) -> List[List["pl.Expr"]]:
+    """Polars expressions for the assignments, batched into `with_columns` calls
+    
+    Assignments in one batch do not read each other's targets, so each
+    batch is evaluated in parallel in a single pass over the frame.
+    """
+    
+    import polars as pl
+    
+    known = set(columns)
+    batches: List[List[pl.Expr]] = []
+    pending: Dict[str, pl.Expr] = {}
+    for target, node, names in assignments:
+        missing = names - known - set(pending)
+        if missing:
+            raise ExpressionError(f"Unknown column '{sorted(missing)[0]}' in expression")
+        if target in pending or names & set(pending):
+            batches.append(list(pending.values()))
+            known |= set(pending)
+            pending = {}
+        pending[target] = _to_polars(node).alias(target)
+    batches.append(list(pending.values()))
+    return batches
+
+def _to_polars(node: ast.expr) -> "pl.Expr":
+    import polars as pl
+    
+    if isinstance(node, ast.Name):
+        return pl.col(node.id)
+    if isinstance(node, ast.Constant):
+        return pl.lit(node.value)
+    if isinstance(node, ast.BinOp):
+        return BINARY_OPERATORS[type(node.op)](_to_polars(node.left), _to_polars(node.right))
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_OPERATORS[type(node.op)](_to_polars(node.operand))
+    if isinstance(node, ast.BoolOp):
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+        result = _to_polars(node.values[0])
+        for value in node.values[1:]:
+            result = combine(result, _to_polars(value))
+        return result
+    if isinstance(node, ast.Compare):
+        result, left = None, _to_polars(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _to_polars(comparator)
+            # pandas compares missing values as False, except != which is True
+            outcome = COMPARISONS[type(op)](left, right).fill_null(isinstance(op, ast.NotEq))
+            result = outcome if result is None else result & outcome
+            left = right
+        return result
+    if isinstance(node, ast.IfExp):
+        return pl.when(_to_polars(node.test)).then(_to_polars(node.body)).otherwise(_to_polars(node.orelse))
+    
+    args = [_to_polars(arg) for arg in node.args]
+    name = node.func.id
+    if name == 'where':
+        return pl.when(args[0]).then(args[1]).otherwise(args[2])
+    if name == 'isnull':
+        return args[0].is_null()
+    if name == 'notnull':
+        return args[0].is_not_null()
+    if name == 'fillna':
+        return args[0].fill_null(args[1])
+    if name == 'upper':
+        return args[0].cast(pl.Utf8).str.to_uppercase()
+    if name == 'lower':
+        return args[0].cast(pl.Utf8).str.to_lowercase()
+    return getattr(args[0], name)()
@@ -1,9 +1,20 @@
+import asyncio
+import time
 import pandas as pd
 import numpy as np
 import json
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
+from app.agents.column_expressions import compile_expressions, evaluate_pandas
+from app.agents.dtype_compaction import COMPACTING_OPERATIONS, compact_dtypes, compaction_safe, restore_dtypes
+from app.agents.filter_compiler import compile_mask
+from app.agents.lookup_tables import lookup_tables
+from app.agents.sketches import FrameSketch
+from app.agents.window_functions import evaluate_pandas as evaluate_windows, parse_windows
+from app.services.columnar import ColumnarTable
+from app.services.file_streams import FileStream
+
 class DataProcessorAgent:
     """Custom agent for data processing and transformation operations"""
     
@@ -11,45 +22,142 @@ class DataProcessorAgent:
         self.config = config
         self.llm = llm
         self.supported_operations = self._get_supported_operations()
+        self._polars_engine = None
     
     async def execute(self, input_data: Dict[str, Any], context: Any) -> Dict[str, Any]:
-        """Execute data processing operation"""
+        """Execute data processing operation
+        
+        `pipeline` lists further operations to run on the result in the same
+        frame; the execution engine uses it to fuse chains of data_processor
+        nodes. Each stage is reported in `stages`.
+        
+        With `streaming`, a `source_path` CSV/JSON Lines file, or a FileStream
+        from a streamed file_handler read as `data`, the pandas engine reads
+        the input in `chunk_size` row chunks and streams the leading stages
+        that allow it. A `memory_budget_mb` implies streaming and lets
+        group_by and pivot spill to disk. `compact_dtypes` shrinks column
+        dtypes before the first whole-frame operation and reports memory
+        before and after in its metadata. `parallel` runs filter, row-wise
+        transform and clean, and group_by stages over row partitions on a
+        process pool when the frame is large enough to pay for it.
+        """
         
         data = input_data.get('data')
         operation = input_data.get('operation')
         parameters = input_data.get('parameters', {})
+        source_path = input_data.get('source_path')
         
-        if not data:
+        if not data and not source_path:
             raise ValueError("No data provided for processing")
         
         if not operation:
             raise ValueError("No operation specified")
         
-        if operation not in self.supported_operations:
-            raise ValueError(f"Unsupported operation: {operation}")
-        
-        # Convert data to pandas DataFrame if it's not already
-        df = self._prepare_dataframe(data)
-        
-        # Execute the operation
-        result_df, metadata = await self._execute_operation(df, operation, parameters)
-        
-        # Convert result back to the desired format
-        output_format = parameters.get('output_format', 'records')
-        processed_data = self._format_output(result_df, output_format)
+        pipeline = [{'operation': operation, 'parameters': parameters}] + input_data.get('pipeline', [])
+        for stage in pipeline:
+            if stage['operation'] not in self.supported_operations:
+                raise ValueError(f"Unsupported operation: {stage['operation']}")
+        
+        engine = parameters.get('engine', self.config.get('engine', 'pandas'))
+        output_format = pipeline[-1]['parameters'].get('output_format', 'records')
+        memory_budget_mb = parameters.get('memory_budget_mb', self.config.get('memory_budget_mb'))
+        # A streamed file read is consumed chunk by chunk from disk
+        streaming = bool(source_path or memory_budget_mb or isinstance(data, FileStream)) or parameters.get(
+            'streaming', self.config.get('streaming', False)
+        )
+        
+        if streaming and engine != 'pandas':
+            raise ValueError("Chunked streaming is only supported by the pandas engine")
+        
+        if engine == 'polars':
+            # Polars plans run on their own thread pool, off the event loop
+            result_df, stages, processed_data = await asyncio.to_thread(
+                self._execute_polars, data, pipeline, output_format
+            )
+        elif engine == 'pandas':
+            if streaming:
+                result_df, stages, streamed = await asyncio.to_thread(
+                    self._execute_chunked, data, source_path, pipeline, {
+                        'chunk_size': parameters.get('chunk_size', self.config.get('chunk_size')),
+                        'memory_budget_mb': memory_budget_mb,
+                        'spill_directory': parameters.get('spill_directory', self.config.get('spill_directory')),
+                        'spill_workers': parameters.get('spill_workers', self.config.get('spill_workers'))
+                    }
+                )
+            else:
+                # Convert data to pandas DataFrame if it's not already
+                result_df = self._prepare_dataframe(data)
+                stages, streamed = [], 0
+            
+            compact = parameters.get('compact_dtypes', self.config.get('compact_dtypes', False))
+            parallel = None
+            if parameters.get('parallel', self.config.get('parallel', False)):
+                from app.agents.parallel_executor import ParallelDataProcessor
+                parallel = ParallelDataProcessor(
+                    self, parameters.get('parallel_workers', self.config.get('parallel_workers'))
+                )
+            
+            # Execute the remaining operations over one frame
+            for i, stage in enumerate(pipeline[streamed:], streamed):
+                if i:
+                    # Match the fresh index a separate node would have built
+                    result_df = result_df.reset_index(drop=True)
+                started = time.perf_counter()
+                compaction = None
+                if compact and stage['operation'] in COMPACTING_OPERATIONS and compaction_safe(pipeline[i:]):
+                    # Once, right before the first operation that works on the whole frame
+                    result_df, compaction = compact_dtypes(result_df)
+                    compact = False
+                workers = parallel.plan(result_df) if parallel and parallel.supports(stage) else 1
+                if workers > 1:
+                    result_df, metadata = await asyncio.to_thread(parallel.execute, result_df, stage, workers)
+                else:
+                    result_df, metadata = await self._execute_operation(
+                        result_df, stage['operation'], stage['parameters'], self._lookup_owner(context)
+                    )
+                if compaction:
+                    metadata['dtype_compaction'] = compaction
+                stages.append(self._stage_result(stage, metadata, result_df.shape, time.perf_counter() - started))
+            
+            # Convert result back to the desired format
+            processed_data = self._format_output(result_df, output_format)
+        else:
+            raise ValueError(f"Unsupported engine: {engine}")
         
-        return {
+        result = {
             'output': {
                 'data': processed_data,
-                'metadata': metadata,
-                'operation': operation,
+                'metadata': stages[-1]['metadata'],
+                'operation': pipeline[-1]['operation'],
                 'timestamp': datetime.utcnow().isoformat()
             },
+            'variables': stages[-1]['variables']
+        }
+        
+        if len(pipeline) > 1:
+            result['stages'] = stages
+        
+        return result
+    
+    def _stage_result(
+        self,
+        stage: Dict[str, Any],
+        metadata: Dict[str, Any],
+        shape: tuple,
+        execution_time: Optional[float]
+    ) -> Dict[str, Any]:
+        """Describe one pipeline stage the way a standalone node run would"""
+        
+        return {
+            'node_id': stage.get('node_id'),
+            'operation': stage['operation'],
+            'metadata': metadata,
             'variables': {
-                'processed_rows': len(result_df),
-                'columns_count': len(result_df.columns),
+                'processed_rows': shape[0],
+                'columns_count': shape[1],
                 'operation_success': True
-            }
+            },
+            'execution_time': execution_time
         }
     
     def _prepare_dataframe(self, data: Any) -> pd.DataFrame:
@@ -57,6 +165,8 @@ class DataProcessorAgent:
         
         if isinstance(data, pd.DataFrame):
             return data
+        elif isinstance(data, ColumnarTable):
+            return data.to_pandas()
         elif isinstance(data, list):
             if data and isinstance(data[0], dict):
                 return pd.DataFrame(data)
@@ -76,11 +186,71 @@ class DataProcessorAgent:
         else:
             raise ValueError(f"Unsupported data type: {type(data)}")
     
+    def _execute_chunked(
+        self,
+        data: Any,
+        source_path: Optional[str],
+        pipeline: List[Dict[str, Any]],
+        options: Dict[str, Any]
+    ) -> tuple:
+        """Stream the leading stages over input chunks"""
+        
+        from app.agents.chunked_processor import ChunkedDataProcessor
+        
+        processor = ChunkedDataProcessor(self, **options)
+        result_df, metadata, streamed = processor.execute(processor.iter_chunks(data, source_path), pipeline)
+        
+        stages = []
+        for stage, stage_metadata in zip(pipeline, metadata):
+            # Streamed stages run interleaved, so there is no per-stage time
+            stages.append(self._stage_result(stage, stage_metadata, stage_metadata['result_shape'], None))
+        
+        return result_df, stages, streamed
+    
+    def _execute_polars(
+        self,
+        data: Any,
+        pipeline: List[Dict[str, Any]],
+        output_format: str
+    ) -> tuple:
+        """Run the operations as one lazy Polars plan"""
+        
+        if self._polars_engine is None:
+            from app.agents.polars_engine import PolarsDataEngine
+            self._polars_engine = PolarsDataEngine()
+        
+        df = self._polars_engine.prepare(data)
+        result_df, stage_info = self._polars_engine.execute_pipeline(df, pipeline)
+        
+        stages = []
+        original_shape = df.shape
+        for stage, info in zip(pipeline, stage_info):
+            metadata = {
+                'original_shape': original_shape,
+                'operation_parameters': stage['parameters'],
+                'engine': 'polars',
+                'result_shape': info['shape'],
+                'columns': info['columns']
+            }
+            # Stages share one plan, so there is no per-stage time
+            stages.append(self._stage_result(stage, metadata, info['shape'], None))
+            original_shape = info['shape']
+        
+        if isinstance(result_df, pd.DataFrame):
+            processed_data = self._format_output(result_df, output_format)
+        elif output_format == 'table':
+            processed_data = ColumnarTable(result_df)
+        else:
+            processed_data = self._polars_engine.format_output(result_df, output_format)
+        
+        return result_df, stages, processed_data
+    
     async def _execute_operation(
         self, 
         df: pd.DataFrame, 
         operation: str, 
-        parameters: Dict[str, Any]
+        parameters: Dict[str, Any],
+        lookup_owner: Optional[str] = None
     ) -> tuple[pd.DataFrame, Dict[str, Any]]:
         """Execute the specified data operation"""
         
@@ -100,7 +270,7 @@ class DataProcessorAgent:
         elif operation == 'transform':
             result_df = self._transform_data(df, parameters)
         elif operation == 'join':
-            result_df = self._join_data(df, parameters)
+            result_df = self._join_data(df, parameters, lookup_owner)
         elif operation == 'pivot':
             result_df = self._pivot_data(df, parameters)
         elif operation == 'clean':
@@ -109,41 +279,28 @@ class DataProcessorAgent:
             result_df = self._sample_data(df, parameters)
         elif operation == 'statistics':
             result_df = self._calculate_statistics(df, parameters)
+        elif operation == 'window':
+            result_df = self._window_data(df, parameters)
         else:
             raise ValueError(f"Operation not implemented: {operation}")
         
         metadata['result_shape'] = result_df.shape
         metadata['columns'] = list(result_df.columns)
+        if 'approximation' in result_df.attrs:
+            metadata['approximation'] = result_df.attrs['approximation']
         
         return result_df, metadata
     
     def _filter_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
-        """Filter data based on conditions"""
+        """Filter data based on a condition list or AND/OR/NOT condition tree"""
         
-        conditions = parameters.get('conditions', [])
+        mask = compile_mask(
+            df, parameters.get('conditions', []), parameters.get('null_handling', 'boolean')
+        )
         
-        for condition in conditions:
-            column = condition.get('column')
-            operator = condition.get('operator')
-            value = condition.get('value')
-            
-            if column not in df.columns:
-                continue
-            
-            if operator == 'equals':
-                df = df[df[column] == value]
-            elif operator == 'not_equals':
-                df = df[df[column] != value]
-            elif operator == 'greater_than':
-                df = df[df[column] > value]
-            elif operator == 'less_than':
-                df = df[df[column] < value]
-            elif operator == 'contains':
-                df = df[df[column].astype(str).str.contains(str(value), na=False)]
-            elif operator == 'in':
-                df = df[df[column].isin(value if isinstance(value, list) else [value])]
-        
-        return df
+        if mask is None:
+            return df
+        return df[mask]
     
     def _sort_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
         """Sort data by specified columns"""
@@ -167,7 +324,8 @@ class DataProcessorAgent:
         
         agg_functions = parameters.get('aggregations', {'count': 'size'})
         
-        grouped = df.groupby(group_by)
+        # observed: only key combinations present in the data, also for categoricals
+        grouped = df.groupby(group_by, observed=True)
         
         result_parts = []
         for func_name, func_or_column in agg_functions.items():
@@ -209,7 +367,11 @@ class DataProcessorAgent:
         return result.reset_index()
     
     def _transform_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
-        """Transform data using specified operations"""
+        """Transform data using specified operations
+        
+        An `expression` transform derives one or more columns from
+        assignments such as `revenue = price * qty * (1 - discount)`.
+        """
         
         transformations = parameters.get('transformations', [])
         result_df = df.copy()
@@ -220,6 +382,13 @@ class DataProcessorAgent:
             target_column = transform.get('target_column', column)
             value = transform.get('value')
             
+            if operation == 'expression':
+                # Every assignment is computed from whole columns, then added at once
+                assignments = compile_expressions(transform.get('expression', ''), target_column)
+                for target, values in evaluate_pandas(result_df, assignments).items():
+                    result_df[target] = values
+                continue
+            
             if column not in result_df.columns:
                 continue
             
@@ -244,6 +413,19 @@ class DataProcessorAgent:
         
         return result_df
     
+    def _window_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
+        """Add window columns (running totals, rolling means, lags, ranks) per partition
+        
+        Rows keep their order; `order_by` only orders the rows within each
+        window. See parse_windows for the parameters.
+        """
+        
+        plan = parse_windows(parameters)
+        result_df = df.copy()
+        for target, values in evaluate_windows(df, plan).items():
+            result_df[target] = values
+        return result_df
+    
     def _clean_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
         """Clean data by removing/fixing issues"""
         
@@ -266,6 +448,8 @@ class DataProcessorAgent:
                     result_df[numeric_columns] = result_df[numeric_columns].fillna(
                         result_df[numeric_columns].mean()
                     )
+            elif operation == 'remove_outliers' and parameters.get('approximate'):
+                result_df = self._remove_outliers_approximate(result_df)
             elif operation == 'remove_outliers':
                 # Remove outliers using IQR method
                 numeric_columns = result_df.select_dtypes(include=[np.number]).columns
@@ -281,6 +465,27 @@ class DataProcessorAgent:
         
         return result_df
     
+    def _remove_outliers_approximate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """IQR outlier removal with sketched quartiles of every numeric column at once
+        
+        Unlike the exact path, every column's bounds come from the input rather
+        than from the rows left after the previous column was filtered.
+        """
+        
+        numeric = df.select_dtypes(include=[np.number])
+        if numeric.empty:
+            return df
+        
+        sketch = FrameSketch()
+        sketch.update(numeric)
+        quartiles = pd.DataFrame(sketch.quantiles([0.25, 0.75]), index=['q1', 'q3'])[numeric.columns]
+        iqr = quartiles.loc['q3'] - quartiles.loc['q1']
+        lower = (quartiles.loc['q1'] - 1.5 * iqr).to_numpy()
+        upper = (quartiles.loc['q3'] + 1.5 * iqr).to_numpy()
+        
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        return df[((values >= lower) & (values <= upper)).all(axis=1)]
+    
     def _sample_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
         """Sample data using various strategies"""
         
@@ -304,10 +509,19 @@ class DataProcessorAgent:
         return df.sample(n=min(size, len(df)), random_state=42)
     
     def _calculate_statistics(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
-        """Calculate statistical summaries"""
+        """Calculate statistical summaries
+        
+        With `approximate` the summary comes from mergeable sketches built in
+        one pass over all columns; the error bounds end up in the metadata.
+        """
         
         include_columns = parameters.get('columns', 'all')
         
+        if parameters.get('approximate'):
+            sketch = FrameSketch()
+            sketch.update(self._statistics_columns(df, include_columns))
+            return self._approximate_statistics(sketch)
+        
         if include_columns == 'all':
             stats_df = df.describe(include='all')
         elif include_columns == 'numeric':
@@ -321,12 +535,55 @@ class DataProcessorAgent:
         
         return stats_df.reset_index()
     
-    def _join_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
-        """Join with another dataset"""
+    def _statistics_columns(self, df: pd.DataFrame, include_columns: Any) -> pd.DataFrame:
+        """The columns a statistics operation summarizes"""
+        
+        if include_columns == 'all':
+            return df
+        if include_columns == 'numeric':
+            return df.select_dtypes(include=[np.number])
+        if isinstance(include_columns, str):
+            include_columns = [include_columns]
+        return df[[col for col in include_columns if col in df.columns]]
+    
+    def _approximate_statistics(self, sketch: FrameSketch) -> pd.DataFrame:
+        stats_df = sketch.describe().reset_index()
+        stats_df.attrs['approximation'] = sketch.error_bounds()
+        return stats_df
+    
+    def _join_data(
+        self,
+        df: pd.DataFrame,
+        parameters: Dict[str, Any],
+        lookup_owner: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Join with another dataset
+        
+        With `lookup_table` the right side is a named table from the
+        process-level cache, registered from `join_data` when that is given
+        (content-hashed, so an unchanged table is only built once) and
+        joined by probing an index on the join keys. Names are scoped to
+        the lookup owner, the user or workflow running the execution.
+        """
         
         join_data = parameters.get('join_data', [])
         join_on = parameters.get('join_on', [])
         join_type = parameters.get('join_type', 'inner')
+        lookup_table = parameters.get('lookup_table')
+        
+        if lookup_table:
+            if lookup_owner is None:
+                raise ValueError("Lookup tables need an execution with a user or workflow to own them")
+            if join_data:
+                table = lookup_tables.register(lookup_owner, lookup_table, join_data)
+            else:
+                table = lookup_tables.get(lookup_owner, lookup_table)
+            if table is None:
+                raise ValueError(f"Unknown lookup table: {lookup_table}")
+            if join_on:
+                keys = [join_on] if isinstance(join_on, str) else list(join_on)
+                return lookup_tables.join(table, df, keys, join_type)
+            return pd.concat([df, table.frame], ignore_index=True)
         
         if not join_data:
             return df
@@ -338,6 +595,12 @@ class DataProcessorAgent:
         else:
             return pd.concat([df, join_df], ignore_index=True)
     
+    def _lookup_owner(self, context: Any) -> Optional[str]:
+        """The user, or failing that the workflow, whose lookup tables an execution sees"""
+        
+        owner = getattr(context, 'user_id', None) or getattr(context, 'workflow_id', None)
+        return str(owner) if owner is not None else None
+    
     def _pivot_data(self, df: pd.DataFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
         """Pivot data based on specified columns"""
         
@@ -354,12 +617,15 @@ class DataProcessorAgent:
             columns=columns,
             values=values,
             aggfunc=aggfunc,
-            fill_value=0
+            fill_value=0,
+            observed=True
         ).reset_index()
     
     def _format_output(self, df: pd.DataFrame, output_format: str) -> Any:
         """Format the output dataframe according to specified format"""
         
+        df = restore_dtypes(df)
+        
         if output_format == 'records':
             return df.to_dict('records')
         elif output_format == 'list':
@@ -370,6 +636,8 @@ class DataProcessorAgent:
             return df.to_json(orient='records')
         elif output_format == 'csv':
             return df.to_csv(index=False)
+        elif output_format == 'table':
+            return ColumnarTable.from_pandas(df)
         else:
             return df.to_dict('records')  # Default format
     
@@ -386,5 +654,6 @@ class DataProcessorAgent:
             'pivot',
             'clean',
             'sample',
-            'statistics'
+            'statistics',
+            'window'
         ]
\ No newline at end of file
@@ -6,10 +6,12 @@ import json
 import sqlite3
 import psycopg2
 import pymysql
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, exc, text
 from sqlalchemy.orm import sessionmaker
 import pandas as pd
 
+from app.services.columnar import ColumnarTable
+
 logger = logging.getLogger(__name__)
 
 class DatabaseQueryAgent:
@@ -45,7 +47,8 @@ class DatabaseQueryAgent:
             
             # Execute operation
             if operation == 'query':
-                result = await self._execute_query(query, parameters)
+                output_format = input_data.get('output_format', self.config.get('output_format', 'records'))
+                result = await self._execute_query(query, parameters, output_format)
             elif operation == 'insert':
                 result = await self._execute_insert(query, parameters)
             elif operation == 'update':
@@ -76,12 +79,25 @@ class DatabaseQueryAgent:
             logger.error(f"Database operation failed: {e}", exc_info=True)
             return {
                 'output': {'error': str(e)},
+                # An unreachable or failing server, unlike a bad query
+                'dependency_error': self._is_dependency_error(e),
                 'variables': {
                     'operation_success': False,
                     'error_message': str(e)
                 }
             }
     
+    def _is_dependency_error(self, error: Exception) -> bool:
+        if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+            return True
+        if isinstance(error, (exc.TimeoutError, exc.DisconnectionError)):
+            # Pool checkout timed out or the connection dropped
+            return True
+        if isinstance(error, exc.DBAPIError) and error.connection_invalidated:
+            return True
+        # SQLite also raises OperationalError for bad SQL such as a missing table
+        return isinstance(error, exc.OperationalError) and self.engine is not None and self.engine.dialect.name != 'sqlite'
+    
     async def _initialize_connection(self):
         """Initialize database connection"""
         
@@ -102,16 +118,39 @@ class DatabaseQueryAgent:
         
         self.Session = sessionmaker(bind=self.engine)
     
-    async def _execute_query(self, query: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def close(self):
+        """Dispose of the database engine and its connection pool"""
+        
+        if self.engine is not None:
+            self.engine.dispose()
+            self.engine = None
+            self.Session = None
+    
+    async def _execute_query(
+        self,
+        query: str,
+        parameters: Dict[str, Any],
+        output_format: str = 'records'
+    ) -> Dict[str, Any]:
         """Execute SELECT query"""
         
         with self.engine.connect() as connection:
             result = connection.execute(text(query), parameters)
             
-            # Convert to list of dictionaries
             columns = result.keys()
             rows = result.fetchall()
             
+            if output_format == 'table':
+                # Columnar result, with no dict per row
+                return {
+                    'data': ColumnarTable.from_rows(rows, list(columns)),
+                    'columns': list(columns),
+                    'row_count': len(rows),
+                    'query': query
+                }
+            
+            # Convert to list of dictionaries
+
             data = []
             for row in rows:
                 row_dict = {}
@@ -0,0 +1,132 @@
+import importlib
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Strings with at most this share of distinct values become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Below this many rows a column is left alone; the savings would be noise
+MIN_ROWS = 64
+
+# Operations that copy or hash the whole frame, where compaction pays off
+COMPACTING_OPERATIONS = {'group_by', 'pivot', 'sort', 'join', 'clean', 'statistics', 'aggregate'}
+
+INTEGER_TYPES = ['int8', 'int16', 'int32', 'int64']
+NULLABLE_INTEGER_TYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+_has_pyarrow = None
+
+def pyarrow_available() -> bool:
+    global _has_pyarrow
+    if _has_pyarrow is None:
+        # An installed pyarrow can still fail to import, e.g. built against another NumPy
+        try:
+            importlib.import_module('pyarrow')
+            _has_pyarrow = True
+        except ImportError:
+            _has_pyarrow = False
+    return _has_pyarrow
+
+def compaction_safe(stages: List[Dict[str, Any]]) -> bool:
+    """Whether no stage computes new values from the columns
+    
+    Narrow integers overflow under arithmetic (int8 * 2 wraps), categoricals
+    reject string concatenation and nullable integers reject a float fill.
+    """
+    
+    for stage in stages:
+        if stage['operation'] == 'transform':
+            return False
+        if stage['operation'] == 'clean' and stage['parameters'].get('missing_strategy') == 'mean':
+            return False
+    return True
+
+def _smallest_integer(minimum: int, maximum: int, nullable: bool) -> Any:
+    for numpy_type, nullable_type in zip(INTEGER_TYPES, NULLABLE_INTEGER_TYPES):
+        info = np.iinfo(numpy_type)
+        if info.min <= minimum and maximum <= info.max:
+            return nullable_type if nullable else numpy_type
+    return None
+
+def _compact_column(series: pd.Series) -> Any:
+    """Pick a smaller dtype for a column from its statistics, or None to keep it"""
+    
+    dtype = series.dtype
+    
+    if dtype == object:
+        if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+            return None
+        if series.nunique(dropna=True) <= len(series) * CATEGORY_MAX_UNIQUE_RATIO:
+            return 'category'
+        # Arrow strings are far smaller than Python str objects, but need pyarrow
+        return 'string[pyarrow]' if pyarrow_available() else None
+    
+    if pd.api.types.is_integer_dtype(dtype) and dtype.kind == 'i':
+        if series.empty:
+            return None
+        target = _smallest_integer(int(series.min()), int(series.max()), nullable=False)
+        return target if target is not None and np.dtype(target).itemsize < dtype.itemsize else None
+    
+    if dtype.kind == 'f':
+        # Integer columns with missing values come out of records as float64
+        values = series.dropna()
+        if values.empty or not np.array_equal(values, np.floor(values)) or np.isinf(values).any():
+            return None
+        target = _smallest_integer(int(values.min()), int(values.max()), nullable=True)
+        # Nullable integers carry a one-byte mask per value
+        if target is None or np.dtype(target.lower()).itemsize + 1 >= dtype.itemsize:
+            return None
+        return target
+    
+    return None
+
+def compact_dtypes(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Shrink column dtypes where the values allow it
+    
+    Low-cardinality strings become categoricals, other strings Arrow strings
+    when pyarrow is installed, integers the smallest integer type that holds
+    their range, and integral float columns with missing values nullable
+    integers. Floats are never narrowed, since float32 sums and means lose
+    precision. Returns the frame and a report with memory before and after.
+    """
+    
+    memory_before = int(df.memory_usage(deep=True).sum())
+    conversions = {}
+    
+    if len(df) >= MIN_ROWS:
+        for column in df.columns:
+            target = _compact_column(df[column])
+            if target is not None:
+                conversions[column] = target
+    
+    if conversions:
+        df = df.astype(conversions)
+    
+    return df, {
+        'memory_before': memory_before,
+        'memory_after': int(df.memory_usage(deep=True).sum()) if conversions else memory_before,
+        'converted_columns': {str(column): str(target) for column, target in conversions.items()}
+    }
+
+def restore_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Undo compaction for output: missing values become None, not NaN or pd.NA"""
+    
+    restored = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or (
+            isinstance(dtype, pd.api.extensions.ExtensionDtype) and df[column].hasnans
+        ):
+            values = df[column].astype(object)
+            restored[column] = values.where(values.notna(), None)
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in 'iu':
+            restored[column] = df[column].to_numpy(dtype=dtype.numpy_dtype)
+    
+    if not restored:
+        return df
+    
+    df = df.copy()
+    for column, values in restored.items():
+        df[column] = values
+    return df
@@ -1,4 +1,5 @@
 import smtplib
+import socket
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -74,12 +75,27 @@ class EmailSenderAgent:
         except Exception as e:
             return {
                 'output': {'error': str(e)},
+                # An unreachable or failing server, unlike refused recipients or bad credentials
+                'dependency_error': self._is_dependency_error(e),
                 'variables': {
                     'email_sent': False,
                     'error_message': str(e)
                 }
             }
     
+    def _is_dependency_error(self, error: Exception) -> bool:
+        # SMTP errors are OSErrors, so they are sorted out before the network errors
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            return False
+        if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPHeloError, smtplib.SMTPServerDisconnected)):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            # 4xx replies are transient server conditions such as 421 service not available
+            return 400 <= error.smtp_code < 500
+        if isinstance(error, smtplib.SMTPException):
+            return False
+        return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, socket.gaierror, ssl.SSLError))
+    
     async def _create_email_message(
         self,
         from_email: str,
@@ -243,6 +259,8 @@ class EmailSenderAgent:
         except Exception as e:
             return {
                 'output': {'error': str(e)},
+                # An unreachable or failing server, unlike refused recipients or bad credentials
+                'dependency_error': self._is_dependency_error(e),
                 'variables': {
                     'email_sent': False,
                     'error_message': str(e)
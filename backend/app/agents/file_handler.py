@@ -3,11 +3,22 @@ import json
 import csv
 import asyncio
 import aiofiles
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 import mimetypes
 
+from app.core.serialization import json_default
+from app.services.columnar import ColumnarTable
+from app.services.content_index import DEFAULT_INDEX_PATH, get_content_index
+from app.services.directory_scanner import DEFAULT_SCAN_WORKERS, DirectoryScanner
+from app.services.file_streams import (
+    DEFAULT_CHUNK_SIZE, FileStream, iter_csv, iter_json_lines, read_ranges, write_chunks
+)
+
+# Characters read to guess the format of a streamed file from its content
+SNIFF_CHARS = 64 * 1024
+
 class FileHandlerAgent:
     """Custom agent for file operations and management"""
     
@@ -16,6 +27,7 @@ class FileHandlerAgent:
         self.llm = llm
         self.supported_formats = self._get_supported_formats()
         self.max_file_size = config.get('max_file_size', 10 * 1024 * 1024)  # 10MB default
+        self.chunk_size = config.get('chunk_size', DEFAULT_CHUNK_SIZE)
     
     async def execute(self, input_data: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """Execute file operation"""
@@ -74,18 +86,48 @@ class FileHandlerAgent:
             }
     
     async def _read_file(self, file_path: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Read file content"""
+        """Read file content
+        
+        `stream` returns a FileStream instead of the content, with no size
+        limit; the file is read in chunks as the next node consumes it.
+        `offset` (with an optional `length`) or `ranges` of [offset, length]
+        pairs read byte ranges through a memory map, up to max_file_size
+        bytes in total. `include_raw_content` set to false leaves the
+        unparsed text out of the result.
+        """
         
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
         file_size = os.path.getsize(file_path)
-        if file_size > self.max_file_size:
-            raise ValueError(f"File too large: {file_size} bytes (max: {self.max_file_size})")
-        
         file_format = parameters.get('format', 'auto')
         encoding = parameters.get('encoding', 'utf-8')
         
+        if 'offset' in parameters or 'ranges' in parameters:
+            return await self._read_ranges(file_path, file_size, parameters)
+        
+        if parameters.get('stream', self.config.get('stream', False)):
+            if file_format == 'auto':
+                async with aiofiles.open(file_path, 'r', encoding=encoding) as f:
+                    file_format = self._detect_file_format(file_path, await f.read(SNIFF_CHARS))
+            
+            return {
+                'file_path': file_path,
+                'file_size': file_size,
+                'format': file_format,
+                'content': FileStream(
+                    file_path, file_format, encoding, parameters.get('chunk_size', self.chunk_size)
+                ),
+                'streaming': True,
+                'mime_type': mimetypes.guess_type(file_path)[0]
+            }
+        
+        if file_size > self.max_file_size:
+            raise ValueError(
+                f"File too large: {file_size} bytes (max: {self.max_file_size}); "
+                "read it with stream or offset/length instead"
+            )
+        
         async with aiofiles.open(file_path, 'r', encoding=encoding) as f:
             content = await f.read()
         
@@ -94,46 +136,108 @@ class FileHandlerAgent:
             file_format = self._detect_file_format(file_path, content)
         
         # Parse content based on format
-        parsed_content = self._parse_content(content, file_format)
+        parsed_content = self._parse_content(content, file_format, parameters.get('output_format', 'records'))
         
-        return {
+        result = {
             'file_path': file_path,
             'file_size': file_size,
             'format': file_format,
             'content': parsed_content,
-            'raw_content': content,
             'mime_type': mimetypes.guess_type(file_path)[0]
         }
+        if parameters.get('include_raw_content', self.config.get('include_raw_content', True)):
+            result['raw_content'] = content
+        return result
+    
+    async def _read_ranges(self, file_path: str, file_size: int, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Read byte ranges of a file, decoded as text"""
+        
+        single = 'ranges' not in parameters
+        if single:
+            ranges = [(int(parameters['offset']), parameters.get('length'))]
+        else:
+            ranges = [(int(offset), length) for offset, length in parameters['ranges']]
+        
+        # Ranges are held in memory like a whole read, so they share its size limit
+        requested = sum(self._range_span(offset, length, file_size) for offset, length in ranges)
+        if requested > self.max_file_size:
+            raise ValueError(
+                f"Requested ranges too large: {requested} bytes (max: {self.max_file_size}); "
+                "give a smaller length or read it with stream instead"
+            )
+        
+        # Page faults block, so the mapped reads run off the event loop
+        chunks = await asyncio.to_thread(read_ranges, file_path, ranges)
+        encoding = parameters.get('encoding', 'utf-8')
+        errors = parameters.get('errors', 'strict')
+        content = [chunk.decode(encoding, errors) for chunk in chunks]
+        
+        return {
+            'file_path': file_path,
+            'file_size': file_size,
+            'ranges': [
+                {'offset': offset, 'length': len(chunk)} for (offset, _), chunk in zip(ranges, chunks)
+            ],
+            'content': content[0] if single else content,
+            'mime_type': mimetypes.guess_type(file_path)[0]
+        }
+    
+    def _range_span(self, offset: int, length: Optional[int], file_size: int) -> int:
+        """Bytes a range covers once clipped to the file"""
+        
+        start = max(offset + file_size if offset < 0 else offset, 0)
+        end = file_size if length is None else min(file_size, start + int(length))
+        return max(end - start, 0)
     
     async def _write_file(self, file_path: str, content: Any, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Write content to file"""
+        """Write content to file
+        
+        Content is written in chunks as it is produced: records are encoded
+        a batch at a time, and a FileStream, generator or async iterable of
+        text is copied piece by piece, so large content never has to be held
+        as one string.
+        """
         
         file_format = parameters.get('format', 'auto')
         encoding = parameters.get('encoding', 'utf-8')
         create_dirs = parameters.get('create_dirs', True)
         
         # Create directory if needed
-        if create_dirs:
+        if create_dirs and os.path.dirname(file_path):
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        # Convert content to string based on format
-        if file_format == 'json' and isinstance(content, (dict, list)):
-            content_str = json.dumps(content, indent=2)
-        elif file_format == 'csv' and isinstance(content, list):
-            content_str = self._list_to_csv(content)
-        else:
-            content_str = str(content)
-        
-        async with aiofiles.open(file_path, 'w', encoding=encoding) as f:
-            await f.write(content_str)
+        bytes_written = await write_chunks(
+            file_path, self._content_pieces(content, file_format), encoding,
+            parameters.get('chunk_size', self.chunk_size)
+        )
         
         return {
             'file_path': file_path,
-            'bytes_written': len(content_str.encode(encoding)),
+            'bytes_written': bytes_written,
             'format': file_format,
             'created': True
         }
     
+    def _content_pieces(self, content: Any, file_format: str) -> Any:
+        """Text pieces to write for content, in order"""
+        
+        streamed = isinstance(content, (FileStream, Iterator)) or hasattr(content, '__aiter__')
+        # Lists and generators are records in a records format; a FileStream is copied as text
+        records = isinstance(content, list) or (streamed and not isinstance(content, FileStream))
+        
+        if file_format == 'csv' and isinstance(content, ColumnarTable):
+            return [content.to_csv()]
+        elif file_format == 'json' and isinstance(content, (dict, list, ColumnarTable)):
+            return json.JSONEncoder(indent=2, default=json_default).iterencode(content)
+        elif file_format == 'csv' and records:
+            return iter_csv(content)
+        elif file_format == 'jsonl' and (records or isinstance(content, ColumnarTable)):
+            return iter_json_lines(content, json_default)
+        elif streamed:
+            return content
+        else:
+            return [str(content)]
+    
     async def _delete_file(self, file_path: str) -> Dict[str, Any]:
         """Delete file"""
         
@@ -186,50 +290,76 @@ class FileHandlerAgent:
         }
     
     async def _list_files(self, directory: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """List files in directory"""
+        """List files in directory
+        
+        The tree is scanned in parallel off the event loop; `max_results`
+        stops the scan once that many entries are found, and `max_depth`
+        limits how deep a recursive listing goes.
+        """
         
         if not os.path.exists(directory):
             raise FileNotFoundError(f"Directory not found: {directory}")
         
         recursive = parameters.get('recursive', False)
-        pattern = parameters.get('pattern', '*')
-        include_hidden = parameters.get('include_hidden', False)
-        
-        files = []
-        directories = []
-        
-        if recursive:
-            for root, dirs, filenames in os.walk(directory):
-                # Filter hidden files/directories
-                if not include_hidden:
-                    dirs[:] = [d for d in dirs if not d.startswith('.')]
-                    filenames = [f for f in filenames if not f.startswith('.')]
-                
-                for filename in filenames:
-                    if self._matches_pattern(filename, pattern):
-                        file_path = os.path.join(root, filename)
-                        file_info = await self._get_file_info(file_path)
-                        files.append(file_info)
-        else:
-            for item in os.listdir(directory):
-                if not include_hidden and item.startswith('.'):
-                    continue
-                
-                item_path = os.path.join(directory, item)
-                if os.path.isfile(item_path) and self._matches_pattern(item, pattern):
-                    file_info = await self._get_file_info(item_path)
-                    files.append(file_info)
-                elif os.path.isdir(item_path):
-                    directories.append(item)
+        scanner = self._scanner(
+            directory, parameters,
+            recursive=recursive,
+            pattern=parameters.get('pattern', '*'),
+            include_hidden=parameters.get('include_hidden', False),
+            include_directories=not recursive
+        )
+        
+        entries, truncated = await self._collect(scanner, parameters.get('max_results'))
+        files = [entry for entry in entries if entry['is_file']]
+        directories = [entry['name'] for entry in entries if entry['is_directory']]
         
         return {
             'directory': directory,
             'files': files,
             'directories': directories,
             'total_files': len(files),
-            'total_directories': len(directories)
+            'total_directories': len(directories),
+            'truncated': truncated
         }
     
+    def _scanner(self, directory: str, parameters: Dict[str, Any], **options: Any) -> DirectoryScanner:
+        return DirectoryScanner(
+            directory,
+            max_depth=parameters.get('max_depth'),
+            workers=parameters.get('scan_workers', self.config.get('scan_workers', DEFAULT_SCAN_WORKERS)),
+            **options
+        )
+    
+    async def _collect(
+        self,
+        scanner: DirectoryScanner,
+        max_results: Optional[int],
+        accept: Optional[Callable[[Dict[str, Any]], Awaitable[bool]]] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Entries from a scan as they are found, stopping at max_results; returns (entries, truncated)"""
+        
+        entries = []
+        truncated = False
+        stream = scanner.stream()
+        try:
+            async for batch in stream:
+                for entry in batch:
+                    if accept is not None and not await accept(entry):
+                        continue
+                    if max_results is not None and len(entries) >= max_results:
+                        truncated = True
+                        break
+                    entries.append(entry)
+                if truncated:
+                    break
+        finally:
+            # Leaving early stops the scan threads
+            await stream.aclose()
+        
+        # Scan order depends on thread timing; paths give a stable order
+        entries.sort(key=lambda entry: entry['path'])
+        return entries, truncated
+    
     async def _get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get file information"""
         
@@ -250,7 +380,14 @@ class FileHandlerAgent:
         }
     
     async def _search_files(self, directory: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Search for files matching criteria"""
+        """Search for files matching criteria
+        
+        Name, extension and size are checked during the parallel scan, so
+        only candidates are stat'ed and only those are opened for
+        `content_search`. `max_results` ends the search once that many
+        files match. With `use_index`, content is looked up in a persistent
+        index that only rereads files whose size or mtime changed.
+        """
         
         pattern = parameters.get('pattern', '*')
         content_search = parameters.get('content_search')
@@ -258,47 +395,86 @@ class FileHandlerAgent:
         min_size = parameters.get('min_size', 0)
         max_size = parameters.get('max_size', float('inf'))
         
-        matching_files = []
-        
-        for root, dirs, filenames in os.walk(directory):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                
-                # Check pattern match
-                if not self._matches_pattern(filename, pattern):
-                    continue
-                
-                # Check file type
-                if file_types:
-                    file_ext = os.path.splitext(filename)[1].lower()
-                    if file_ext not in file_types:
-                        continue
-                
-                # Check file size
-                file_size = os.path.getsize(file_path)
-                if file_size < min_size or file_size > max_size:
-                    continue
-                
-                # Check content search
-                if content_search:
-                    try:
-                        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                            content = await f.read()
-                        if content_search.lower() not in content.lower():
-                            continue
-                    except:
-                        continue
-                
-                file_info = await self._get_file_info(file_path)
-                matching_files.append(file_info)
+        scanner = self._scanner(
+            directory, parameters,
+            pattern=pattern,
+            include_hidden=parameters.get('include_hidden', True),
+            extensions=file_types,
+            min_size=min_size,
+            max_size=max_size
+        )
+        
+        max_results = parameters.get('max_results')
+        if content_search and parameters.get('use_index', self.config.get('use_index', False)):
+            matching_files, truncated = await self._indexed_search(scanner, content_search, max_results, parameters)
+        elif content_search:
+            needle = content_search.lower()
+            
+            async def contains_needle(entry: Dict[str, Any]) -> bool:
+                return await self._contains(entry['path'], needle)
+            
+            matching_files, truncated = await self._collect(scanner, max_results, contains_needle)
+        else:
+            matching_files, truncated = await self._collect(scanner, max_results)
         
         return {
             'directory': directory,
             'search_criteria': parameters,
             'matching_files': matching_files,
-            'total_matches': len(matching_files)
+            'total_matches': len(matching_files),
+            'truncated': truncated
         }
     
+    async def _indexed_search(
+        self,
+        scanner: DirectoryScanner,
+        content_search: str,
+        max_results: Optional[int],
+        parameters: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Content search through the content index; returns (entries, truncated)"""
+        
+        index = get_content_index(parameters.get('index_path', self.config.get('index_path', DEFAULT_INDEX_PATH)))
+        candidates, _ = await self._collect(scanner, None)
+        # Files too large to read in one go are not indexed; they are searched directly as before
+        indexed = [entry for entry in candidates if entry['size'] <= self.max_file_size]
+        
+        # A scan without filters sees every file, so anything else indexed under the directory is gone
+        complete = (
+            scanner.pattern == '*' and not scanner.extensions and scanner.include_hidden
+            and scanner.min_size <= 0 and scanner.max_size == float('inf') and scanner.max_depth is None
+        )
+        await asyncio.to_thread(index.refresh, scanner.root, indexed, complete)
+        found = await asyncio.to_thread(index.search, content_search, scanner.root)
+        
+        needle = content_search.lower()
+        matching_files = []
+        for entry in candidates:
+            if entry['size'] <= self.max_file_size:
+                if os.path.abspath(entry['path']) not in found:
+                    continue
+            elif not await self._contains(entry['path'], needle):
+                continue
+            if max_results is not None and len(matching_files) >= max_results:
+                return matching_files, True
+            matching_files.append(entry)
+        return matching_files, False
+    
+    async def _contains(self, file_path: str, needle: str) -> bool:
+        """Whether a file's lowercased content contains needle, read a chunk at a time"""
+        
+        tail = ''
+        try:
+            async for chunk in FileStream(file_path, chunk_size=self.chunk_size):
+                text = tail + chunk.lower()
+                if needle in text:
+                    return True
+                # Keep enough of the end for a match across the chunk boundary
+                tail = text[-(len(needle) - 1):] if len(needle) > 1 else ''
+        except (OSError, UnicodeDecodeError):
+            return False
+        return False
+    
     async def _compress_files(self, files: List[str], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Compress files into archive"""
         
@@ -344,6 +520,8 @@ class FileHandlerAgent:
         
         if extension in ['.json']:
             return 'json'
+        elif extension in ['.jsonl', '.ndjson']:
+            return 'jsonl'
         elif extension in ['.csv']:
             return 'csv'
         elif extension in ['.txt', '.md']:
@@ -365,7 +543,7 @@ class FileHandlerAgent:
             
             return 'text'
     
-    def _parse_content(self, content: str, file_format: str) -> Any:
+    def _parse_content(self, content: str, file_format: str, output_format: str = 'records') -> Any:
         """Parse content based on format"""
         
         if file_format == 'json':
@@ -373,6 +551,17 @@ class FileHandlerAgent:
                 return json.loads(content)
             except json.JSONDecodeError:
                 return content
+        elif file_format == 'jsonl':
+            try:
+                return [json.loads(line) for line in content.splitlines() if line.strip()]
+            except json.JSONDecodeError:
+                return content
+        elif file_format == 'csv' and output_format == 'table':
+            # Typed columns straight from the parser, with no dict per row
+            try:
+                return ColumnarTable.from_csv(content)
+            except Exception:
+                return content
         elif file_format == 'csv':
             try:
                 import io
@@ -389,19 +578,6 @@ class FileHandlerAgent:
         else:
             return content
     
-    def _list_to_csv(self, data: List[Dict[str, Any]]) -> str:
-        """Convert list of dictionaries to CSV string"""
-        
-        if not data:
-            return ""
-        
-        import io
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
-        return output.getvalue()
-    
     def _matches_pattern(self, filename: str, pattern: str) -> bool:
         """Check if filename matches pattern"""
         
@@ -411,5 +587,5 @@ class FileHandlerAgent:
     def _get_supported_formats(self) -> List[str]:
         """Get list of supported file formats"""
         
-        return ['json', 'csv', 'text', 'yaml', 'xml', 'auto']
+        return ['json', 'jsonl', 'csv', 'text', 'yaml', 'xml', 'auto']
 
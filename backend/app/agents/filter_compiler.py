@@ -0,0 +1,302 @@
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Operators whose answer for a missing value is "match" under boolean null handling
+NEGATIVE_OPERATORS = {'not_equals', 'not_in', 'not_contains'}
+
+ORDERING_OPERATORS = {'greater_than', 'greater_than_or_equal', 'less_than', 'less_than_or_equal'}
+
+OPERATORS = {
+    'equals', 'not_equals', 'greater_than', 'greater_than_or_equal', 'less_than', 'less_than_or_equal',
+    'contains', 'not_contains', 'in', 'not_in', 'is_null', 'is_not_null'
+}
+
+NULL_HANDLING = ('boolean', 'sql')
+
+# Narrow later conditions to the open rows once fewer than this share remain
+NARROW_FRACTION = 0.5
+
+REGEX_CHARACTERS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+Node = Tuple[str, Any]
+
+def parse_conditions(conditions: Union[List[Any], Dict[str, Any]]) -> Node:
+    """Normalize a condition tree into ('and' | 'or', [nodes]), ('not', node) or ('leaf', condition)
+    
+    A list is an AND of its items, so the flat list of conditions filters
+    have always used is still valid. Groups are written as
+    `{'and': [...]}`, `{'or': [...]}` and `{'not': condition}`.
+    """
+    
+    if isinstance(conditions, list):
+        return ('and', [parse_conditions(item) for item in conditions])
+    if not isinstance(conditions, dict):
+        raise ValueError(f"Invalid filter condition: {conditions!r}")
+    
+    if 'and' in conditions:
+        return ('and', [parse_conditions(item) for item in conditions['and']])
+    if 'or' in conditions:
+        return ('or', [parse_conditions(item) for item in conditions['or']])
+    if 'not' in conditions:
+        return ('not', parse_conditions(conditions['not']))
+    
+    operator = conditions.get('operator')
+    if operator not in OPERATORS:
+        raise ValueError(f"Unsupported filter operator: {operator}. Supported: {', '.join(sorted(OPERATORS))}")
+    return ('leaf', conditions)
+
+def _check_null_handling(null_handling: str):
+    if null_handling not in NULL_HANDLING:
+        raise ValueError(f"Unsupported null_handling: {null_handling}. Supported: {', '.join(NULL_HANDLING)}")
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else [value]
+
+def _is_literal(pattern: str) -> bool:
+    return not REGEX_CHARACTERS.search(pattern)
+
+# A mask is (true, unknown): rows where the condition holds, and rows where
+# it is unknown because of a missing value (None when there are none)
+Mask = Tuple[np.ndarray, Optional[np.ndarray]]
+
+def compile_mask(
+    df: pd.DataFrame,
+    conditions: Union[List[Any], Dict[str, Any]],
+    null_handling: str = 'boolean'
+) -> Optional[np.ndarray]:
+    """Evaluate a condition tree over a pandas frame as one boolean row mask
+    
+    Returns None when no condition applies, e.g. every referenced column is
+    missing. Null handling:
+    
+    - boolean: a missing value matches not_equals, not_in, not_contains and
+      is_null and nothing else; NOT simply inverts. This is how the flat
+      condition list has always behaved.
+    - sql: comparisons with a missing value are unknown, NOT of unknown is
+      unknown and only rows where the whole tree is true are kept.
+    """
+    
+    _check_null_handling(null_handling)
+    mask = _evaluate(df, parse_conditions(conditions), null_handling)
+    return None if mask is None else mask[0]
+
+def _cost(node: Node) -> int:
+    """Rough evaluation cost, so cheap conditions narrow the rows first"""
+    
+    kind, body = node
+    if kind != 'leaf':
+        return 2
+    if body['operator'] in ('is_null', 'is_not_null'):
+        return 0
+    if body['operator'] in ('contains', 'not_contains'):
+        return 3
+    return 1
+
+def _evaluate(df: pd.DataFrame, node: Node, null_handling: str, rows: Optional[np.ndarray] = None) -> Optional[Mask]:
+    """Evaluate a node at `rows` (all rows when None); masks are False elsewhere"""
+    
+    kind, body = node
+    
+    if kind == 'leaf':
+        return _evaluate_leaf(df, body, null_handling, rows)
+    
+    if kind == 'not':
+        inner = _evaluate(df, body, null_handling, rows)
+        if inner is None:
+            return None
+        true, unknown = inner
+        true = ~true if unknown is None else ~true & ~unknown
+        if rows is not None:
+            true = _scatter(true[rows], rows, len(df))
+        return true, unknown
+    
+    true, unknown = None, None
+    for child in sorted(body, key=_cost):
+        if true is not None:
+            # Later conditions only need the rows whose outcome is still open
+            open_rows = ~true if kind == 'or' else (true if unknown is None else true | unknown)
+            if rows is not None:
+                open_rows = open_rows & _scatter(np.ones(len(rows), dtype=bool), rows, len(df))
+            count = open_rows.sum()
+            if not count:
+                break
+            child_rows = np.flatnonzero(open_rows) if count < len(df) * NARROW_FRACTION else rows
+        else:
+            child_rows = rows
+        
+        mask = _evaluate(df, child, null_handling, child_rows)
+        # Conditions on missing columns are skipped, as they always have been
+        if mask is None:
+            continue
+        if true is None:
+            true, unknown = mask
+            continue
+        
+        other_true, other_unknown = mask
+        if unknown is None and other_unknown is None:
+            true = true & other_true if kind == 'and' else true | other_true
+            continue
+        
+        # Kleene logic
+        unknown = unknown if unknown is not None else np.zeros(len(true), dtype=bool)
+        other_unknown = other_unknown if other_unknown is not None else np.zeros(len(true), dtype=bool)
+        if kind == 'and':
+            false = (~true & ~unknown) | (~other_true & ~other_unknown)
+            true = true & other_true
+            unknown = ~true & ~false
+        else:
+            true = true | other_true
+            unknown = ~true & (unknown | other_unknown)
+    
+    if true is None:
+        return None
+    return true, unknown
+
+def _scatter(values: np.ndarray, rows: Optional[np.ndarray], length: int) -> np.ndarray:
+    if rows is None:
+        return values
+    result = np.zeros(length, dtype=bool)
+    result[rows] = values
+    return result
+
+def _to_mask(result: pd.Series) -> np.ndarray:
+    return result.to_numpy(dtype=bool, na_value=False)
+
+def _evaluate_leaf(
+    df: pd.DataFrame,
+    condition: Dict[str, Any],
+    null_handling: str,
+    rows: Optional[np.ndarray]
+) -> Optional[Mask]:
+    column = condition.get('column')
+    if column not in df.columns:
+        return None
+    
+    operator = condition['operator']
+    value = condition.get('value')
+    series = df[column] if rows is None else df[column].iloc[rows]
+    if isinstance(series.dtype, pd.CategoricalDtype) and operator in ORDERING_OPERATORS:
+        # Unordered categoricals cannot be compared with < and >
+        series = series.astype(object)
+    
+    if operator == 'is_null':
+        return _scatter(series.isna().to_numpy(), rows, len(df)), None
+    if operator == 'is_not_null':
+        return _scatter(series.notna().to_numpy(), rows, len(df)), None
+    
+    if operator in ('equals', 'not_equals'):
+        result = _to_mask(series == value)
+    elif operator == 'greater_than':
+        result = _to_mask(series > value)
+    elif operator == 'greater_than_or_equal':
+        result = _to_mask(series >= value)
+    elif operator == 'less_than':
+        result = _to_mask(series < value)
+    elif operator == 'less_than_or_equal':
+        result = _to_mask(series <= value)
+    elif operator in ('contains', 'not_contains'):
+        pattern = str(value)
+        regex = not _is_literal(pattern)
+        if (series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string') \
+                or isinstance(series.dtype, pd.StringDtype):
+            result = _to_mask(series.str.contains(pattern, regex=regex, na=False))
+        else:
+            # Only non-string columns are rendered as text, and "nan" must not match
+            result = _to_mask(series.astype(str).str.contains(pattern, regex=regex)) & series.notna().to_numpy()
+    else:
+        result = _to_mask(series.isin(_as_list(value)))
+    
+    if operator in NEGATIVE_OPERATORS:
+        result = ~result
+    
+    # Comparisons are already False for missing values (so their negations
+    # True); only `in` lists holding a missing value and sql need the mask
+    if null_handling == 'boolean' and not (
+        operator in ('in', 'not_in') and any(pd.isna(item) for item in _as_list(value))
+    ):
+        return _scatter(result, rows, len(df)), None
+    
+    nulls = series.isna().to_numpy()
+    if null_handling == 'sql':
+        return _scatter(result & ~nulls, rows, len(df)), _scatter(nulls, rows, len(df)) if nulls.any() else None
+    if operator in NEGATIVE_OPERATORS:
+        return _scatter(result | nulls, rows, len(df)), None
+    return _scatter(result & ~nulls, rows, len(df)), None
+
+def compile_polars(
+    columns: Iterable[str],
+    conditions: Union[List[Any], Dict[str, Any]],
+    null_handling: str = 'boolean'
+) -> Optional["pl.Expr"]:
+    """Compile a condition tree into one Polars predicate, same semantics as compile_mask"""
+    
+    _check_null_handling(null_handling)
+    expr = _compile_node(set(columns), parse_conditions(conditions), null_handling)
+    # Polars combines nulls with Kleene logic; what is still unknown is dropped
+    return None if expr is None else expr.fill_null(False)
+
+def _compile_node(columns: set, node: Node, null_handling: str) -> Optional["pl.Expr"]:
+    kind, body = node
+    
+    if kind == 'leaf':
+        return _compile_leaf(columns, body, null_handling)
+    
+    if kind == 'not':
+        inner = _compile_node(columns, body, null_handling)
+        return None if inner is None else ~inner
+    
+    exprs = [expr for expr in (_compile_node(columns, child, null_handling) for child in body) if expr is not None]
+    if not exprs:
+        return None
+    
+    result = exprs[0]
+    for expr in exprs[1:]:
+        result = result & expr if kind == 'and' else result | expr
+    return result
+
+def _compile_leaf(columns: set, condition: Dict[str, Any], null_handling: str) -> Optional["pl.Expr"]:
+    import polars as pl
+    
+    column = condition.get('column')
+    if column not in columns:
+        return None
+    
+    operator = condition['operator']
+    value = condition.get('value')
+    col = pl.col(column)
+    
+    if operator == 'is_null':
+        return col.is_null()
+    if operator == 'is_not_null':
+        return col.is_not_null()
+    
+    if operator in ('equals', 'not_equals'):
+        result = col == value
+    elif operator == 'greater_than':
+        result = col > value
+    elif operator == 'greater_than_or_equal':
+        result = col >= value
+    elif operator == 'less_than':
+        result = col < value
+    elif operator == 'less_than_or_equal':
+        result = col <= value
+    elif operator in ('contains', 'not_contains'):
+        pattern = str(value)
+        result = col.cast(pl.Utf8).str.contains(pattern, literal=_is_literal(pattern))
+    else:
+        result = col.is_in(_as_list(value))
+    
+    if operator in NEGATIVE_OPERATORS:
+        result = ~result
+    
+    if null_handling == 'sql':
+        missing = pl.lit(None, dtype=pl.Boolean)
+    else:
+        missing = pl.lit(operator in NEGATIVE_OPERATORS)
+    return pl.when(col.is_null()).then(missing).otherwise(result)
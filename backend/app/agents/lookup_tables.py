@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Join types answered by probing the index; the others go through merge
+PROBE_JOIN_TYPES = ('inner', 'left')
+
+def content_hash(data: Any) -> str:
+    """Hash a table's content: its pickled records, or its columns, dtypes and values"""
+    
+    if isinstance(data, pd.DataFrame):
+        digest = hashlib.sha256(json.dumps([str(column) for column in data.columns]).encode('utf-8'))
+        digest.update(json.dumps([str(dtype) for dtype in data.dtypes]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    # Pickling is several times faster than JSON; records listing their keys
+    # in another order only cost a rebuild
+    return hashlib.sha256(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+def _take(series: pd.Series, positions: np.ndarray) -> Any:
+    # NumPy-backed columns go in as arrays; -1 picks a missing value
+    values = series.array if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else series.to_numpy()
+    return pd.api.extensions.take(values, positions, allow_fill=True)
+
+class LookupTable:
+    """A static right-hand join table with an index per set of join keys
+    
+    Pandas indexes keep their hash table once built, so joining against the
+    same table again only hashes the left side's keys.
+    """
+    
+    def __init__(self, name: str, frame: pd.DataFrame, digest: str):
+        self.name = name
+        self.frame = frame
+        self.digest = digest
+        self.indexes: Dict[Tuple[str, ...], pd.Index] = {}
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+    
+    def index(self, keys: Tuple[str, ...]) -> pd.Index:
+        index = self.indexes.get(keys)
+        if index is None:
+            if len(keys) == 1:
+                index = pd.Index(self.frame[keys[0]])
+            else:
+                index = pd.MultiIndex.from_frame(self.frame[list(keys)])
+            # Builds the hash table, which the index then keeps
+            index.is_unique
+            self.indexes[keys] = index
+            # The hash table takes roughly as much again as the keys
+            self.nbytes += 2 * int(index.memory_usage(deep=True))
+        return index
+    
+    def join(self, df: pd.DataFrame, keys: List[str], how: str) -> pd.DataFrame:
+        """`df.merge(table, on=keys, how=how)`, probing the index when the keys allow it"""
+        
+        right = self.frame
+        others = [column for column in right.columns if column not in keys]
+        if how not in PROBE_JOIN_TYPES or df.empty or not self._probeable(df, keys, others):
+            return df.merge(right, on=keys, how=how)
+        
+        index = self.index(tuple(keys))
+        if not index.is_unique:
+            return df.merge(right, on=keys, how=how)
+        
+        if len(keys) == 1:
+            positions = index.get_indexer(df[keys[0]])
+        else:
+            positions = index.get_indexer(pd.MultiIndex.from_frame(df[keys]))
+        
+        if how == 'inner':
+            matched = np.flatnonzero(positions >= 0)
+            # merge lists the rows of each key together, keys in order of first appearance
+            order = np.argsort(pd.factorize(positions[matched])[0], kind='stable')
+            rows = matched[order]
+            left, positions = df.take(rows), positions[rows]
+        else:
+            left = df
+        
+        index = pd.RangeIndex(len(positions))
+        # Misses (-1) become missing values, with the dtype changes merge makes
+        matches = pd.DataFrame({
+            column: _take(right[column], positions) for column in others
+        }, index=index)
+        return pd.concat([left.set_axis(index, copy=False), matches], axis=1)
+    
+    def _probeable(self, df: pd.DataFrame, keys: List[str], others: List[str]) -> bool:
+        # Overlapping columns get merge's suffixes, and mixed key types raise in merge
+        if any(column in df.columns for column in others):
+            return False
+        for key in keys:
+            if key not in df.columns or key not in self.frame.columns:
+                return False
+            left, right = df[key].dtype, self.frame[key].dtype
+            if pd.api.types.is_numeric_dtype(left) != pd.api.types.is_numeric_dtype(right):
+                return False
+            if isinstance(left, pd.CategoricalDtype) or isinstance(right, pd.CategoricalDtype):
+                return False
+        return True
+
+class LookupTableCache:
+    """Process-level cache of named lookup tables, evicting least recently used past max_bytes
+    
+    Tables are keyed by owner (the user or workflow that registered them)
+    and name, so a table is only ever returned to, or replaced by, its owner.
+    """
+    
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._tables: "OrderedDict[Tuple[str, str], LookupTable]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def register(self, owner: str, name: str, data: Any, digest: Optional[str] = None) -> LookupTable:
+        """Register an owner's table under a name; the same content is only built once"""
+        
+        key = (owner, name)
+        digest = digest or content_hash(data)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None and table.digest == digest:
+                self._tables.move_to_end(key)
+                return table
+        
+        frame = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        table = LookupTable(name, frame, digest)
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            self._evict()
+        return table
+    
+    def get(self, owner: str, name: str) -> Optional[LookupTable]:
+        with self._lock:
+            table = self._tables.get((owner, name))
+            if table is not None:
+                self._tables.move_to_end((owner, name))
+            return table
+    
+    def join(self, table: LookupTable, df: pd.DataFrame, keys: List[str], how: str) -> pd.DataFrame:
+        result = table.join(df, keys, how)
+        # A first join on new keys builds an index, which counts against the budget
+        with self._lock:
+            self._evict()
+        return result
+    
+    def remove(self, owner: str, name: str):
+        with self._lock:
+            self._tables.pop((owner, name), None)
+    
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(table.nbytes for table in self._tables.values())
+    
+    def _evict(self):
+        # The most recently used table stays, even when it alone is over budget
+        while len(self._tables) > 1 and self.nbytes > self.max_bytes:
+            (owner, name), _ = self._tables.popitem(last=False)
+            logger.info(f"Evicted lookup table {name} of {owner}")
+
+lookup_tables = LookupTableCache()
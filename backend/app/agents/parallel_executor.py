@@ -0,0 +1,261 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Each worker needs at least this many rows and cells (rows x columns) for
+# its share of the work to outweigh shipping the partition to it and back
+MIN_PARTITION_ROWS = 50_000
+MIN_PARTITION_CELLS = 500_000
+
+MAX_WORKERS = 8
+
+# Methods the workers run per partition
+OPERATION_METHODS = {
+    'filter': '_filter_data',
+    'transform': '_transform_data',
+    'clean': '_clean_data',
+    'group_by': '_group_data',
+}
+
+# Where each packed frame is in a shared memory segment: (offset, length) of
+# its pickle followed by those of its out-of-band buffers
+Layout = List[Tuple[int, int]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_worker_processor = None
+
+def available_cores() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all agents, created on first use
+    
+    It is sized for the machine up front and never replaced while healthy,
+    so a pool a caller is submitting to is never shut down under it;
+    spawned workers start as partitions need them.
+    """
+    
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the server process runs threads
+            _pool = ProcessPoolExecutor(
+                max_workers=min(MAX_WORKERS, available_cores()), mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next run starts a new one"""
+    
+    global _pool
+    with _pool_lock:
+        # Another run may already have replaced it
+        if _pool is pool:
+            _pool = None
+
+def _pack(frames: List[pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, List[Layout]]:
+    """Write frames into one shared memory segment
+    
+    Frames are pickled with protocol 5, so column arrays travel as
+    out-of-band buffers copied once into the segment instead of being
+    serialized into a pipe.
+    """
+    
+    chunks, layouts, size = [], [], 0
+    for frame in frames:
+        buffers = []
+        data = pickle.dumps(frame, protocol=5, buffer_callback=buffers.append)
+        layout = []
+        for raw in [memoryview(data)] + [buffer.raw() for buffer in buffers]:
+            layout.append((size, raw.nbytes))
+            chunks.append(raw)
+            size += raw.nbytes
+        layouts.append(layout)
+    
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    offset = 0
+    for raw in chunks:
+        segment.buf[offset:offset + raw.nbytes] = raw
+        offset += raw.nbytes
+    return segment, layouts
+
+def _unpack(buffer: memoryview, layout: Layout, copy: bool) -> pd.DataFrame:
+    """Rebuild a packed frame; without `copy` its arrays are views of the segment"""
+    
+    (offset, length), *spans = layout
+    buffers = [buffer[start:start + size] for start, size in spans]
+    if copy:
+        buffers = [bytearray(view) for view in buffers]
+    return pickle.loads(buffer[offset:offset + length], buffers=buffers)
+
+def _run_partition(segment_name: str, layout: Layout, stage: Dict[str, Any]) -> Tuple[str, Layout]:
+    """Worker entry point: run one stage over a partition, returning the packed result"""
+    
+    global _worker_processor
+    if _worker_processor is None:
+        from app.agents.data_processor import DataProcessorAgent
+        _worker_processor = DataProcessorAgent({})
+    
+    segment = shared_memory.SharedMemory(name=segment_name)
+    frame = result = None
+    try:
+        frame = _unpack(segment.buf, layout, copy=False)
+        result = getattr(_worker_processor, OPERATION_METHODS[stage['operation']])(frame, stage['parameters'])
+        # The result may still share arrays with the input segment; packing copies it out
+        output, layouts = _pack([result])
+        output.close()
+        return output.name, layouts[0]
+    finally:
+        # The segment can only be closed once nothing views it any more
+        frame = result = None
+        segment.close()
+
+class ParallelDataProcessor:
+    """Runs row-parallel DataProcessorAgent operations on a process pool
+    
+    The frame is split into one partition per worker: contiguous row ranges
+    for filter, row-wise transforms and dropping missing values, and hash
+    partitions on the group keys (or, for duplicate removal, on whole rows)
+    for group_by and clean, so equal keys are handled by the same worker.
+    Partitions and results travel through shared memory. Row results are
+    put back in input order and group_by results sorted by key, so the
+    output matches the single-process one.
+    """
+    
+    def __init__(self, processor: Any, workers: Optional[int] = None):
+        self.processor = processor
+        self.workers = workers or min(MAX_WORKERS, available_cores())
+    
+    @staticmethod
+    def supports(stage: Dict[str, Any]) -> bool:
+        operation = stage['operation']
+        parameters = stage['parameters']
+        
+        if operation == 'filter':
+            return True
+        if operation == 'transform':
+            # Normalization needs the min/max or mean/std of the whole column
+            return all(
+                transform.get('operation') not in ('normalize', 'standardize')
+                for transform in parameters.get('transformations', [])
+            )
+        if operation == 'clean':
+            operations = parameters.get('operations', ['remove_duplicates', 'handle_missing'])
+            return set(operations) <= {'remove_duplicates', 'handle_missing'} and (
+                'handle_missing' not in operations or parameters.get('missing_strategy', 'drop') == 'drop'
+            )
+        if operation == 'group_by':
+            return bool(parameters.get('group_by'))
+        return False
+    
+    def plan(self, df: pd.DataFrame) -> int:
+        """Number of workers worth using for this frame; 1 means run in-process"""
+        
+        cells = len(df) * max(len(df.columns), 1)
+        return max(1, min(self.workers, len(df) // MIN_PARTITION_ROWS, cells // MIN_PARTITION_CELLS))
+    
+    def execute(self, df: pd.DataFrame, stage: Dict[str, Any], workers: int) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        partitions, partitioning = self._partition(df, stage, workers)
+        logger.debug(f"Running {stage['operation']} over {len(partitions)} {partitioning} partitions")
+        results = self._run(partitions, stage)
+        
+        if stage['operation'] == 'group_by':
+            keys = stage['parameters']['group_by']
+            keys = [keys] if isinstance(keys, str) else list(keys)
+            # Groups are disjoint across partitions; sort as the single groupby does
+            result_df = pd.concat(results, ignore_index=True).sort_values(keys, kind='stable').reset_index(drop=True)
+        else:
+            result_df = pd.concat(results)
+            if partitioning == 'hash':
+                result_df = result_df.sort_index(kind='stable')
+            # Partitions are indexed by row position; restore the input's labels
+            result_df.index = df.index[result_df.index.to_numpy()]
+        
+        return result_df, {
+            'original_shape': df.shape,
+            'operation_parameters': stage['parameters'],
+            'result_shape': result_df.shape,
+            'columns': list(result_df.columns),
+            'parallel': {'workers': workers, 'partitions': len(partitions), 'partitioning': partitioning}
+        }
+    
+    def _partition(self, df: pd.DataFrame, stage: Dict[str, Any], count: int) -> Tuple[List[pd.DataFrame], str]:
+        operation = stage['operation']
+        parameters = stage['parameters']
+        
+        keys = None
+        if operation == 'group_by':
+            keys = parameters['group_by']
+            keys = [keys] if isinstance(keys, str) else list(keys)
+        elif operation == 'clean' and 'remove_duplicates' in parameters.get(
+            'operations', ['remove_duplicates', 'handle_missing']
+        ):
+            keys = list(df.columns)
+        
+        if keys is None:
+            bounds = np.linspace(0, len(df), count + 1).astype(np.int64)
+            return [
+                df.iloc[start:stop].set_axis(pd.RangeIndex(start, stop))
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ], 'rows'
+        
+        partition_ids = (pd.util.hash_pandas_object(df[keys], index=False) % count).to_numpy()
+        partitions = []
+        for partition_id in range(count):
+            positions = np.flatnonzero(partition_ids == partition_id)
+            partitions.append(df.take(positions).set_axis(pd.Index(positions)))
+        return partitions, 'hash'
+    
+    def _run(self, partitions: List[pd.DataFrame], stage: Dict[str, Any]) -> List[pd.DataFrame]:
+        segment, layouts = _pack(partitions)
+        pending = []
+        pool = _get_pool()
+        try:
+            futures = [pool.submit(_run_partition, segment.name, layout, stage) for layout in layouts]
+            # Wait for every partition, so no result segment is left behind on failure
+            wait(futures)
+            error = next((future.exception() for future in futures if future.exception()), None)
+            pending = [future.result() for future in futures if not future.exception()]
+            if isinstance(error, BrokenProcessPool):
+                _discard_pool(pool)
+            if error:
+                raise error
+            
+            results = []
+            for name, layout in pending:
+                output = shared_memory.SharedMemory(name=name)
+                try:
+                    results.append(_unpack(output.buf, layout, copy=True))
+                finally:
+                    output.close()
+                    output.unlink()
+            pending = []
+            return results
+        finally:
+            for name, _ in pending:
+                self._unlink(name)
+            segment.close()
+            segment.unlink()
+    
+    def _unlink(self, name: str):
+        try:
+            output = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+        output.close()
+        output.unlink()
@@ -0,0 +1,447 @@
+import json
+from typing import Dict, Any, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from app.agents.column_expressions import compile_expressions, compile_polars_expressions
+from app.agents.filter_compiler import compile_polars
+from app.agents.window_functions import compile_polars as compile_polars_windows, parse_windows
+from app.services.columnar import ColumnarTable
+
+# pandas aggregation names -> Polars expressions
+AGGREGATIONS = {
+    'sum': lambda expr: expr.sum(),
+    'mean': lambda expr: expr.mean(),
+    'median': lambda expr: expr.median(),
+    'min': lambda expr: expr.min(),
+    'max': lambda expr: expr.max(),
+    'count': lambda expr: expr.count(),
+    'std': lambda expr: expr.std(),
+    'var': lambda expr: expr.var(),
+    'first': lambda expr: expr.drop_nulls().first(),
+    'last': lambda expr: expr.drop_nulls().last(),
+    'nunique': lambda expr: expr.drop_nulls().n_unique(),
+}
+
+JOIN_TYPES = {'inner': 'inner', 'left': 'left', 'outer': 'outer_coalesce', 'cross': 'cross'}
+
+class PolarsDataEngine:
+    """Runs DataProcessorAgent operations as lazy, multithreaded Polars plans
+    
+    Results follow the pandas engine: nulls sort last, group keys come back
+    sorted with null keys dropped, quantiles interpolate linearly and std/var
+    use one degree of freedom. Random sampling uses Polars' own generator, so
+    the sampled rows differ from pandas for the same seed.
+    """
+    
+    def prepare(self, data: Any) -> pl.DataFrame:
+        """Convert input data to a Polars DataFrame"""
+        
+        if isinstance(data, ColumnarTable):
+            data = data.frame
+        if isinstance(data, pl.LazyFrame):
+            data = data.collect()
+        if isinstance(data, pl.DataFrame):
+            frame = data
+        elif isinstance(data, pd.DataFrame):
+            frame = pl.from_pandas(data)
+        elif isinstance(data, list):
+            if data and isinstance(data[0], dict):
+                frame = self._from_records(data)
+            else:
+                frame = pl.DataFrame({'values': data})
+        elif isinstance(data, dict):
+            frame = pl.from_dicts([data])
+        elif isinstance(data, str):
+            try:
+                return self.prepare(json.loads(data))
+            except json.JSONDecodeError:
+                frame = pl.read_csv(data.encode('utf-8'))
+        else:
+            raise ValueError(f"Unsupported data type: {type(data)}")
+        
+        # pandas treats NaN as missing, so do the same
+        return frame.with_columns(pl.col(pl.FLOAT_DTYPES).fill_nan(None))
+    
+    def _from_records(self, records: List[Dict[str, Any]]) -> pl.DataFrame:
+        """Build a frame column by column, which is several times faster than row by row"""
+        
+        keys = dict.fromkeys(key for record in records for key in record)
+        columns = []
+        for key in keys:
+            values = [record.get(key) for record in records]
+            series = pl.Series(key, values)
+            # Columns that mix types would silently gain nulls; let the row path cast them
+            if series.null_count() != values.count(None):
+                return pl.from_dicts(records, infer_schema_length=None)
+            columns.append(series)
+        return pl.DataFrame(columns)
+    
+    def build(self, lf: pl.LazyFrame, operation: str, parameters: Dict[str, Any]) -> Any:
+        """Add an operation to a lazy plan; pivot and statistics come back eager"""
+        
+        handler = getattr(self, f"_{operation}", None)
+        if handler is None:
+            raise ValueError(f"Operation not implemented: {operation}")
+        return handler(lf, parameters)
+    
+    def execute(
+        self,
+        df: pl.DataFrame,
+        operation: str,
+        parameters: Dict[str, Any]
+    ) -> Union[pl.DataFrame, pd.DataFrame]:
+        """Build the lazy plan for an operation and collect it"""
+        
+        result = self.build(df.lazy(), operation, parameters)
+        return result.collect() if isinstance(result, pl.LazyFrame) else result
+    
+    def execute_pipeline(
+        self,
+        df: pl.DataFrame,
+        pipeline: List[Dict[str, Any]]
+    ) -> Tuple[Union[pl.DataFrame, pd.DataFrame], List[Dict[str, Any]]]:
+        """Chain operations into one plan and collect it once
+        
+        Row counts for intermediate stages are collected alongside the final
+        result; common subplan elimination computes the shared prefix once.
+        """
+        
+        lf = df.lazy()
+        plans = []
+        result = None
+        
+        for stage in pipeline:
+            result = self.build(lf, stage['operation'], stage['parameters'])
+            if isinstance(result, pd.DataFrame):
+                lf = self.prepare(result.to_dict('records')).lazy()
+            elif isinstance(result, pl.DataFrame):
+                lf = result.lazy()
+            else:
+                lf = result
+            plans.append(lf)
+        
+        counted = [plan.select(pl.count()) for plan in plans[:-1]]
+        *counts, final = pl.collect_all(counted + [plans[-1]])
+        if not isinstance(result, pd.DataFrame):
+            result = final
+        
+        stage_info = [
+            {'shape': (count.item(), len(plan.columns)), 'columns': plan.columns}
+            for count, plan in zip(counts, plans)
+        ]
+        stage_info.append({'shape': result.shape, 'columns': list(result.columns)})
+        return result, stage_info
+    
+    def _filter(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        predicate = compile_polars(
+            lf.columns, parameters.get('conditions', []), parameters.get('null_handling', 'boolean')
+        )
+        
+        if predicate is None:
+            return lf
+        return lf.filter(predicate)
+    
+    def _sort(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        sort_by = parameters.get('sort_by', [])
+        if isinstance(sort_by, str):
+            sort_by = [sort_by]
+        if not sort_by:
+            return lf
+        
+        ascending = parameters.get('ascending', True)
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(sort_by)
+        
+        return lf.sort(sort_by, descending=[not a for a in ascending], nulls_last=True, maintain_order=True)
+    
+    def _aggregation(self, column: str, func: str) -> pl.Expr:
+        if func not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation for polars engine: {func}")
+        return AGGREGATIONS[func](pl.col(column))
+    
+    def _group_by(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        group_by = parameters.get('group_by', [])
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        
+        columns = set(lf.columns)
+        aggregations = []
+        for func_name, func_or_column in parameters.get('aggregations', {'count': 'size'}).items():
+            if func_or_column == 'size':
+                aggregations.append(pl.count().alias(func_name))
+            elif isinstance(func_or_column, dict):
+                for column, func in func_or_column.items():
+                    if column in columns:
+                        aggregations.append(self._aggregation(column, func).alias(f"{column}_{func}"))
+            elif func_or_column in columns:
+                aggregations.append(self._aggregation(func_or_column, func_name))
+        
+        if not aggregations:
+            aggregations = [pl.exclude(group_by).drop_nulls().first()]
+        
+        # pandas drops null keys and sorts groups
+        return (
+            lf.drop_nulls(group_by)
+            .group_by(group_by)
+            .agg(aggregations)
+            .sort(group_by)
+        )
+    
+    def _aggregate(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        agg_config = parameters.get('aggregations', {})
+        
+        if not agg_config:
+            numeric_columns = lf.select(pl.col(pl.NUMERIC_DTYPES)).columns
+            agg_config = {col: ['mean', 'sum', 'count'] for col in numeric_columns}
+        
+        agg_config = {col: funcs if isinstance(funcs, list) else [funcs] for col, funcs in agg_config.items()}
+        
+        # One row per function, like the index of DataFrame.agg
+        functions = list(dict.fromkeys(func for funcs in agg_config.values() for func in funcs))
+        rows = [
+            lf.select(
+                [pl.lit(func).alias('index')] + [
+                    (self._aggregation(col, func) if func in funcs else pl.lit(None)).cast(pl.Float64).alias(col)
+                    for col, funcs in agg_config.items()
+                ]
+            )
+            for func in functions
+        ]
+        return pl.concat(rows) if rows else lf.select([])
+    
+    def _transform(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        columns = set(lf.columns)
+        
+        for transform in parameters.get('transformations', []):
+            operation = transform.get('operation')
+            column = transform.get('column')
+            target_column = transform.get('target_column', column)
+            value = transform.get('value')
+            
+            if operation == 'expression':
+                assignments = compile_expressions(transform.get('expression', ''), target_column)
+                for batch in compile_polars_expressions(list(columns), assignments):
+                    lf = lf.with_columns(batch)
+                columns.update(target for target, _, _ in assignments)
+                continue
+            
+            if column not in columns:
+                continue
+            
+            col = pl.col(column)
+            if operation == 'add':
+                expr = col + value
+            elif operation == 'multiply':
+                expr = col * value
+            elif operation == 'uppercase':
+                expr = col.cast(pl.Utf8).str.to_uppercase()
+            elif operation == 'lowercase':
+                expr = col.cast(pl.Utf8).str.to_lowercase()
+            elif operation == 'normalize':
+                expr = (col - col.min()) / (col.max() - col.min())
+            elif operation == 'standardize':
+                expr = (col - col.mean()) / col.std()
+            else:
+                continue
+            
+            # Later transformations may read earlier targets, so keep them sequential
+            lf = lf.with_columns(expr.alias(target_column))
+            columns.add(target_column)
+        
+        return lf
+    
+    def _window(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        plan = parse_windows(parameters)
+        exprs = compile_polars_windows(plan, lf.columns)
+        if not plan.order_by:
+            return lf.with_columns(exprs)
+        
+        # Windows follow the order within each partition; rows then go back to input order
+        row = '__window_row'
+        return (
+            lf.with_row_count(row)
+            .sort(plan.order_by, descending=[not a for a in plan.ascending], nulls_last=True, maintain_order=True)
+            .with_columns(exprs)
+            .sort(row)
+            .drop(row)
+        )
+    
+    def _join(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        join_data = parameters.get('join_data', [])
+        join_on = parameters.get('join_on', [])
+        join_type = parameters.get('join_type', 'inner')
+        
+        if parameters.get('lookup_table') and not join_data:
+            raise ValueError("Named lookup tables are only supported by the pandas engine")
+        
+        if not join_data:
+            return lf
+        
+        right = pl.from_dicts(join_data, infer_schema_length=None).lazy()
+        
+        if not join_on:
+            return pl.concat([lf, right], how='diagonal')
+        
+        keys = [join_on] if isinstance(join_on, str) else list(join_on)
+        overlap = (set(lf.columns) & set(right.columns)) - set(keys)
+        
+        # pandas suffixes clashing columns with _x and _y
+        lf = lf.rename({col: f"{col}_x" for col in overlap})
+        right = right.rename({col: f"{col}_y" for col in overlap})
+        
+        if join_type == 'right':
+            ordered = [col for col in lf.columns if col not in keys] + right.columns
+            return right.join(lf, on=keys, how='left').select(ordered)
+        if join_type not in JOIN_TYPES:
+            raise ValueError(f"Unsupported join type: {join_type}")
+        
+        result = lf.join(right, on=keys, how=JOIN_TYPES[join_type])
+        return result.sort(keys, nulls_last=True) if join_type == 'outer' else result
+    
+    def _pivot(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.DataFrame:
+        index = parameters.get('index', [])
+        columns = parameters.get('columns', [])
+        values = parameters.get('values', [])
+        aggfunc = parameters.get('aggfunc', 'mean')
+        
+        if not index or not columns or not values:
+            return lf.collect()
+        
+        index = [index] if isinstance(index, str) else index
+        if aggfunc not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation for polars engine: {aggfunc}")
+        
+        # Pivoting needs the distinct column values, so it runs eagerly
+        frame = lf.drop_nulls(index).collect()
+        pivoted = frame.pivot(
+            values=values,
+            index=index,
+            columns=columns,
+            aggregate_function=AGGREGATIONS[aggfunc](pl.element()),
+            sort_columns=True
+        )
+        value_columns = [col for col in pivoted.columns if col not in index]
+        return pivoted.with_columns(pl.col(value_columns).fill_null(0)).sort(index)
+    
+    def _clean(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        for operation in parameters.get('operations', ['remove_duplicates', 'handle_missing']):
+            if operation == 'remove_duplicates':
+                lf = lf.unique(maintain_order=True)
+            elif operation == 'handle_missing':
+                strategy = parameters.get('missing_strategy', 'drop')
+                if strategy == 'drop':
+                    lf = lf.drop_nulls()
+                elif strategy == 'forward_fill':
+                    lf = lf.fill_null(strategy='forward')
+                elif strategy == 'backward_fill':
+                    lf = lf.fill_null(strategy='backward')
+                elif strategy == 'mean':
+                    numeric = pl.col(pl.NUMERIC_DTYPES)
+                    lf = lf.with_columns(numeric.fill_null(numeric.mean()))
+            elif operation == 'remove_outliers':
+                # Each column's bounds come from the rows left by the previous
+                # column, as in pandas, so materialize between columns
+                frame = lf.collect()
+                for col in frame.select(pl.col(pl.NUMERIC_DTYPES)).columns:
+                    q1 = pl.col(col).quantile(0.25, 'linear')
+                    q3 = pl.col(col).quantile(0.75, 'linear')
+                    iqr = q3 - q1
+                    frame = frame.filter(
+                        pl.col(col).is_between(q1 - 1.5 * iqr, q3 + 1.5 * iqr).fill_null(False)
+                    )
+                lf = frame.lazy()
+        
+        return lf
+    
+    def _sample(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pl.LazyFrame:
+        method = parameters.get('method', 'random')
+        size = parameters.get('size', 100)
+        
+        if method == 'head':
+            return lf.head(size)
+        if method == 'tail':
+            return lf.tail(size)
+        
+        frame = lf.collect()
+        column = parameters.get('stratify_column')
+        
+        if method == 'stratified' and column and column in frame.columns:
+            per_group = size // max(frame[column].n_unique(), 1)
+            return (
+                frame.filter(
+                    pl.int_range(0, pl.count()).shuffle(seed=42).over(column) < per_group
+                )
+                .sort(column, maintain_order=True)
+                .lazy()
+            )
+        
+        return frame.sample(n=min(size, frame.height), seed=42).lazy()
+    
+    def _statistics(self, lf: pl.LazyFrame, parameters: Dict[str, Any]) -> pd.DataFrame:
+        include_columns = parameters.get('columns', 'all')
+        schema = lf.schema
+        
+        if include_columns == 'all':
+            selected = list(schema)
+        elif include_columns == 'numeric':
+            selected = [col for col, dtype in schema.items() if dtype in pl.NUMERIC_DTYPES]
+        else:
+            if isinstance(include_columns, str):
+                include_columns = [include_columns]
+            selected = [col for col in include_columns if col in schema]
+        
+        numeric = [col for col in selected if schema[col] in pl.NUMERIC_DTYPES]
+        other = [col for col in selected if col not in numeric]
+        
+        # Every statistic for every column in one multithreaded pass
+        exprs = []
+        for i, col in enumerate(numeric):
+            c = pl.col(col)
+            exprs += [
+                c.count().cast(pl.Float64).alias(f"{i}:count"),
+                c.mean().alias(f"{i}:mean"),
+                c.std().alias(f"{i}:std"),
+                c.min().cast(pl.Float64).alias(f"{i}:min"),
+                c.quantile(0.25, 'linear').alias(f"{i}:25%"),
+                c.quantile(0.5, 'linear').alias(f"{i}:50%"),
+                c.quantile(0.75, 'linear').alias(f"{i}:75%"),
+                c.max().cast(pl.Float64).alias(f"{i}:max"),
+            ]
+        offset = len(numeric)
+        for i, col in enumerate(other, offset):
+            c = pl.col(col).drop_nulls()
+            exprs += [
+                c.count().alias(f"{i}:count"),
+                c.n_unique().alias(f"{i}:unique"),
+                c.mode().first().alias(f"{i}:top"),
+                (c == c.mode().first()).sum().alias(f"{i}:freq"),
+            ]
+        
+        values = lf.select(exprs).collect().row(0, named=True) if exprs else {}
+        
+        index = (['count', 'unique', 'top', 'freq'] if other else ['count']) + (
+            ['mean', 'std', 'min', '25%', '50%', '75%', 'max'] if numeric else []
+        )
+        positions = {col: i for i, col in enumerate(numeric + other)}
+        stats_df = pd.DataFrame(
+            {col: [values.get(f"{positions[col]}:{stat}", np.nan) for stat in index] for col in selected},
+            index=index
+        )
+        return stats_df.reset_index()
+    
+    def format_output(self, df: pl.DataFrame, output_format: str) -> Any:
+        """Format a result the same way the pandas engine does"""
+        
+        if output_format == 'list':
+            return [list(row) for row in df.rows()]
+        elif output_format == 'dict':
+            return {col: dict(enumerate(values)) for col, values in df.to_dict(as_series=False).items()}
+        elif output_format == 'json':
+            return df.write_json(row_oriented=True)
+        elif output_format == 'csv':
+            return df.write_csv()
+        else:
+            return df.to_dicts()
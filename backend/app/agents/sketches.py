@@ -0,0 +1,314 @@
+import math
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_QUANTILE_K = 200
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_TOP_K = 64
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang and Liberty)
+    
+    Values go into level 0; a level over its capacity is sorted and every
+    other value, from a random offset, moves up a level with twice the
+    weight. Capacities shrink by 2/3 per level below the top, so the sketch
+    holds O(k) values. Batches are compacted whole, which adds at most one
+    compaction's error per level.
+    """
+    
+    def __init__(self, k: int = DEFAULT_QUANTILE_K, seed: int = 0):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+    
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(8, int(math.ceil(self.k * (2 / 3) ** depth)))
+    
+    def update(self, values: np.ndarray):
+        """Add a batch of non-missing values"""
+        
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+    
+    def update_sorted(self, values: np.ndarray):
+        """Add a sorted batch, halving it straight into the level it fits in
+        
+        Compacting a sorted run leaves it sorted, so the batch is compacted
+        by slicing instead of sorting it again at every level.
+        """
+        
+        if not len(values):
+            return
+        self.count += len(values)
+        level = 0
+        while len(values) > self.k:
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            if len(values) % 2:
+                self.levels[level] = np.concatenate([self.levels[level], values[-1:]])
+                values = values[:-1]
+            values = values[int(self._rng.integers(2))::2]
+            level += 1
+        self.levels[level] = np.concatenate([self.levels[level], values])
+        self._compress()
+    
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.count += other.count
+        self._compress()
+    
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                values = np.sort(values)
+                # An odd value out stays behind so the total weight is kept
+                carry = values[-1:] if len(values) % 2 else values[:0]
+                paired = values[:len(values) - len(carry)]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[level] = carry
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+    
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if not self.count:
+            return [np.nan] * len(qs)
+        
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        return [float(values[min(np.searchsorted(cumulative, q * total), len(values) - 1)]) for q in qs]
+    
+    def rank_error(self) -> float:
+        """Normalized rank error that holds with high probability"""
+        return 2.296 / self.k ** 0.9723
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes with 2**precision registers"""
+    
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    def update_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Position of the leftmost 1 bit in the remaining bits
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        ranks = (width - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+    
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+    
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return float(raw)
+    
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+class FrequentItems:
+    """Misra-Gries heavy hitters; counts are underestimated by at most `error`"""
+    
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.k = k
+        self.counts = pd.Series(dtype=np.int64)
+        self.error = 0
+    
+    def update_counts(self, counts: pd.Series):
+        combined = self.counts.add(counts, fill_value=0)
+        if len(combined) > self.k:
+            threshold = combined.nlargest(self.k + 1).iloc[-1]
+            combined = combined[combined > threshold] - threshold
+            self.error += int(threshold)
+        self.counts = combined.astype(np.int64)
+    
+    def merge(self, other: "FrequentItems"):
+        self.error += other.error
+        self.update_counts(other.counts)
+    
+    def top(self) -> tuple:
+        if self.counts.empty:
+            return np.nan, np.nan
+        return self.counts.idxmax(), int(self.counts.max())
+
+class ColumnSketch:
+    """Count, moments, quantiles and distinct values of one column"""
+    
+    def __init__(self, numeric: bool, quantile_k: int, hll_precision: int, top_k: int, seed: int):
+        self.numeric = numeric
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.nan
+        self.maximum = np.nan
+        self.quantiles = KLLSketch(quantile_k, seed) if numeric else None
+        self.distinct = None if numeric else HyperLogLog(hll_precision)
+        self.frequent = None if numeric else FrequentItems(top_k)
+    
+    def merge_moments(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        """Combine running moments with another batch's (Chan et al.)"""
+        
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = minimum if np.isnan(self.minimum) else min(self.minimum, minimum)
+        self.maximum = maximum if np.isnan(self.maximum) else max(self.maximum, maximum)
+    
+    def merge(self, other: "ColumnSketch"):
+        if self.numeric:
+            self.merge_moments(other.count, other.mean, other.m2, other.minimum, other.maximum)
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.count += other.count
+            self.distinct.merge(other.distinct)
+            self.frequent.merge(other.frequent)
+
+class FrameSketch:
+    """Mergeable summary of a frame's columns for approximate statistics
+    
+    Mean and variance come from Welford-style moments merged exactly, so
+    they only differ from the exact values by rounding. Quantiles use KLL
+    sketches, distinct counts HyperLogLog and the most frequent value
+    Misra-Gries counts; `error_bounds` reports their error.
+    """
+    
+    def __init__(
+        self,
+        quantile_k: int = DEFAULT_QUANTILE_K,
+        hll_precision: int = DEFAULT_HLL_PRECISION,
+        top_k: int = DEFAULT_TOP_K
+    ):
+        self.quantile_k = quantile_k
+        self.hll_precision = hll_precision
+        self.top_k = top_k
+        self.columns: Dict[Any, ColumnSketch] = {}
+    
+    def _column(self, name: Any, numeric: bool) -> ColumnSketch:
+        sketch = self.columns.get(name)
+        if sketch is None:
+            sketch = self.columns[name] = ColumnSketch(
+                numeric, self.quantile_k, self.hll_precision, self.top_k, seed=len(self.columns)
+            )
+        return sketch
+    
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk in; numeric columns are summarized together as one 2-D block"""
+        
+        numeric = [column for column, dtype in df.dtypes.items()
+                   if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+        numeric_set = set(numeric)
+        others = [column for column in df.columns if column not in numeric_set]
+        # Create sketches in frame order, which is the order `describe` lists them in
+        for column in df.columns:
+            self._column(column, column in numeric_set)
+        
+        if numeric:
+            # One row per column, each sorted in a single call; missing values sort last
+            block = np.ascontiguousarray(df[numeric].to_numpy(dtype=np.float64, na_value=np.nan).T)
+            block.sort(axis=1)
+            counts = np.count_nonzero(~np.isnan(block), axis=1)
+            
+            for i, column in enumerate(numeric):
+                values = block[i, :counts[i]]
+                sketch = self._column(column, True)
+                if len(values):
+                    mean = values.mean()
+                    sketch.merge_moments(len(values), mean, float(np.square(values - mean).sum()), values[0], values[-1])
+                sketch.quantiles.update_sorted(values)
+        
+        for column in others:
+            values = df[column].dropna()
+            sketch = self._column(column, False)
+            sketch.count += len(values)
+            sketch.distinct.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+            sketch.frequent.update_counts(values.value_counts())
+    
+    def merge(self, other: "FrameSketch"):
+        for name, sketch in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(sketch)
+            else:
+                self.columns[name] = sketch
+    
+    def quantiles(self, qs: List[float]) -> Dict[Any, List[float]]:
+        return {
+            name: sketch.quantiles.quantiles(qs)
+            for name, sketch in self.columns.items() if sketch.numeric
+        }
+    
+    def describe(self, columns: Optional[List[Any]] = None) -> pd.DataFrame:
+        """Frame laid out like `DataFrame.describe(include=...)` for the sketched columns"""
+        
+        names = [name for name in (columns if columns is not None else self.columns) if name in self.columns]
+        has_numeric = any(self.columns[name].numeric for name in names)
+        has_other = any(not self.columns[name].numeric for name in names)
+        
+        index = ['count']
+        if has_other:
+            index += ['unique', 'top', 'freq']
+        if has_numeric:
+            index += ['mean', 'std', 'min', '25%', '50%', '75%', 'max']
+        
+        result = {}
+        for name in names:
+            sketch = self.columns[name]
+            stats = {'count': float(sketch.count)}
+            if sketch.numeric:
+                q1, median, q3 = sketch.quantiles.quantiles([0.25, 0.5, 0.75])
+                stats.update({
+                    'mean': sketch.mean if sketch.count else np.nan,
+                    'std': math.sqrt(sketch.m2 / (sketch.count - 1)) if sketch.count > 1 else np.nan,
+                    'min': sketch.minimum, '25%': q1, '50%': median, '75%': q3, 'max': sketch.maximum
+                })
+            else:
+                top, freq = sketch.frequent.top()
+                stats.update({'unique': round(sketch.distinct.estimate()), 'top': top, 'freq': freq})
+            result[name] = pd.Series(stats, index=index, dtype=object if has_other else np.float64)
+        
+        return pd.DataFrame(result, index=index)
+    
+    def error_bounds(self) -> Dict[str, Any]:
+        """Error bounds for the approximate values in `describe`"""
+        
+        bounds: Dict[str, Any] = {}
+        numeric = [sketch for sketch in self.columns.values() if sketch.numeric]
+        others = {name: sketch for name, sketch in self.columns.items() if not sketch.numeric}
+        if numeric:
+            bounds['quantile_rank_error'] = numeric[0].quantiles.rank_error()
+        if others:
+            bounds['unique_relative_error'] = next(iter(others.values())).distinct.relative_error()
+            bounds['freq_max_undercount'] = {str(name): sketch.frequent.error for name, sketch in others.items()}
+        return bounds
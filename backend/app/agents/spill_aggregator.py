@@ -0,0 +1,204 @@
+import logging
+import math
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Working memory of each operation relative to the size of its input;
+# pivot_table unstacks through several intermediate frames
+EXPANSION_FACTORS = {'group_by': 3, 'pivot': 10}
+
+MAX_PARTITIONS = 256
+MAX_REPARTITION_DEPTH = 3
+
+class SpillingAggregator:
+    """Out-of-core group_by and pivot within a memory budget
+    
+    Chunks are buffered until they pass half of the budget; smaller inputs
+    are then aggregated in memory as usual. Larger inputs are hash-partitioned
+    on the group keys into spill files, so every group lands in exactly one
+    partition. Partitions are aggregated independently on a few threads and
+    their disjoint results concatenated and sorted like a single groupby.
+    A partition that still does not fit is split again with another hash key.
+    """
+    
+    def __init__(
+        self,
+        processor: Any,
+        memory_budget_mb: float,
+        spill_directory: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
+        self.processor = processor
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.spill_directory = spill_directory
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.expansion = EXPANSION_FACTORS['group_by']
+        self.stats = {'spilled': False, 'partitions': 0, 'spilled_bytes': 0, 'repartitioned': 0}
+    
+    @staticmethod
+    def supports(stage: Dict[str, Any]) -> bool:
+        parameters = stage['parameters']
+        if stage['operation'] == 'group_by':
+            return bool(parameters.get('group_by'))
+        if stage['operation'] == 'pivot':
+            return bool(parameters.get('index') and parameters.get('columns') and parameters.get('values'))
+        return False
+    
+    def aggregate(self, chunks: Iterator[pd.DataFrame], stage: Dict[str, Any]) -> pd.DataFrame:
+        self.expansion = EXPANSION_FACTORS[stage['operation']]
+        buffered, buffered_bytes = [], 0
+        
+        for chunk in chunks:
+            buffered.append(chunk)
+            buffered_bytes += int(chunk.memory_usage(deep=True).sum())
+            if buffered_bytes * self.expansion > self.memory_budget / 2:
+                return self._aggregate_spilled(buffered, buffered_bytes, chunks, stage)
+        
+        frame = pd.concat(buffered, ignore_index=True) if buffered else pd.DataFrame()
+        return self._aggregate_frame(frame, stage)
+    
+    def _keys(self, stage: Dict[str, Any]) -> List[str]:
+        keys = stage['parameters']['group_by' if stage['operation'] == 'group_by' else 'index']
+        return [keys] if isinstance(keys, str) else list(keys)
+    
+    def _partition_count(self, input_bytes: int) -> int:
+        # Each of the workers needs room for one partition at a time
+        allowance = self.memory_budget / self.workers / self.expansion
+        return max(2, min(MAX_PARTITIONS, math.ceil(input_bytes / allowance)))
+    
+    def _aggregate_spilled(
+        self,
+        buffered: List[pd.DataFrame],
+        buffered_bytes: int,
+        chunks: Iterator[pd.DataFrame],
+        stage: Dict[str, Any]
+    ) -> pd.DataFrame:
+        directory = tempfile.mkdtemp(prefix='data-processor-spill-', dir=self.spill_directory)
+        try:
+            keys = self._keys(stage)
+            # Assume the input is at least four times what has been seen so far
+            count = self._partition_count(buffered_bytes * 4)
+            paths = self._spill(directory, 'p', keys, count, 0, self._drain(buffered, chunks))
+            self.stats.update(spilled=True, partitions=count)
+            logger.info(f"Spilled {stage['operation']} input to {count} partitions in {directory}")
+            
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(
+                    lambda path: self._aggregate_partition(directory, path, keys, stage, 1), paths
+                ))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        
+        return self._combine([result for result in results if result is not None], keys, stage)
+    
+    def _spill(
+        self,
+        directory: str,
+        prefix: str,
+        keys: List[str],
+        count: int,
+        depth: int,
+        chunks: Iterator[pd.DataFrame]
+    ) -> List[str]:
+        """Append each chunk's rows to the partition file their key hash selects"""
+        
+        paths = [os.path.join(directory, f"{prefix}{i}.pkl") for i in range(count)]
+        files = [open(path, 'wb') for path in paths]
+        # A different hash key per level, so a re-split partition really splits
+        hash_key = f"spill-level-{depth:04d}"[:16]
+        
+        try:
+            for chunk in chunks:
+                key_frame = chunk[keys]
+                # Chunks may infer int for a key column in one place and float
+                # (because of a missing value) in another; hash both alike
+                numeric = key_frame.select_dtypes(include='number').columns
+                if len(numeric):
+                    key_frame = key_frame.astype({column: 'float64' for column in numeric})
+                hashes = pd.util.hash_pandas_object(key_frame, index=False, hash_key=hash_key)
+                partition_ids = (hashes % count).to_numpy()
+                for partition_id, part in chunk.groupby(partition_ids, sort=False):
+                    pickle.dump(part, files[partition_id], protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for file in files:
+                file.close()
+        
+        for path in paths:
+            self.stats['spilled_bytes'] += os.path.getsize(path)
+        return paths
+    
+    def _drain(self, buffered: List[pd.DataFrame], chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Hand out the buffered chunks, releasing each one, then the rest of the input"""
+        
+        while buffered:
+            yield buffered.pop(0)
+        yield from chunks
+    
+    def _read_partition(self, path: str) -> Iterator[pd.DataFrame]:
+        with open(path, 'rb') as file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+    
+    def _aggregate_partition(
+        self,
+        directory: str,
+        path: str,
+        keys: List[str],
+        stage: Dict[str, Any],
+        depth: int
+    ) -> Optional[pd.DataFrame]:
+        size = os.path.getsize(path)
+        if not size:
+            return None
+        
+        allowance = self.memory_budget / self.workers / self.expansion
+        if size > allowance and depth <= MAX_REPARTITION_DEPTH:
+            # Skewed or underestimated input: split this partition again
+            count = max(2, min(MAX_PARTITIONS, math.ceil(size / allowance)))
+            prefix = os.path.splitext(os.path.basename(path))[0] + '-'
+            paths = self._spill(directory, prefix, keys, count, depth, self._read_partition(path))
+            os.remove(path)
+            self.stats['repartitioned'] += 1
+            results = [self._aggregate_partition(directory, sub_path, keys, stage, depth + 1) for sub_path in paths]
+            results = [result for result in results if result is not None]
+            return self._combine(results, keys, stage) if results else None
+        
+        frame = pd.concat(self._read_partition(path), ignore_index=True)
+        os.remove(path)
+        return self._aggregate_frame(frame, stage)
+    
+    def _aggregate_frame(self, frame: pd.DataFrame, stage: Dict[str, Any]) -> pd.DataFrame:
+        if stage['operation'] == 'group_by':
+            return self.processor._group_data(frame, stage['parameters'])
+        return self.processor._pivot_data(frame, stage['parameters'])
+    
+    def _combine(self, results: List[pd.DataFrame], keys: List[str], stage: Dict[str, Any]) -> pd.DataFrame:
+        """Merge per-partition results; their groups are disjoint"""
+        
+        if not results:
+            return pd.DataFrame()
+        
+        if stage['operation'] == 'group_by':
+            combined = pd.concat(results, ignore_index=True)
+            return combined.sort_values(keys, kind='stable').reset_index(drop=True)
+        
+        # Pivot columns differ between partitions; absent cells are 0 as in pivot_table
+        indexed = [result.set_index(keys) for result in results]
+        combined = pd.concat(indexed).sort_index().sort_index(axis=1)
+        for column in combined.columns:
+            dtypes = {frame[column].dtype for frame in indexed if column in frame.columns}
+            combined[column] = combined[column].fillna(0)
+            if len(dtypes) == 1:
+                combined[column] = combined[column].astype(dtypes.pop())
+        return combined.reset_index()
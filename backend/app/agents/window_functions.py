@@ -0,0 +1,327 @@
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import polars as pl
+
+AGGREGATE_FUNCTIONS = ('sum', 'mean', 'min', 'max', 'count', 'std')
+NAVIGATION_FUNCTIONS = ('lag', 'lead', 'diff')
+RANKING_FUNCTIONS = ('row_number', 'rank')
+
+# pandas rank methods -> Polars'; 'first' numbers ties in row order
+RANK_METHODS = {'min': 'min', 'max': 'max', 'dense': 'dense', 'average': 'average', 'first': 'ordinal'}
+
+@dataclass
+class WindowSpec:
+    """One window column
+    
+    `kind` is the frame of an aggregate: 'partition' (every row of the
+    partition), 'running' (unbounded preceding to the current row),
+    'rolling' (`size` rows ending at the current row) or 'centered'
+    (`size` rows around it). `reverse` mirrors the frame, so a running
+    frame covers the current row to the end of the partition.
+    """
+    function: str
+    column: Optional[str]
+    target_column: str
+    kind: Optional[str] = None
+    size: int = 0
+    reverse: bool = False
+    min_periods: int = 1
+    periods: int = 1
+    method: str = 'min'
+    ascending: bool = True
+
+@dataclass
+class WindowPlan:
+    partition_by: List[str]
+    order_by: List[str]
+    ascending: List[bool]
+    windows: List[WindowSpec]
+    
+    @property
+    def columns(self) -> List[str]:
+        """Columns the plan reads"""
+        
+        read = self.partition_by + self.order_by + [window.column for window in self.windows if window.column]
+        return list(dict.fromkeys(read))
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def parse_windows(parameters: Dict[str, Any]) -> WindowPlan:
+    """Validate the parameters of a window operation
+    
+    `partition_by` and `order_by` name columns, `ascending` is a bool or one
+    per order column, and `windows` lists the columns to compute, e.g.
+    `{'function': 'mean', 'column': 'amount', 'frame': {'preceding': 6}}`.
+    Frames count rows: `preceding` and `following` default to 0 and None
+    means unbounded. Without a frame, aggregates run from the start of the
+    partition to the current row when there is an order, and over the whole
+    partition when there is not.
+    """
+    
+    partition_by = _as_list(parameters.get('partition_by'))
+    order_by = _as_list(parameters.get('order_by'))
+    ascending = parameters.get('ascending', True)
+    if isinstance(ascending, bool):
+        ascending = [ascending] * len(order_by)
+    if len(ascending) != len(order_by):
+        raise ValueError("ascending needs one value per order_by column")
+    
+    windows = [_parse_window(window, order_by, ascending) for window in parameters.get('windows', [])]
+    if not windows:
+        raise ValueError("Window operation needs at least one entry in windows")
+    targets = [window.target_column for window in windows]
+    duplicate = next((target for target in targets if targets.count(target) > 1), None)
+    if duplicate:
+        raise ValueError(f"Two windows write '{duplicate}'; give them distinct target_column names")
+    return WindowPlan(partition_by, order_by, list(ascending), windows)
+
+def _parse_window(window: Dict[str, Any], order_by: List[str], ascending: List[bool]) -> WindowSpec:
+    function = window.get('function')
+    column = window.get('column')
+    supported = AGGREGATE_FUNCTIONS + NAVIGATION_FUNCTIONS + RANKING_FUNCTIONS
+    if function not in supported:
+        raise ValueError(f"Unsupported window function: {function}. Supported: {', '.join(supported)}")
+    
+    spec = WindowSpec(
+        function=function,
+        column=column,
+        target_column=window.get('target_column') or (f"{column}_{function}" if column else function),
+        min_periods=int(window.get('min_periods', 1)),
+        periods=int(window.get('periods', 1)),
+    )
+    
+    if function == 'rank':
+        if column is None:
+            # Rank by the order, which must then be a single column
+            if len(order_by) != 1:
+                raise ValueError("rank needs a column unless order_by is a single column")
+            spec.column, spec.ascending = order_by[0], ascending[0]
+        else:
+            spec.ascending = bool(window.get('ascending', True))
+        spec.method = window.get('method', 'min')
+        if spec.method not in RANK_METHODS:
+            raise ValueError(f"Unsupported rank method: {spec.method}. Supported: {', '.join(RANK_METHODS)}")
+    elif function != 'row_number' and column is None:
+        raise ValueError(f"Window function {function} needs a column")
+    
+    if function in AGGREGATE_FUNCTIONS:
+        spec.kind, spec.size, spec.reverse = _parse_frame(window.get('frame'), bool(order_by))
+    return spec
+
+def _parse_frame(frame: Optional[Dict[str, Any]], ordered: bool) -> tuple:
+    """(kind, size, reverse) for a frame"""
+    
+    if frame is None:
+        return ('running', 0, False) if ordered else ('partition', 0, False)
+    
+    preceding = frame.get('preceding', 0)
+    following = frame.get('following', 0)
+    for bound in (preceding, following):
+        if bound is not None and (not isinstance(bound, int) or bound < 0):
+            raise ValueError(f"Window frame bounds must be non-negative row counts or None, got {bound!r}")
+    
+    if preceding is None and following is None:
+        return 'partition', 0, False
+    if preceding is None and following == 0:
+        return 'running', 0, False
+    if following is None and preceding == 0:
+        return 'running', 0, True
+    if preceding is not None and following == 0:
+        return 'rolling', preceding + 1, False
+    if following is not None and preceding == 0:
+        return 'rolling', following + 1, True
+    if preceding == following:
+        return 'centered', 2 * preceding + 1, False
+    raise ValueError(
+        "Window frames must start or end at the current row, or be centered on it; "
+        f"got {preceding} preceding and {following} following"
+    )
+
+def evaluate_pandas(df: pd.DataFrame, plan: WindowPlan) -> Dict[str, pd.Series]:
+    """Compute the window columns; each comes back in the frame's row order
+    
+    Rows are sorted once by the order columns, and partitions are numbered
+    once, so every window is a grouped Cython kernel (cumsum, shift,
+    rolling, rank) over integer group codes rather than a loop over groups.
+    """
+    
+    missing = [column for column in plan.columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown column '{missing[0]}' in window")
+    
+    frame = df[plan.columns].set_axis(pd.RangeIndex(len(df)))
+    if plan.order_by:
+        frame = frame.sort_values(plan.order_by, ascending=plan.ascending, kind='stable', na_position='last')
+    if plan.partition_by:
+        codes = frame.groupby(plan.partition_by, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+    
+    # Sorted position -> row, inverted to put results back in row order
+    rows = frame.index.to_numpy()
+    inverse = np.empty(len(rows), dtype=np.int64)
+    inverse[rows] = np.arange(len(rows))
+    
+    results = {}
+    for window in plan.windows:
+        values = _evaluate_window(frame, codes, window)
+        results[window.target_column] = values.iloc[inverse].set_axis(df.index)
+    return results
+
+def _evaluate_window(frame: pd.DataFrame, codes: np.ndarray, window: WindowSpec) -> pd.Series:
+    """One window over the sorted frame, in sorted order"""
+    
+    function = window.function
+    if function == 'row_number':
+        return pd.Series(frame.groupby(codes, sort=False).cumcount().to_numpy() + 1)
+    
+    series = frame[window.column].reset_index(drop=True)
+    grouped = series.groupby(codes, sort=False)
+    if function == 'rank':
+        return grouped.rank(method=window.method, ascending=window.ascending, na_option='keep')
+    if function == 'lag':
+        return grouped.shift(window.periods)
+    if function == 'lead':
+        return grouped.shift(-window.periods)
+    if function == 'diff':
+        return grouped.diff(window.periods)
+    
+    if window.reverse:
+        series, codes = series.iloc[::-1].reset_index(drop=True), codes[::-1]
+    
+    if window.kind == 'partition':
+        result = _partition_aggregate(series, codes, window)
+    elif window.kind == 'running':
+        result = _running_aggregate(series, codes, window)
+    else:
+        result = _rolling_aggregate(series, codes, window)
+    
+    return result.iloc[::-1].reset_index(drop=True) if window.reverse else result
+
+def _partition_aggregate(series: pd.Series, codes: np.ndarray, window: WindowSpec) -> pd.Series:
+    grouped = series.groupby(codes, sort=False)
+    counts = grouped.transform('count')
+    if window.function == 'count':
+        return counts
+    return grouped.transform(window.function).where(counts >= window.min_periods)
+
+def _running_aggregate(series: pd.Series, codes: np.ndarray, window: WindowSpec) -> pd.Series:
+    # Missing values are skipped; a row has a value once min_periods values are in its frame
+    counts = series.notna().groupby(codes, sort=False).cumsum()
+    if window.function == 'count':
+        return counts
+    enough = counts >= window.min_periods
+    
+    function = window.function
+    if function in ('min', 'max'):
+        running = getattr(series.groupby(codes, sort=False), f"cum{function}")()
+        # Missing rows carry the extreme so far
+        return running.groupby(codes, sort=False).ffill().where(enough)
+    
+    if function == 'std':
+        # Sums of squares around the partition mean, so large values do not cancel
+        centered = series - series.groupby(codes, sort=False).transform('mean')
+        first = centered.fillna(0).groupby(codes, sort=False).cumsum()
+        second = (centered * centered).fillna(0).groupby(codes, sort=False).cumsum()
+        variance = ((second - first * first / counts) / (counts - 1)).clip(lower=0)
+        return np.sqrt(variance).where(enough & (counts > 1))
+    
+    total = series.fillna(0).groupby(codes, sort=False).cumsum()
+    if function == 'sum':
+        return total.where(enough)
+    return (total / counts).where(enough)
+
+def _rolling_aggregate(series: pd.Series, codes: np.ndarray, window: WindowSpec) -> pd.Series:
+    center = window.kind == 'centered'
+    if window.function == 'count':
+        present = series.notna().astype(np.float64).groupby(codes, sort=False)
+        result = present.rolling(window.size, min_periods=1, center=center).sum().astype(np.int64)
+    else:
+        rolling = series.groupby(codes, sort=False).rolling(window.size, min_periods=window.min_periods, center=center)
+        result = getattr(rolling, window.function)()
+    # Results are listed group by group under (code, position); scatter them back to position order
+    values = np.empty(len(series), dtype=result.dtype)
+    values[result.index.get_level_values(-1).to_numpy()] = result.to_numpy()
+    return pd.Series(values)
+
+def compile_polars(plan: WindowPlan, columns: List[str]) -> List["pl.Expr"]:
+    """Polars expressions for the window columns, for a frame sorted by the order columns"""
+    
+    import polars as pl
+    
+    missing = [column for column in plan.columns if column not in columns]
+    if missing:
+        raise ValueError(f"Unknown column '{missing[0]}' in window")
+    
+    def over(expr: pl.Expr) -> pl.Expr:
+        return expr.over(plan.partition_by) if plan.partition_by else expr
+    
+    exprs = []
+    for window in plan.windows:
+        function = window.function
+        if function == 'row_number':
+            expr = over(pl.int_range(1, pl.count() + 1, dtype=pl.Int64))
+        elif function == 'rank':
+            expr = over(
+                pl.col(window.column).rank(RANK_METHODS[window.method], descending=not window.ascending)
+            ).cast(pl.Float64)
+        elif function == 'lag':
+            expr = over(pl.col(window.column).shift(window.periods))
+        elif function == 'lead':
+            expr = over(pl.col(window.column).shift(-window.periods))
+        elif function == 'diff':
+            expr = over(pl.col(window.column).diff(window.periods))
+        else:
+            expr = over(_polars_aggregate(window))
+        exprs.append(expr.alias(window.target_column))
+    return exprs
+
+def _polars_aggregate(window: WindowSpec) -> "pl.Expr":
+    import polars as pl
+    
+    col = pl.col(window.column)
+    function = window.function
+    
+    if window.kind == 'partition':
+        count = col.count()
+        if function == 'count':
+            return count
+        return pl.when(count >= window.min_periods).then(getattr(col, function)())
+    
+    if window.reverse:
+        col = col.reverse()
+    
+    if window.kind == 'running':
+        count = col.is_not_null().cast(pl.Int64).cum_sum()
+        enough = count >= window.min_periods
+        if function == 'count':
+            result = count
+        elif function in ('min', 'max'):
+            result = pl.when(enough).then(getattr(col, f"cum_{function}")().forward_fill())
+        elif function == 'std':
+            centered = col - col.mean()
+            first = centered.fill_null(0).cum_sum()
+            second = (centered * centered).fill_null(0).cum_sum()
+            variance = ((second - first * first / count) / (count - 1)).clip(lower_bound=0)
+            result = pl.when(enough & (count > 1)).then(variance.sqrt())
+        else:
+            total = col.fill_null(0).cum_sum()
+            result = pl.when(enough).then(total if function == 'sum' else total / count)
+    else:
+        center = window.kind == 'centered'
+        if function == 'count':
+            result = col.is_not_null().cast(pl.Int64).rolling_sum(window.size, min_periods=1, center=center)
+        else:
+            result = getattr(col, f"rolling_{function}")(
+                window.size, min_periods=window.min_periods, center=center
+            )
+    
+    return result.reverse() if window.reverse else result
@@ -309,11 +309,11 @@ async def websocket_endpoint(
     token: str = None
 ):
     """WebSocket endpoint for real-time workflow collaboration and monitoring"""
-    from app.services.websocket_manager import ConnectionManager
+    from app.services.websocket_manager import get_connection_manager
     from app.services.auth_service import AuthService
     
-    # Initialize connection manager (in production, this would be a singleton)
-    manager = ConnectionManager()
+    # Executions stream node events through the same manager
+    manager = get_connection_manager()
     
     # Authenticate user (simplified - in production, validate JWT token)
     user_id = None
@@ -375,7 +375,8 @@ async def execute_workflow(
         _execute_workflow_background,
         execution.id,
         workflow.workflow_data,
-        execute_request.input_data
+        execute_request.input_data,
+        workflow.execution_config
     )
     
     return WorkflowExecuteResponse(
@@ -387,13 +388,15 @@ async def execute_workflow(
 async def _execute_workflow_background(
     execution_id: uuid.UUID,
     workflow_data: dict,
-    input_data: dict
+    input_data: dict,
+    execution_config: dict = None
 ):
     """Background task to execute workflow"""
     from app.services.execution_engine import ExecutionEngine
+    from app.services.websocket_manager import get_connection_manager
     from app.core.database import get_db
     
-    execution_engine = ExecutionEngine()
+    execution_engine = ExecutionEngine(connection_manager=get_connection_manager())
     
     try:
         # Start execution engine
@@ -420,7 +423,8 @@ async def _execute_workflow_background(
                 workflow_data=workflow_data,
                 input_data=input_data,
                 user_id=execution.user_id,
-                workflow_id=execution.workflow_id
+                workflow_id=execution.workflow_id,
+                execution_config=execution_config
             )
             
     except Exception as e:
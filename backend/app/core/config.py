@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -50,6 +50,32 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     LANGCHAIN_API_KEY: Optional[str] = None
+    LLM_PROVIDER: str = "openai"  # openai, mock
+    LLM_MODEL: str = "gpt-4"
+    LLM_TEMPERATURE: float = 0.1
+    MOCK_LLM_OPTIONS: Dict[str, Any] = {}  # latency_ms, latency_distribution, tokens_per_second, error_rate, seed, ...
+    PROMPT_MAX_TOKENS: int = 6000
+    LLM_CACHE_BACKEND: str = "memory"  # memory, sqlite, redis, none
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_SQLITE_PATH: str = "./data/llm_cache.db"
+    SEMANTIC_CACHE_ENABLED: bool = False  # opt-in per node with semantic_cache
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10000
+    LLM_RATE_LIMIT_ENABLED: bool = False  # set the limits below to the account's quota when enabling
+    LLM_RATE_LIMIT_BACKEND: str = "local"  # local, redis
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 30000
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}  # "provider:model" -> limits
+    
+    # Circuit breakers and bulkheads per agent type and target host/DSN
+    CIRCUIT_BREAKER_ENABLED: bool = False
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RECOVERY_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: Optional[float] = None
+    BULKHEAD_MAX_CONCURRENT: int = 10
+    BULKHEAD_MAX_WAIT_SECONDS: float = 10.0
     
     # External Services
     SMTP_HOST: Optional[str] = None
@@ -80,11 +106,18 @@ class Settings(BaseSettings):
     AGENT_TIMEOUT_SECONDS: int = 300
     MAX_RETRIES: int = 3
     RETRY_DELAY_SECONDS: int = 5
+    AGENT_POOL_MAX_SIZE: int = 64
+    AGENT_POOL_IDLE_TIMEOUT_SECONDS: int = 600
+    AGENT_WARMUP_ENABLED: bool = False
+    DATA_PROCESSOR_FUSION_ENABLED: bool = False  # fused chains keep only the last node's data
     
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = 30
     WS_CONNECTION_TIMEOUT: int = 60
     WS_MAX_CONNECTIONS_PER_USER: int = 5
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_STREAM_FLUSH_INTERVAL_MS: int = 50
+    WS_STREAM_MAX_CHUNK_CHARS: int = 1024
     
     # Development
     HOT_RELOAD: bool = True
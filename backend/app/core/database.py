@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.serialization import dumps
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,8 @@ engine = create_async_engine(
     max_overflow=30,
     pool_pre_ping=True,
     pool_recycle=3600,
+    # Columnar tables in execution results become JSON records only here
+    json_serializer=dumps,
 )
 
 # Create async session factory
@@ -0,0 +1,30 @@
+import json
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+def _instance_of(value: Any, module_name: str, class_name: str) -> bool:
+    # A table or stream only exists once its module is loaded, so checking never imports the services
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(value, getattr(module, class_name))
+
+def json_default(value: Any) -> Any:
+    """`default` hook for json.dumps that understands tables and common scalars"""
+    
+    if _instance_of(value, 'app.services.columnar', 'ColumnarTable'):
+        return value.to_records()
+    if _instance_of(value, 'app.services.file_streams', 'FileStream'):
+        return value.describe()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'item') and hasattr(value, 'dtype'):
+        # NumPy scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any, **kwargs: Any) -> str:
+    """json.dumps that converts tables only at serialization time"""
+    return json.dumps(value, default=json_default, **kwargs)
@@ -29,6 +29,9 @@ class ExecutionConfig(BaseModel):
     retries: Optional[int] = 3
     parallel: Optional[bool] = False
     variables: Optional[Dict[str, Any]] = {}
+    llm_cache_ttl: Optional[int] = None
+    llm_cache_bypass: Optional[bool] = False
+    fuse_data_processors: Optional[bool] = None
 
 class WorkflowBase(BaseModel):
     name: str
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, str, str]
+
+@dataclass
+class PooledAgent:
+    """Agent instance held by the pool"""
+    agent: Any
+    key: PoolKey
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0
+    uses: int = 0
+    retired: bool = False
+
+class AgentPool:
+    """Caches resolved agent classes and reuses agent instances with identical config"""
+    
+    def __init__(self, max_size: int = 64, idle_timeout: float = 600.0):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._class_cache: Dict[Tuple[str, str], type] = {}
+        self._instances: "OrderedDict[PoolKey, PooledAgent]" = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._monitor_task: Optional[asyncio.Task] = None
+    
+    def resolve_class(self, module_path: str, class_name: str) -> type:
+        """Resolve an agent class once and cache it"""
+        
+        cache_key = (module_path, class_name)
+        agent_class = self._class_cache.get(cache_key)
+        if agent_class is None:
+            module = importlib.import_module(module_path)
+            agent_class = getattr(module, class_name)
+            self._class_cache[cache_key] = agent_class
+        return agent_class
+    
+    @asynccontextmanager
+    async def lease(self, module_path: str, class_name: str, config: Dict[str, Any], llm: Any = None):
+        """Borrow a pooled agent instance for the duration of one execution"""
+        
+        entry = await self._acquire(module_path, class_name, config, llm)
+        try:
+            yield entry.agent
+        finally:
+            await self._release(entry)
+    
+    async def _acquire(
+        self,
+        module_path: str,
+        class_name: str,
+        config: Dict[str, Any],
+        llm: Any
+    ) -> PooledAgent:
+        """Get or create the pooled entry for a class/config pair"""
+        
+        await self.evict_idle()
+        
+        key = (module_path, class_name, self._fingerprint(config))
+        entry = self._instances.get(key)
+        
+        if entry is not None:
+            self._instances.move_to_end(key)
+            self._stats['hits'] += 1
+        else:
+            agent_class = self.resolve_class(module_path, class_name)
+            entry = PooledAgent(agent=agent_class(config=config, llm=llm), key=key)
+            self._instances[key] = entry
+            self._stats['misses'] += 1
+            await self._enforce_max_size()
+        
+        entry.leases += 1
+        entry.uses += 1
+        entry.last_used = time.monotonic()
+        return entry
+    
+    async def _release(self, entry: PooledAgent):
+        """Return a leased entry, closing it if it was evicted while in use"""
+        
+        entry.leases -= 1
+        entry.last_used = time.monotonic()
+        
+        if entry.retired and entry.leases == 0:
+            await self._close_agent(entry)
+    
+    async def evict_idle(self) -> int:
+        """Close instances that have not been used within the idle timeout"""
+        
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._instances.items()
+            if entry.leases == 0 and now - entry.last_used > self.idle_timeout
+        ]
+        
+        for key in expired:
+            await self._evict(key)
+        
+        return len(expired)
+    
+    def start_monitor(self, interval: float = 60.0):
+        """Start the background task that closes idle instances, once per pool"""
+        
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._idle_monitor(interval))
+    
+    async def _idle_monitor(self, interval: float):
+        """Close idle instances every interval, also between executions"""
+        
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Agent pool monitor error: {e}", exc_info=True)
+    
+    async def _enforce_max_size(self):
+        """Evict least recently used instances beyond the size bound"""
+        
+        while len(self._instances) > self.max_size:
+            oldest_key = next(iter(self._instances))
+            await self._evict(oldest_key)
+    
+    async def _evict(self, key: PoolKey):
+        """Remove an entry from the pool and close it once no lease holds it"""
+        
+        entry = self._instances.pop(key, None)
+        if entry is None:
+            return
+        
+        self._stats['evictions'] += 1
+        entry.retired = True
+        if entry.leases == 0:
+            await self._close_agent(entry)
+    
+    async def _close_agent(self, entry: PooledAgent):
+        """Call the agent's close() hook if it defines one"""
+        
+        close = getattr(entry.agent, 'close', None)
+        if close is None:
+            return
+        
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Failed to close pooled agent {entry.key[1]}: {e}")
+    
+    async def close(self):
+        """Close every pooled instance and clear the pool"""
+        
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        
+        entries = list(self._instances.values())
+        self._instances.clear()
+        
+        for entry in entries:
+            entry.retired = True
+        
+        await asyncio.gather(
+            *(self._close_agent(entry) for entry in entries if entry.leases == 0)
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool usage statistics"""
+        
+        return {
+            **self._stats,
+            'size': len(self._instances),
+            'max_size': self.max_size,
+            'cached_classes': len(self._class_cache)
+        }
+    
+    def _fingerprint(self, config: Dict[str, Any]) -> str:
+        """Build a stable hash of an agent configuration"""
+        
+        serialized = json.dumps(config or {}, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+_agent_pool: Optional[AgentPool] = None
+
+def get_agent_pool() -> AgentPool:
+    """Get the process-wide agent pool"""
+    
+    global _agent_pool
+    if _agent_pool is None:
+        from app.core.config import settings
+        
+        _agent_pool = AgentPool(
+            max_size=settings.AGENT_POOL_MAX_SIZE,
+            idle_timeout=settings.AGENT_POOL_IDLE_TIMEOUT_SECONDS
+        )
+    return _agent_pool
@@ -1,38 +1,106 @@
 import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Awaitable, TYPE_CHECKING
 from datetime import datetime
 import importlib
 import sys
+import time
 from pathlib import Path
 
-from langchain.agents import AgentExecutor
-from langchain.chat_models import ChatOpenAI
-from langchain.tools import BaseTool
-from crewai import Crew, Agent, Task
+from app.agents import AGENT_REGISTRY, get_agent_class, warmup_agents
+from app.core.config import settings
+from app.services.agent_pool import AgentPool, get_agent_pool
+from app.services.circuit_breaker import (
+    DependencyUnavailableError,
+    ResilienceRegistry,
+    get_resilience_registry,
+    resolve_dependency_key
+)
+from app.services.expressions import get_variable_extractor
+from app.services.prompt_templates import render_prompt
+from app.services.llm_cache import LLMResponseCache, get_llm_cache, record_cache_metrics
+from app.services.rate_limiter import (
+    LLMRateLimiter,
+    get_llm_rate_limiter,
+    get_rate_limit_error_headers,
+    record_queue_metrics
+)
 
-from app.agents import AGENT_REGISTRY, get_agent_class
+# LangChain, CrewAI and NumPy are imported where they are first used so that
+# importing this module stays cheap for API pods that never run an agent
+if TYPE_CHECKING:
+    from langchain.tools import BaseTool
+    from app.services.llm_streaming import WebSocketStreamHandler
+    from app.services.semantic_cache import SemanticLLMCache
+    from app.services.websocket_manager import ConnectionManager
 
 logger = logging.getLogger(__name__)
 
 class AgentRunner:
     """Service for executing different types of AI agents"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        agent_pool: Optional[AgentPool] = None,
+        llm_cache: Optional[LLMResponseCache] = None,
+        semantic_cache: Optional["SemanticLLMCache"] = None,
+        rate_limiter: Optional[LLMRateLimiter] = None,
+        connection_manager: Optional["ConnectionManager"] = None,
+        llm: Optional[Any] = None,
+        llm_provider: Optional[str] = None,
+        resilience: Optional[ResilienceRegistry] = None
+    ):
         self.agent_registry: Dict[str, Dict[str, Any]] = {}
-        self.tool_registry: Dict[str, BaseTool] = {}
-        self.llm = None
-        
+        self.tool_registry: Dict[str, "BaseTool"] = {}
+        self.llm = llm
+        self.llm_provider = llm_provider or settings.LLM_PROVIDER
+        self.llm_cache = llm_cache
+        self.semantic_cache = semantic_cache
+        self.rate_limiter = rate_limiter
+        self.connection_manager = connection_manager
+        self.resilience = resilience
+        self._warmup_task: Optional[asyncio.Task] = None
+        
+        # The pool outlives the runner, so later executions reuse its instances
+        self.agent_pool = agent_pool or get_agent_pool()
+    
     async def initialize(self):
         """Initialize the agent runner"""
         logger.info("🤖 Initializing AgentRunner")
         
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            model="gpt-4",
-            temperature=0.1,
-            streaming=True
-        )
+        # Initialize LLM from the configured provider unless one was injected
+        if self.llm is None:
+            from app.services.llm_providers import create_llm
+            
+            self.llm = create_llm(
+                self.llm_provider,
+                model=settings.LLM_MODEL,
+                temperature=settings.LLM_TEMPERATURE,
+                streaming=True,
+                options=settings.MOCK_LLM_OPTIONS if self.llm_provider == 'mock' else None
+            )
+        
+        # Share one LLM response cache so repeated and scheduled executions hit it
+        if self.llm_cache is None:
+            self.llm_cache = get_llm_cache()
+        
+        # Share one semantic cache tier for text generation, like the exact cache
+        if self.semantic_cache is None and settings.SEMANTIC_CACHE_ENABLED:
+            from app.services.semantic_cache import get_semantic_cache
+            
+            self.semantic_cache = get_semantic_cache()
+        
+        # Share one provider rate limiter across every runner in the process
+        if self.rate_limiter is None and settings.LLM_RATE_LIMIT_ENABLED:
+            self.rate_limiter = get_llm_rate_limiter()
+        
+        # Circuit breakers and bulkheads are shared process-wide, like the rate limiter
+        if self.resilience is None and settings.CIRCUIT_BREAKER_ENABLED:
+            self.resilience = get_resilience_registry()
+        
+        # One monitor closes idle instances of the shared pool
+        self.agent_pool.start_monitor()
         
         # Load built-in agents
         await self._load_builtin_agents()
@@ -40,6 +108,10 @@ class AgentRunner:
         # Load custom agents
         await self._load_custom_agents()
         
+        # Import agent modules in the background instead of on the first node run
+        if settings.AGENT_WARMUP_ENABLED:
+            self._warmup_task = asyncio.create_task(self.warmup())
+        
         logger.info(f"✅ Loaded {len(self.agent_registry)} agents")
     
     async def execute_agent(
@@ -47,7 +119,8 @@ class AgentRunner:
         agent_type: str,
         config: Dict[str, Any],
         input_data: Dict[str, Any],
-        context: Any
+        context: Any,
+        node_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Execute an agent with given configuration and input"""
         
@@ -60,52 +133,150 @@ class AgentRunner:
         logger.info(f"🏃 Executing agent: {agent_type}")
         
         try:
-            if execution_method == 'langchain':
-                return await self._execute_langchain_agent(agent_def, config, input_data, context)
-            elif execution_method == 'crewai':
-                return await self._execute_crewai_agent(agent_def, config, input_data, context)
-            elif execution_method == 'custom':
-                return await self._execute_custom_agent(agent_def, config, input_data, context)
+            if self.resilience is None:
+                return await self._dispatch_agent(agent_def, config, input_data, context, node_id)
+            
+            # Fail fast when the agent's external dependency is failing or saturated
+            if execution_method in ('langchain', 'crewai'):
+                dependency_key = f"{agent_type}@{self.llm_provider}"
             else:
-                raise ValueError(f"Unknown execution method: {execution_method}")
-                
+                dependency_key = resolve_dependency_key(agent_type, config, input_data)
+            if dependency_key is None:
+                return await self._dispatch_agent(agent_def, config, input_data, context, node_id)
+            
+            guard = self.resilience.guard(dependency_key, config.get('bulkhead_max_concurrent'), scope=node_id)
+            async with guard as outcome:
+                result = await self._dispatch_agent(agent_def, config, input_data, context, node_id)
+                # Custom agents return their errors; only those blamed on the dependency count, not bad input
+                outcome['failed'] = isinstance(result, dict) and bool(result.get('dependency_error'))
+            return result
+        
+        except DependencyUnavailableError as e:
+            logger.warning(f"Agent {agent_type} rejected: {e}")
+            raise
         except Exception as e:
             logger.error(f"Agent execution failed: {e}", exc_info=True)
             raise
     
+    async def _dispatch_agent(
+        self,
+        agent_def: Dict[str, Any],
+        config: Dict[str, Any],
+        input_data: Dict[str, Any],
+        context: Any,
+        node_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run an agent with its execution method"""
+        
+        execution_method = agent_def['execution_method']
+        
+        if execution_method == 'langchain':
+            return await self._execute_langchain_agent(agent_def, config, input_data, context, node_id)
+        elif execution_method == 'crewai':
+            return await self._execute_crewai_agent(agent_def, config, input_data, context)
+        elif execution_method == 'custom':
+            return await self._execute_custom_agent(agent_def, config, input_data, context)
+        else:
+            raise ValueError(f"Unknown execution method: {execution_method}")
+    
     async def _execute_langchain_agent(
         self,
         agent_def: Dict[str, Any],
         config: Dict[str, Any],
         input_data: Dict[str, Any],
-        context: Any
+        context: Any,
+        node_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Execute a LangChain-based agent"""
         
-        # Build agent executor
+        from langchain.agents import AgentExecutor
+        from langchain.callbacks import get_openai_callback
+        
+        # Build agent executor; definitions without an agent class call the LLM directly
         tools = self._get_tools_for_agent(agent_def, config)
         
-        agent_executor = AgentExecutor.from_agent_and_tools(
-            agent=agent_def['agent_class'](llm=self.llm),
-            tools=tools,
-            verbose=True,
-            max_iterations=config.get('max_iterations', 10),
-            max_execution_time=config.get('max_execution_time', 300)
-        )
+        agent_executor = None
+        if 'agent_class' in agent_def:
+            agent_executor = AgentExecutor.from_agent_and_tools(
+                agent=agent_def['agent_class'](llm=self.llm),
+                tools=tools,
+                verbose=True,
+                max_iterations=config.get('max_iterations', 10),
+                max_execution_time=config.get('max_execution_time', 300)
+            )
         
         # Prepare input
-        agent_input = self._prepare_agent_input(input_data, config)
+        agent_input = self._prepare_agent_input(
+            input_data, config, self._get_input_template(agent_def, config), self._get_template_syntax(agent_def, config)
+        )
+        
+        # Serve repeated or near-identical prompts from the response caches
+        cache_key = self._get_llm_cache_key(agent_input, tools, config, context)
+        semantic_namespace = self._get_semantic_cache_namespace(agent_def, tools, config, context)
+        semantic_text = self._get_semantic_cache_text(input_data, config) if semantic_namespace is not None else None
+        
+        cached, cache_info = await self._lookup_llm_cache(
+            cache_key, semantic_namespace, semantic_text, config
+        )
+        if cached is not None:
+            record_cache_metrics(
+                context, True, cached['tokens'], cached['latency'], tier=cache_info['tier']
+            )
+            return {
+                'output': cached['output'],
+                'variables': self._extract_variables_from_result(cached['output'], config),
+                'metadata': {
+                    'agent_type': 'langchain',
+                    'execution_time': datetime.utcnow().isoformat(),
+                    'llm_cache': cache_info
+                }
+            }
         
         # Execute
-        result = await agent_executor.arun(agent_input)
+        started = time.monotonic()
+        stream_handler = self._create_stream_handler(config, context, node_id)
+        callbacks = [stream_handler] if stream_handler else None
+        
+        try:
+            with get_openai_callback() as usage:
+                result = await self._call_llm(
+                    lambda: (
+                        agent_executor.arun(agent_input, callbacks=callbacks)
+                        if agent_executor is not None
+                        else self.llm.apredict(agent_input, callbacks=callbacks)
+                    ),
+                    agent_input,
+                    config,
+                    context
+                )
+        finally:
+            if stream_handler:
+                await stream_handler.aclose()
+        latency = time.monotonic() - started
+        
+        metadata = {
+            'agent_type': 'langchain',
+            'execution_time': datetime.utcnow().isoformat()
+        }
+        
+        if cache_key or semantic_namespace is not None:
+            # Streaming responses report no usage, so fall back to an estimate
+            tokens = usage.total_tokens or (len(agent_input) + len(result)) // 4
+            entry = {'output': result, 'tokens': tokens, 'latency': latency}
+            ttl = self._get_llm_cache_ttl(config, context)
+            
+            if cache_key:
+                await self.llm_cache.set(cache_key, entry, ttl=ttl)
+            if semantic_namespace is not None:
+                self.semantic_cache.store(semantic_text, semantic_namespace, entry, ttl=ttl)
+            
+            record_cache_metrics(context, False)
+            metadata['llm_cache'] = {'hit': False}
         
         return {
             'output': result,
             'variables': self._extract_variables_from_result(result, config),
-            'metadata': {
-                'agent_type': 'langchain',
-                'execution_time': datetime.utcnow().isoformat()
-            }
+            'metadata': metadata
         }
     
     async def _execute_crewai_agent(
@@ -117,6 +288,8 @@ class AgentRunner:
     ) -> Dict[str, Any]:
         """Execute a CrewAI-based agent"""
         
+        from crewai import Crew, Agent, Task
+        
         # Create agent
         agent = Agent(
             role=config.get('role', agent_def['default_role']),
@@ -141,7 +314,9 @@ class AgentRunner:
             verbose=2
         )
         
-        result = crew.kickoff()
+        result = await self._call_llm(
+            lambda: asyncio.to_thread(crew.kickoff), task.description, config, context
+        )
         
         return {
             'output': str(result),
@@ -161,18 +336,79 @@ class AgentRunner:
     ) -> Dict[str, Any]:
         """Execute a custom agent"""
         
-        # Load custom agent module
-        module = importlib.import_module(agent_def['module_path'])
-        agent_class = getattr(module, agent_def['class_name'])
-        
-        # Initialize agent
-        agent = agent_class(config=config, llm=self.llm)
-        
-        # Execute
-        result = await agent.execute(input_data, context)
+        # Reuse a pooled instance built from the same class and config
+        async with self.agent_pool.lease(
+            agent_def['module_path'],
+            agent_def['class_name'],
+            config,
+            llm=self.llm
+        ) as agent:
+            result = await agent.execute(input_data, context)
         
         return result
     
+    def _create_stream_handler(
+        self,
+        config: Dict[str, Any],
+        context: Any,
+        node_id: Optional[str]
+    ) -> Optional["WebSocketStreamHandler"]:
+        """Create a token stream handler when there is somewhere to stream to"""
+        
+        if self.connection_manager is None or node_id is None or not config.get('stream', True):
+            return None
+        
+        from app.services.llm_streaming import WebSocketStreamHandler
+        
+        return WebSocketStreamHandler(
+            self.connection_manager,
+            workflow_id=str(context.workflow_id),
+            execution_id=str(context.execution_id),
+            node_id=node_id,
+            flush_interval=settings.WS_STREAM_FLUSH_INTERVAL_MS / 1000,
+            max_chunk_chars=settings.WS_STREAM_MAX_CHUNK_CHARS,
+            send_timeout=settings.WS_SEND_TIMEOUT_SECONDS
+        )
+    
+    async def _call_llm(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        prompt: str,
+        config: Dict[str, Any],
+        context: Any
+    ) -> Any:
+        """Run an LLM call through the provider rate limiter, backing off on 429s"""
+        
+        if self.rate_limiter is None:
+            return await call()
+        
+        provider = self.llm_provider
+        model = getattr(self.llm, 'model_name', 'unknown')
+        estimated_tokens = len(prompt) // 4 + config.get('max_tokens', 1000)
+        execution_config = getattr(context, 'config', None) or {}
+        priority = config.get('priority', execution_config.get('priority', 0))
+        
+        for attempt in range(settings.MAX_RETRIES + 1):
+            queue_time = await self.rate_limiter.acquire(
+                provider, model, tokens=estimated_tokens, priority=priority
+            )
+            record_queue_metrics(context, queue_time)
+            
+            try:
+                result = await call()
+            except Exception as e:
+                headers = get_rate_limit_error_headers(e)
+                if headers is None or attempt == settings.MAX_RETRIES:
+                    raise
+                await self.rate_limiter.report_rate_limit(provider, model, headers=headers)
+                continue
+            
+            # Providers report the remaining quota on every response; the static limits are only a ceiling
+            headers = getattr(self.llm, 'response_headers', None)
+            if headers:
+                await self.rate_limiter.update_from_headers(provider, model, headers)
+            return result
+    
     def _get_tools_for_agent(self, agent_def: Dict[str, Any], config: Dict[str, Any]) -> list:
         """Get tools for an agent based on configuration"""
         
@@ -187,38 +423,172 @@ class AgentRunner:
         
         return tools
     
-    def _prepare_agent_input(self, input_data: Dict[str, Any], config: Dict[str, Any]) -> str:
-        """Prepare input string for agent execution"""
+    def _is_llm_cache_bypassed(self, config: Dict[str, Any], context: Any) -> bool:
+        """Check the node and workflow execution config for a cache bypass"""
         
-        template = config.get('input_template', '{input}')
+        execution_config = getattr(context, 'config', None) or {}
+        return bool(config.get('cache_bypass') or execution_config.get('llm_cache_bypass'))
+    
+    def _get_llm_cache_key(
+        self,
+        agent_input: str,
+        tools: list,
+        config: Dict[str, Any],
+        context: Any
+    ) -> Optional[str]:
+        """Build the response cache key, or None when caching is bypassed"""
+        
+        if self.llm_cache is None or self._is_llm_cache_bypassed(config, context):
+            return None
         
-        # Simple template substitution
-        formatted_input = template.format(**input_data)
+        return self.llm_cache.build_key(
+            model=getattr(self.llm, 'model_name', None),
+            temperature=getattr(self.llm, 'temperature', None),
+            prompt=agent_input,
+            tools=[tool.name for tool in tools]
+        )
+    
+    def _get_semantic_cache_namespace(
+        self,
+        agent_def: Dict[str, Any],
+        tools: list,
+        config: Dict[str, Any],
+        context: Any
+    ) -> Optional[int]:
+        """Get the semantic cache namespace, or None when the tier does not apply"""
+        
+        if (
+            self.semantic_cache is None
+            or not agent_def.get('semantic_cache')
+            or not config.get('semantic_cache', False)
+            or self._is_llm_cache_bypassed(config, context)
+        ):
+            return None
+        
+        return self.semantic_cache.build_namespace(
+            model=getattr(self.llm, 'model_name', None),
+            temperature=getattr(self.llm, 'temperature', None),
+            tools=[tool.name for tool in tools],
+            template=self._get_input_template(agent_def, config)
+        )
+    
+    def _get_semantic_cache_text(self, input_data: Dict[str, Any], config: Dict[str, Any]) -> str:
+        """The part of a prompt that varies between requests: its input values, without the template
+        
+        Prompts from one template share its text (system instructions and
+        the like), which would otherwise dominate the similarity; the
+        template is part of the namespace instead. `semantic_cache_fields`
+        narrows the comparison to some of the inputs.
+        """
+        
+        fields = config.get('semantic_cache_fields') or sorted(input_data)
+        values = (input_data.get(field) for field in fields)
+        return '\n'.join(
+            value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+            for value in values if value is not None
+        )
+    
+    async def _lookup_llm_cache(
+        self,
+        cache_key: Optional[str],
+        semantic_namespace: Optional[int],
+        semantic_text: Optional[str],
+        config: Dict[str, Any]
+    ) -> tuple:
+        """Look up the exact tier, then the semantic tier"""
+        
+        if cache_key:
+            cached = await self.llm_cache.get(cache_key)
+            if cached is not None:
+                return cached, self._cache_hit_info(cached, 'exact')
+        
+        if semantic_namespace is not None:
+            cached, similarity = self.semantic_cache.lookup(
+                semantic_text,
+                semantic_namespace,
+                threshold=config.get('semantic_cache_threshold')
+            )
+            if cached is not None:
+                info = self._cache_hit_info(cached, 'semantic')
+                info['similarity'] = similarity
+                return cached, info
+        
+        return None, None
+    
+    def _cache_hit_info(self, cached: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        """Describe a cache hit for node metadata"""
         
-        return formatted_input
+        return {
+            'hit': True,
+            'tier': tier,
+            'tokens_saved': cached['tokens'],
+            'latency_saved_ms': cached['latency'] * 1000
+        }
+    
+    def _get_llm_cache_ttl(self, config: Dict[str, Any], context: Any) -> Optional[int]:
+        """Resolve the cache TTL from node config, then workflow execution config"""
+        
+        if config.get('cache_ttl') is not None:
+            return config['cache_ttl']
+        
+        execution_config = getattr(context, 'config', None) or {}
+        return execution_config.get('llm_cache_ttl')
+    
+    def _get_input_template(self, agent_def: Dict[str, Any], config: Dict[str, Any]) -> str:
+        """The node's input template, or the default from the agent's config schema"""
+        
+        schema = agent_def.get('config_schema', {}).get('properties', {}).get('input_template', {})
+        return config.get('input_template', schema.get('default', '{input}'))
+    
+    def _get_template_syntax(self, agent_def: Dict[str, Any], config: Dict[str, Any]) -> str:
+        """'jinja' when the node opts in, or uses a schema default marked as Jinja; otherwise 'format'"""
+        
+        if 'template_syntax' in config:
+            return config['template_syntax']
+        if 'input_template' in config:
+            return 'format'
+        schema = agent_def.get('config_schema', {}).get('properties', {}).get('input_template', {})
+        return schema.get('template_syntax', 'format')
+    
+    def _prepare_agent_input(
+        self,
+        input_data: Dict[str, Any],
+        config: Dict[str, Any],
+        template: str,
+        syntax: str = 'format'
+    ) -> str:
+        """Prepare input string for agent execution"""
+        
+        return render_prompt(
+            template,
+            input_data,
+            max_tokens=config.get('max_prompt_tokens', settings.PROMPT_MAX_TOKENS),
+            strict=config.get('strict_template', False),
+            syntax=syntax
+        )
     
     def _prepare_task_description(self, input_data: Dict[str, Any], config: Dict[str, Any]) -> str:
         """Prepare task description for CrewAI agents"""
         
         template = config.get('task_template', 'Process the following input: {input}')
         
-        return template.format(**input_data)
+        return render_prompt(
+            template,
+            input_data,
+            max_tokens=config.get('max_prompt_tokens', settings.PROMPT_MAX_TOKENS),
+            strict=config.get('strict_template', False),
+            syntax=config.get('template_syntax', 'format')
+        )
     
     def _extract_variables_from_result(self, result: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract variables from agent result"""
         
-        # Simple extraction based on configuration
-        variable_patterns = config.get('variable_extraction', {})
-        variables = {}
+        variable_patterns = config.get('variable_extraction')
+        if not variable_patterns:
+            return {}
         
-        for var_name, pattern in variable_patterns.items():
-            # Simple regex extraction (could be more sophisticated)
-            import re
-            match = re.search(pattern, result)
-            if match:
-                variables[var_name] = match.group(1) if match.groups() else match.group(0)
-        
-        return variables
+        # Patterns are compiled once per distinct extraction config
+        return get_variable_extractor(variable_patterns).extract(result)
     
     async def _load_builtin_agents(self):
         """Load built-in agent definitions"""
@@ -229,6 +599,7 @@ class AgentRunner:
             'description': 'Generates text using large language models',
             'execution_method': 'langchain',
             'category': 'llm',
+            'semantic_cache': True,
             'input_schema': {
                 'type': 'object',
                 'properties': {
@@ -248,7 +619,12 @@ class AgentRunner:
                 'properties': {
                     'temperature': {'type': 'number', 'default': 0.7},
                     'max_tokens': {'type': 'integer', 'default': 1000},
-                    'input_template': {'type': 'string', 'default': '{prompt}'}
+                    'input_template': {'type': 'string', 'default': '{{ prompt }}', 'template_syntax': 'jinja'},
+                    'template_syntax': {'type': 'string', 'enum': ['format', 'jinja']},
+                    'max_prompt_tokens': {'type': 'integer', 'default': 6000},
+                    'semantic_cache': {'type': 'boolean', 'default': False},
+                    'semantic_cache_fields': {'type': 'array', 'items': {'type': 'string'}},
+                    'semantic_cache_threshold': {'type': 'number', 'default': 0.95}
                 }
             }
         }
@@ -353,7 +729,11 @@ class AgentRunner:
             'config_schema': {
                 'type': 'object',
                 'properties': {
-                    'max_file_size': {'type': 'integer', 'default': 10485760}
+                    'max_file_size': {'type': 'integer', 'default': 10485760},
+                    'chunk_size': {'type': 'integer', 'default': 1048576},
+                    'include_raw_content': {'type': 'boolean', 'default': True},
+                    'use_index': {'type': 'boolean', 'default': False},
+                    'index_path': {'type': 'string', 'default': './data/content_index.db'}
                 }
             }
         }
@@ -434,6 +814,17 @@ class AgentRunner:
             }
         }
     
+    async def warmup(self):
+        """Import LLM frameworks and agent modules ahead of first use"""
+        
+        try:
+            await asyncio.to_thread(importlib.import_module, 'langchain.agents')
+            await asyncio.to_thread(importlib.import_module, 'crewai')
+            await warmup_agents()
+            logger.info("🔥 AgentRunner warmup complete")
+        except Exception as e:
+            logger.warning(f"AgentRunner warmup failed: {e}")
+    
     async def _load_custom_agents(self):
         """Load custom agent definitions from agent registry"""
         
@@ -445,8 +836,11 @@ class AgentRunner:
         """Cleanup agent runner resources"""
         logger.info("🧹 Cleaning up AgentRunner")
         
-        # Cleanup any persistent connections or resources
-        pass
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        
+        # Pooled agents are kept for later executions; only idle ones are closed
+        await self.agent_pool.evict_idle()
 
 
 
@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Errors in the caller's own input, such as a bad prompt template; they say nothing about the dependency
+INPUT_ERRORS = (ValueError, TypeError)
+
+class DependencyUnavailableError(RuntimeError):
+    """Raised when a call is rejected to protect a failing or saturated dependency"""
+    
+    def __init__(self, message: str, key: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.key = key
+        self.retry_after = retry_after
+
+class CircuitOpenError(DependencyUnavailableError):
+    """Raised when the circuit for a dependency is open"""
+    pass
+
+class BulkheadFullError(DependencyUnavailableError):
+    """Raised when a dependency already has its maximum concurrent calls"""
+    pass
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing
+    
+    closed: calls pass, failures are counted. After `failure_threshold`
+    consecutive failures the circuit opens and calls are rejected for
+    `recovery_timeout` seconds. It then goes half-open and lets up to
+    `half_open_max_calls` probes through; a successful probe closes it,
+    a failed one opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(
+        self,
+        key: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected = 0
+    
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit open for {self.key}, retry in {remaining:.1f}s", self.key, remaining
+                )
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+            logger.info(f"Circuit half-open for {self.key}")
+        
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit half-open for {self.key}, probe in progress", self.key, self.recovery_timeout
+                )
+            self.half_open_calls += 1
+    
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit closed for {self.key}")
+        self.state = self.CLOSED
+        self.failures = 0
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened for {self.key} after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class Bulkhead:
+    """Caps concurrent calls to one dependency, rejecting once the wait runs out"""
+    
+    def __init__(self, key: str, max_concurrent: int = 10, max_wait: float = 0.0):
+        self.key = key
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.active = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+    
+    @asynccontextmanager
+    async def acquire(self):
+        try:
+            if self.max_wait > 0:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            elif self._semaphore.locked():
+                raise asyncio.TimeoutError()
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(
+                f"Bulkhead full for {self.key} ({self.max_concurrent} concurrent calls)", self.key
+            )
+        
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+class ResilienceRegistry:
+    """Circuit breaker and bulkhead per dependency key"""
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        slow_call_threshold: Optional[float] = None,
+        max_concurrent: int = 10,
+        max_wait: float = 0.0
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.slow_call_threshold = slow_call_threshold
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.bulkheads: Dict[str, Bulkhead] = {}
+        # Per-node caps live only while calls hold them, so finished nodes do not pile up
+        self._node_caps: "weakref.WeakValueDictionary[Tuple[str, Any, int], Bulkhead]" = weakref.WeakValueDictionary()
+    
+    def get_breaker(self, key: str) -> CircuitBreaker:
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                key, self.failure_threshold, self.recovery_timeout, self.half_open_max_calls
+            )
+        return breaker
+    
+    def get_bulkhead(self, key: str) -> Bulkhead:
+        bulkhead = self.bulkheads.get(key)
+        if bulkhead is None:
+            bulkhead = self.bulkheads[key] = Bulkhead(key, self.max_concurrent, self.max_wait)
+        return bulkhead
+    
+    def _get_node_cap(self, key: str, scope: Any, limit: int) -> Bulkhead:
+        cap = self._node_caps.get((key, scope, limit))
+        if cap is None:
+            cap = self._node_caps[(key, scope, limit)] = Bulkhead(key, limit, self.max_wait)
+        return cap
+    
+    @asynccontextmanager
+    async def guard(self, key: str, max_concurrent: Optional[int] = None, scope: Any = None):
+        """Run a call under the key's circuit breaker and bulkhead
+        
+        The body reports a failure of the dependency that was returned
+        rather than raised by setting `outcome['failed'] = True`; exceptions
+        and calls slower than the slow-call threshold also count as failures,
+        except INPUT_ERRORS, which are the caller's.
+        
+        Every call for a key shares one bulkhead, so the key's limit bounds
+        the total concurrency to the dependency. `max_concurrent` caps the
+        calls of one `scope` (a node) further, within that limit; a cap
+        above the limit is rejected rather than raising it.
+        """
+        
+        bulkhead = self.get_bulkhead(key)
+        cap = None
+        if max_concurrent is not None:
+            if max_concurrent > bulkhead.max_concurrent:
+                raise ValueError(
+                    f"bulkhead_max_concurrent {max_concurrent} exceeds the limit of "
+                    f"{bulkhead.max_concurrent} concurrent calls for {key}"
+                )
+            if max_concurrent < bulkhead.max_concurrent:
+                cap = self._get_node_cap(key, scope, max_concurrent)
+        
+        breaker = self.get_breaker(key)
+        breaker.before_call()
+        
+        outcome = {'failed': False}
+        try:
+            async with AsyncExitStack() as stack:
+                if cap is not None:
+                    try:
+                        await stack.enter_async_context(cap.acquire())
+                    except BulkheadFullError:
+                        bulkhead.rejected += 1
+                        raise
+                await stack.enter_async_context(bulkhead.acquire())
+                started = time.monotonic()
+                yield outcome
+                elapsed = time.monotonic() - started
+        except (BulkheadFullError, asyncio.CancelledError, *INPUT_ERRORS):
+            # Saturation, cancellation and bad input say nothing about the dependency; give back a probe slot
+            if breaker.state == CircuitBreaker.HALF_OPEN:
+                breaker.half_open_calls -= 1
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        
+        if outcome['failed'] or (self.slow_call_threshold and elapsed > self.slow_call_threshold):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            key: {
+                'state': breaker.state,
+                'failures': breaker.failures,
+                'rejected': breaker.rejected,
+                'active': 0,
+                'bulkhead_rejected': 0
+            }
+            for key, breaker in self.breakers.items()
+        }
+        for key, bulkhead in self.bulkheads.items():
+            if key in stats:
+                stats[key]['active'] = bulkhead.active
+                stats[key]['bulkhead_rejected'] = bulkhead.rejected
+        return stats
+
+def _describe_url(url: str) -> Optional[str]:
+    """Reduce a URL or DSN to scheme://host:port/path without credentials"""
+    
+    parsed = urlparse(url)
+    if not parsed.scheme:
+        return None
+    
+    # File-backed databases such as sqlite are identified by their path
+    if not parsed.hostname:
+        return f"{parsed.scheme}://{parsed.path}"
+    
+    host = f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+    database = parsed.path.strip('/').split('/')[0]
+    return f"{parsed.scheme}://{host}/{database}"
+
+def resolve_dependency_key(agent_type: str, config: Dict[str, Any], input_data: Dict[str, Any]) -> Optional[str]:
+    """Key a call by agent type and the host or DSN it talks to
+    
+    Returns None for calls without an external host or DSN, such as
+    data_processor or file_handler; there is nothing to protect, and a
+    key by agent type alone would make every workflow share one bulkhead.
+    """
+    
+    target = None
+    url = input_data.get('url') or config.get('url') or config.get('base_url')
+    
+    if isinstance(url, str) and url:
+        parsed = urlparse(url)
+        target = parsed.hostname and (f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname)
+    elif config.get('connection_string'):
+        target = _describe_url(config['connection_string'])
+    elif config.get('db_type'):
+        target = f"{config['db_type']}://{config.get('host', 'localhost')}:{config.get('port', '')}/{config.get('database', '')}"
+    elif config.get('smtp_server'):
+        target = f"{config['smtp_server']}:{config.get('smtp_port', 587)}"
+    
+    return f"{agent_type}@{target}" if target else None
+
+_registry: Optional[ResilienceRegistry] = None
+
+def get_resilience_registry() -> ResilienceRegistry:
+    """Get the process-wide circuit breaker and bulkhead registry"""
+    
+    global _registry
+    if _registry is None:
+        from app.core.config import settings
+        
+        _registry = ResilienceRegistry(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_SECONDS,
+            half_open_max_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS,
+            slow_call_threshold=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+            max_concurrent=settings.BULKHEAD_MAX_CONCURRENT,
+            max_wait=settings.BULKHEAD_MAX_WAIT_SECONDS
+        )
+    return _registry
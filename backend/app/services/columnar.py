@@ -0,0 +1,161 @@
+import sys
+from collections.abc import Sequence
+from typing import Dict, Any, Iterator, List, Optional, Union, TYPE_CHECKING
+
+# Polars is imported where it is first used so that serializing messages
+# does not pull it into processes that never build a table
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+
+class ColumnarTable(Sequence):
+    """Immutable table held in Arrow columnar memory, passed between nodes as is
+    
+    Agents that understand tables read the underlying frame directly, without
+    building a Python object per cell. Everything else sees a read-only
+    sequence of row dicts: `table[0]` is a row, `table['col']` a column and
+    iteration yields rows, so `$node.output.data[0].id` references and
+    templates keep working. Rows are only materialized on first such use, and
+    tables become JSON records at the API and WebSocket boundaries.
+    """
+    
+    def __init__(self, frame: "pl.DataFrame"):
+        self._frame = frame
+        self._records: Optional[List[Dict[str, Any]]] = None
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarTable":
+        import polars as pl
+        
+        return cls(pl.from_dicts(records, infer_schema_length=None) if records else pl.DataFrame())
+    
+    @classmethod
+    def from_rows(cls, rows: List[Any], columns: List[str]) -> "ColumnarTable":
+        """Build a table from row tuples, e.g. a database cursor result"""
+        import polars as pl
+        
+        return cls(pl.DataFrame(
+            [list(row) for row in rows] if rows else None,
+            schema=list(columns),
+            orient='row',
+            infer_schema_length=None
+        ))
+    
+    @classmethod
+    def from_csv(cls, source: Union[str, bytes], **options: Any) -> "ColumnarTable":
+        """Parse CSV text straight into columns with typed values"""
+        import polars as pl
+        
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        return cls(pl.read_csv(source, **options))
+    
+    @classmethod
+    def from_pandas(cls, df: "pd.DataFrame") -> "ColumnarTable":
+        import polars as pl
+        
+        # Column by column through NumPy, so pyarrow is not needed
+        return cls(pl.DataFrame({
+            str(name): pl.Series(str(name), column.to_numpy(), nan_to_null=True)
+            if column.dtype.kind in 'iufb' else column.tolist()
+            for name, column in df.items()
+        }))
+    
+    @classmethod
+    def from_ipc(cls, payload: bytes) -> "ColumnarTable":
+        """Read a table written with to_ipc"""
+        import polars as pl
+        
+        return cls(pl.read_ipc_stream(payload))
+    
+    @property
+    def frame(self) -> "pl.DataFrame":
+        """The underlying Polars frame; no copy is made"""
+        return self._frame
+    
+    @property
+    def columns(self) -> List[str]:
+        return self._frame.columns
+    
+    @property
+    def num_rows(self) -> int:
+        return self._frame.height
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the column buffers"""
+        return self._frame.estimated_size()
+    
+    def __len__(self) -> int:
+        return self._frame.height
+    
+    def __getitem__(self, key: Union[int, slice, str]) -> Any:
+        if isinstance(key, str):
+            if key not in self._frame.columns:
+                raise KeyError(key)
+            return self._frame.get_column(key).to_list()
+        return self.to_records()[key]
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ColumnarTable):
+            return self._frame.equals(other._frame)
+        if isinstance(other, list):
+            return self.to_records() == other
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"ColumnarTable(rows={self.num_rows}, columns={self.columns})"
+    
+    def __str__(self) -> str:
+        # Reads like the list of records it replaces, e.g. in prompts
+        return str(self.to_records())
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Rows as dicts, built once and cached"""
+        
+        if self._records is None:
+            self._records = self._frame.to_dicts()
+        return self._records
+    
+    def to_pandas(self) -> "pd.DataFrame":
+        import pandas as pd
+        
+        # Polars' own conversion, so pyarrow is not needed here either
+        return pd.DataFrame({
+            name: self._frame.get_column(name).to_numpy(use_pyarrow=False) for name in self._frame.columns
+        })
+    
+    def to_arrow(self):
+        """Arrow table; needs pyarrow"""
+        return self._frame.to_arrow()
+    
+    def to_ipc(self) -> bytes:
+        """Serialize as an Arrow IPC stream for transfer between processes"""
+        return self._frame.write_ipc_stream(None).getvalue()
+    
+    def to_csv(self) -> str:
+        return self._frame.write_csv()
+    
+    def to_json(self) -> str:
+        return self._frame.write_json(row_oriented=True)
+
+def _is_file_stream(value: Any) -> bool:
+    # A stream only exists once file_streams is loaded, so checking never imports it (and aiofiles)
+    module = sys.modules.get('app.services.file_streams')
+    return module is not None and isinstance(value, module.FileStream)
+
+def to_jsonable(value: Any) -> Any:
+    """Replace tables in a nested structure with their records, and file streams with their description"""
+    
+    if isinstance(value, ColumnarTable):
+        return value.to_records()
+    if _is_file_stream(value):
+        return value.describe()
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    return value
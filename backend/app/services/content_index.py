@@ -0,0 +1,155 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "./data/content_index.db"
+
+# Trigram queries need at least this many characters; shorter ones are checked against the stored text
+MIN_TRIGRAM_CHARS = 3
+
+# Changed files read before their rows are written
+WRITE_BATCH = 500
+
+class ContentIndex:
+    """Persistent full-text index of file contents in SQLite FTS5
+    
+    Files are tokenized into trigrams, so a query matches any substring of
+    three or more characters, case-insensitively, like the substring test
+    content search has always made. Each file is stored with the size and
+    modification time it was indexed at; `refresh` only reads files whose
+    size or mtime changed since, so searching a directory again costs a
+    stat per file (already made by the directory scan) and an index lookup
+    instead of reading every file. Paths are stored absolute, so one index
+    serves any working directory.
+    """
+    
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER NOT NULL, "
+            "modified TEXT NOT NULL, readable INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='trigram')")
+        self._conn.commit()
+        self._lock = threading.Lock()
+    
+    def refresh(self, directory: str, files: List[Dict[str, Any]], complete: bool = False) -> Dict[str, int]:
+        """Bring the index up to date for files under directory (dicts with path, size and modified)
+        
+        With `complete`, files is every file under directory, and indexed
+        files under it that are not in files are dropped as deleted.
+        Returns how many files were indexed, unchanged and removed.
+        """
+        
+        files = [{**info, 'path': os.path.abspath(info['path'])} for info in files]
+        with self._lock:
+            # One range scan of the path index rather than a lookup per file
+            known = {
+                path: (file_id, size, modified) for file_id, path, size, modified in self._conn.execute(
+                    "SELECT id, path, size, modified FROM files WHERE path >= ? AND path < ?",
+                    _prefix_range(_directory_prefix(directory))
+                )
+            }
+            changed = [
+                info for info in files
+                if known.get(info['path'], (None, None, None))[1:] != (info['size'], info['modified'])
+            ]
+            
+            rows = []
+            for info in changed:
+                try:
+                    with open(info['path'], 'r', encoding='utf-8') as f:
+                        body = f.read()
+                except (OSError, UnicodeDecodeError):
+                    # Never matches, as an unreadable file never did; retried once it changes
+                    body = None
+                rows.append((info, body))
+                if len(rows) >= WRITE_BATCH:
+                    self._write(rows, known)
+                    rows = []
+            if rows:
+                self._write(rows, known)
+            
+            deleted = []
+            if complete:
+                present = {info['path'] for info in files}
+                deleted = [(file_id,) for path, (file_id, _, _) in known.items() if path not in present]
+                self._conn.executemany("DELETE FROM content WHERE rowid = ?", deleted)
+                self._conn.executemany("DELETE FROM files WHERE id = ?", deleted)
+            self._conn.commit()
+        
+        return {'indexed': len(changed), 'unchanged': len(files) - len(changed), 'removed': len(deleted)}
+    
+    def _write(self, rows: List[Tuple[Dict[str, Any], Optional[str]]], known: Dict[str, Tuple[int, int, str]]):
+        stale = [(known[info['path']][0],) for info, _ in rows if info['path'] in known]
+        self._conn.executemany("DELETE FROM content WHERE rowid = ?", stale)
+        self._conn.executemany("DELETE FROM files WHERE id = ?", stale)
+        for info, body in rows:
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, size, modified, readable) VALUES (?, ?, ?, ?)",
+                (info['path'], info['size'], info['modified'], body is not None)
+            )
+            if body is not None:
+                self._conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body))
+    
+    def search(self, text: str, directory: str) -> Set[str]:
+        """Absolute paths of files under directory whose content contains text, ignoring case"""
+        
+        prefix = _directory_prefix(directory)
+        with self._lock:
+            if len(text) >= MIN_TRIGRAM_CHARS:
+                phrase = '"' + text.replace('"', '""') + '"'
+                return {
+                    path for (path,) in self._conn.execute(
+                        "SELECT files.path FROM content JOIN files ON files.id = content.rowid "
+                        "WHERE content MATCH ? AND files.path >= ? AND files.path < ?",
+                        (phrase, *_prefix_range(prefix))
+                    )
+                }
+            
+            # Too short for trigrams: test the stored text, which still spares reading the files
+            needle = text.lower()
+            return {
+                path for path, body in self._conn.execute(
+                    "SELECT files.path, content.body FROM files JOIN content ON content.rowid = files.id "
+                    "WHERE files.path >= ? AND files.path < ?",
+                    _prefix_range(prefix)
+                ) if needle in body.lower()
+            }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _directory_prefix(directory: str) -> str:
+    return os.path.join(os.path.abspath(directory), '')
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    # Every string starting with prefix sorts in [prefix, prefix + U+10FFFF)
+    return prefix, prefix + '\U0010ffff'
+
+_indexes: Dict[str, ContentIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_content_index(path: str = DEFAULT_INDEX_PATH) -> ContentIndex:
+    """The process-wide index stored at path, opened on first use"""
+    
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ContentIndex(path)
+            logger.info(f"Opened content index at {path}")
+        return index
@@ -0,0 +1,209 @@
+import asyncio
+import fnmatch
+import mimetypes
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_SCAN_WORKERS = 8
+
+# Directories queued per worker; more would only hold futures, not add throughput
+QUEUED_PER_WORKER = 2
+
+@lru_cache(maxsize=1024)
+def _guess_mime_type(suffixes: str) -> Optional[str]:
+    return mimetypes.guess_type('x' + suffixes)[0]
+
+def mime_type(name: str) -> Optional[str]:
+    """mimetypes.guess_type for a file name, cached by its last two suffixes
+    
+    The guess only looks at those (as in .tar.gz), and trees hold far fewer
+    suffixes than files.
+    """
+    
+    base, last = os.path.splitext(name)
+    return _guess_mime_type(os.path.splitext(base)[1] + last) if last else None
+
+def entry_info(entry: os.DirEntry, stat: os.stat_result) -> Dict[str, Any]:
+    """File information in the shape of FileHandlerAgent._get_file_info"""
+    
+    return {
+        'path': entry.path,
+        'name': entry.name,
+        'size': stat.st_size,
+        'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        'is_file': True,
+        'is_directory': False,
+        'mime_type': mime_type(entry.name)
+    }
+
+class DirectoryScanner:
+    """Walks a directory tree with os.scandir on a thread pool
+    
+    Each directory is one task; subdirectories found in it are queued as
+    further tasks, so separate subtrees are listed in parallel (scandir
+    releases the GIL while it waits on the file system). File types come
+    from the directory listing itself, and a file is only stat'ed, once,
+    after its name passes the pattern and extension filters.
+    
+    Results come in batches as directories finish, in no particular order.
+    Scanning stops as soon as `max_results` files are found or the consumer
+    stops iterating. Like os.walk, symlinked directories are listed but not
+    descended into, and unreadable directories are skipped.
+    """
+    
+    def __init__(
+        self,
+        root: str,
+        recursive: bool = True,
+        pattern: str = '*',
+        include_hidden: bool = False,
+        extensions: Optional[Iterable[str]] = None,
+        min_size: float = 0,
+        max_size: float = float('inf'),
+        max_results: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        include_directories: bool = False,
+        workers: int = DEFAULT_SCAN_WORKERS
+    ):
+        self.root = root
+        self.recursive = recursive
+        self.pattern = pattern
+        self.include_hidden = include_hidden
+        self.extensions = {extension.lower() for extension in extensions} if extensions else None
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_results = max_results
+        self.max_depth = max_depth
+        self.include_directories = include_directories
+        self.workers = max(1, workers)
+        self.errors = 0
+        self.truncated = False
+        self._match = None if pattern == '*' else re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        self._stopped = threading.Event()
+    
+    def _scan_directory(self, path: str, depth: int) -> Tuple[List[Dict[str, Any]], List[str], int]:
+        """Matching entries of one directory, the subdirectories to scan next and the errors met"""
+        
+        results, subdirectories, errors = [], [], 0
+        descend = self.recursive and (self.max_depth is None or depth < self.max_depth)
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self._stopped.is_set():
+                        break
+                    if not self.include_hidden and entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_file():
+                            info = self._file_info(entry)
+                            if info is not None:
+                                results.append(info)
+                        elif entry.is_dir():
+                            if self.include_directories:
+                                results.append({
+                                    'path': entry.path, 'name': entry.name, 'is_file': False, 'is_directory': True
+                                })
+                            if descend and not entry.is_symlink():
+                                subdirectories.append(entry.path)
+                    except OSError:
+                        # Removed while scanning, or a broken link
+                        errors += 1
+        except OSError:
+            errors += 1
+        return results, subdirectories, errors
+    
+    def _file_info(self, entry: os.DirEntry) -> Optional[Dict[str, Any]]:
+        if self._match is not None and not self._match(os.path.normcase(entry.name)):
+            return None
+        if self.extensions is not None and os.path.splitext(entry.name)[1].lower() not in self.extensions:
+            return None
+        # Cached on the entry; follows symlinks like os.stat
+        stat = entry.stat()
+        if stat.st_size < self.min_size or stat.st_size > self.max_size:
+            return None
+        return entry_info(entry, stat)
+    
+    def iter_batches(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield matching entries a directory's worth at a time; closing the iterator stops the scan"""
+        
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"Directory not found: {self.root}")
+        
+        self._stopped.clear()
+        found = 0
+        pending = deque([(self.root, 0)])
+        running: Dict[Any, int] = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan')
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers * QUEUED_PER_WORKER:
+                    path, depth = pending.popleft()
+                    running[pool.submit(self._scan_directory, path, depth)] = depth
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth = running.pop(future)
+                    results, subdirectories, errors = future.result()
+                    self.errors += errors
+                    pending.extend((path, depth + 1) for path in subdirectories)
+                    if not results:
+                        continue
+                    
+                    if self.max_results is not None and found + len(results) >= self.max_results:
+                        self.truncated = found + len(results) > self.max_results or bool(pending or running)
+                        yield results[:self.max_results - found]
+                        return
+                    found += len(results)
+                    yield results
+        finally:
+            # Directories being listed stop at their next entry; queued ones never start
+            self._stopped.set()
+            for future in running:
+                future.cancel()
+            pool.shutdown(wait=True)
+    
+    def scan(self) -> List[Dict[str, Any]]:
+        return [info for batch in self.iter_batches() for info in batch]
+    
+    async def stream(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """iter_batches off the event loop; batches are delivered as directories finish"""
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+        
+        def produce():
+            batches = self.iter_batches()
+            try:
+                for batch in batches:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, batch)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                batches.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # The consumer stopped early: end the scan and wait for its threads
+            cancelled.set()
+            self._stopped.set()
+            await producer
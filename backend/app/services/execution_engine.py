@@ -5,8 +5,10 @@ from typing import Dict, List, Any, Optional
 import uuid
 from dataclasses import dataclass
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.agent_runner import AgentRunner
+from app.services.expressions import CompiledInputMapping, compile_input_mapping
 from app.services.websocket_manager import ConnectionManager
 
 logger = logging.getLogger(__name__)
@@ -22,17 +24,23 @@ class ExecutionContext:
     started_at: datetime
     current_step: int = 0
     logs: List[Dict[str, Any]] = None
+    config: Dict[str, Any] = None
+    metrics: Dict[str, Any] = None
     
     def __post_init__(self):
         if self.logs is None:
             self.logs = []
+        if self.config is None:
+            self.config = {}
+        if self.metrics is None:
+            self.metrics = {}
 
 class ExecutionEngine:
     """Core execution engine for AgentFlow workflows"""
     
     def __init__(self, connection_manager: Optional[ConnectionManager] = None):
         self.running_executions: Dict[uuid.UUID, ExecutionContext] = {}
-        self.agent_runner = AgentRunner()
+        self.agent_runner = AgentRunner(connection_manager=connection_manager)
         self.connection_manager = connection_manager
         self._shutdown_event = asyncio.Event()
         
@@ -61,7 +69,8 @@ class ExecutionEngine:
         workflow_data: Dict[str, Any],
         input_data: Dict[str, Any],
         user_id: uuid.UUID,
-        workflow_id: uuid.UUID
+        workflow_id: uuid.UUID,
+        execution_config: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Execute a complete workflow"""
         
@@ -71,7 +80,8 @@ class ExecutionEngine:
             user_id=user_id,
             input_data=input_data,
             variables=input_data.copy(),
-            started_at=datetime.utcnow()
+            started_at=datetime.utcnow(),
+            config=execution_config or {}
         )
         
         self.running_executions[execution_id] = context
@@ -82,7 +92,11 @@ class ExecutionEngine:
             edges = workflow_data.get('edges', [])
             
             # Build execution graph
-            execution_graph = self._build_execution_graph(nodes, edges)
+            fuse_data_processors = context.config.get('fuse_data_processors')
+            if fuse_data_processors is None:
+                fuse_data_processors = settings.DATA_PROCESSOR_FUSION_ENABLED
+            
+            execution_graph = self._build_execution_graph(nodes, edges, fuse_data_processors)
             
             # Execute workflow steps
             result = await self._execute_graph(context, execution_graph)
@@ -99,14 +113,30 @@ class ExecutionEngine:
             if execution_id in self.running_executions:
                 del self.running_executions[execution_id]
     
-    def _build_execution_graph(self, nodes: List[Dict], edges: List[Dict]) -> Dict[str, Any]:
+    def _build_execution_graph(
+        self,
+        nodes: List[Dict],
+        edges: List[Dict],
+        fuse_data_processors: bool = False
+    ) -> Dict[str, Any]:
         """Build execution graph from workflow nodes and edges"""
         
         # Create node lookup
         node_map = {node['id']: node for node in nodes}
         
         # Build adjacency list for execution order
-        graph = {node['id']: {'node': node, 'dependencies': [], 'dependents': []} for node in nodes}
+        graph = {
+            node['id']: {
+                'node': node,
+                'dependencies': [],
+                'dependents': [],
+                # Compile input mapping references once per plan
+                'input_mapping': compile_input_mapping(
+                    node.get('data', {}).get('config', {}).get('inputMapping')
+                )
+            }
+            for node in nodes
+        }
         
         for edge in edges:
             source_id = edge['source']
@@ -119,12 +149,90 @@ class ExecutionEngine:
         # Find entry points (nodes with no dependencies)
         entry_points = [node_id for node_id, data in graph.items() if not data['dependencies']]
         
+        if fuse_data_processors:
+            self._fuse_data_processor_chains(graph)
+        
         return {
             'graph': graph,
             'entry_points': entry_points,
             'nodes': node_map
         }
     
+    def _fuse_data_processor_chains(self, graph: Dict[str, Any]):
+        """Mark straight chains of data_processor nodes to run over one frame
+        
+        A node joins its predecessor's chain when it is that node's only
+        dependent, takes `data` straight from `$<predecessor>.output.data`
+        and has static operation and parameters using the same engine. The
+        chain head gets `fused_chain` and `fused_stages`; the other nodes
+        get `fused_into`.
+        
+        Fusion is opt-in, per execution with `fuse_data_processors` or with
+        DATA_PROCESSOR_FUSION_ENABLED: the results of the nodes before the
+        last one in a chain report their operation and metadata, not data.
+        """
+        
+        # Who references each node, so intermediate outputs nobody else reads
+        referenced_by: Dict[str, set] = {}
+        for node_id, entry in graph.items():
+            if entry['input_mapping'] is not None:
+                for _, reference in entry['input_mapping'].references:
+                    referenced_by.setdefault(reference.path[0], set()).add(node_id)
+        
+        def stage_spec(node_id: str) -> Optional[Dict[str, Any]]:
+            entry = graph[node_id]
+            node_data = entry['node'].get('data', {})
+            mapping = entry['input_mapping']
+            if node_data.get('agentType') != 'data_processor' or mapping is None:
+                return None
+            
+            parameters = mapping.static.get('parameters', {})
+            if 'operation' not in mapping.static or not isinstance(parameters, dict):
+                return None
+            return {
+                'node_id': node_id,
+                'operation': mapping.static['operation'],
+                'parameters': parameters,
+                'engine': parameters.get('engine', node_data.get('config', {}).get('engine', 'pandas'))
+            }
+        
+        def can_fuse(source_id: str, target_id: str) -> bool:
+            source, target = stage_spec(source_id), stage_spec(target_id)
+            if source is None or target is None:
+                return False
+            if graph[source_id]['dependents'] != [target_id] or graph[target_id]['dependencies'] != [source_id]:
+                return False
+            if referenced_by.get(source_id, set()) != {target_id}:
+                return False
+            if source['engine'] != target['engine'] or source['parameters'].get('output_format', 'records') not in ('records', 'table'):
+                return False
+            
+            references = graph[target_id]['input_mapping'].references
+            return (
+                len(references) == 1
+                and references[0][0] == 'data'
+                and references[0][1].path == [source_id, 'output', 'data']
+                and references[0][1].cast is None
+            )
+        
+        for node_id, entry in graph.items():
+            if 'fused_into' in entry or any(can_fuse(dep, node_id) for dep in entry['dependencies']):
+                continue
+            
+            chain = [node_id]
+            while len(graph[chain[-1]]['dependents']) == 1 and can_fuse(chain[-1], graph[chain[-1]]['dependents'][0]):
+                chain.append(graph[chain[-1]]['dependents'][0])
+            
+            if len(chain) > 1:
+                entry['fused_chain'] = chain
+                entry['fused_stages'] = [
+                    {key: value for key, value in stage_spec(fused_id).items() if key != 'engine'}
+                    for fused_id in chain[1:]
+                ]
+                for fused_id in chain[1:]:
+                    graph[fused_id]['fused_into'] = node_id
+                logger.info(f"🔗 Fusing data_processor chain: {' → '.join(chain)}")
+    
     async def _execute_graph(self, context: ExecutionContext, execution_graph: Dict) -> Dict[str, Any]:
         """Execute the workflow graph"""
         
@@ -142,23 +250,44 @@ class ExecutionEngine:
             ready_nodes.clear()
             
             for node_id in current_batch:
-                task = asyncio.create_task(
-                    self._execute_node(context, graph[node_id]['node'], node_results)
-                )
+                if 'fused_chain' in graph[node_id]:
+                    task = asyncio.create_task(
+                        self._execute_fused_chain(
+                            context,
+                            [graph[fused_id]['node'] for fused_id in graph[node_id]['fused_chain']],
+                            graph[node_id]['fused_stages'],
+                            node_results,
+                            graph[node_id]['input_mapping']
+                        )
+                    )
+                else:
+                    task = asyncio.create_task(
+                        self._execute_node(
+                            context,
+                            graph[node_id]['node'],
+                            node_results,
+                            graph[node_id]['input_mapping']
+                        )
+                    )
                 tasks.append((node_id, task))
             
             # Wait for batch completion
             for node_id, task in tasks:
                 try:
                     result = await task
-                    node_results[node_id] = result
-                    completed_nodes.add(node_id)
                     
-                    # Emit progress update
-                    await self._emit_progress_update(context, node_id, "completed", result)
+                    # A fused chain completes all of its nodes at once
+                    chain = graph[node_id].get('fused_chain', [node_id])
+                    results = result if len(chain) > 1 else {node_id: result}
+                    for finished_id in chain:
+                        node_results[finished_id] = results[finished_id]
+                        completed_nodes.add(finished_id)
+                        
+                        # Emit progress update
+                        await self._emit_progress_update(context, finished_id, "completed", results[finished_id])
                     
                     # Check if dependents are ready
-                    for dependent_id in graph[node_id]['dependents']:
+                    for dependent_id in graph[chain[-1]]['dependents']:
                         if dependent_id not in completed_nodes:
                             dependencies = graph[dependent_id]['dependencies']
                             if all(dep in completed_nodes for dep in dependencies):
@@ -172,14 +301,16 @@ class ExecutionEngine:
         return {
             'status': 'completed',
             'results': node_results,
-            'execution_time': (datetime.utcnow() - context.started_at).total_seconds()
+            'execution_time': (datetime.utcnow() - context.started_at).total_seconds(),
+            'metrics': context.metrics
         }
     
     async def _execute_node(
         self, 
         context: ExecutionContext, 
         node: Dict[str, Any], 
-        previous_results: Dict[str, Any]
+        previous_results: Dict[str, Any],
+        input_mapping: Optional[CompiledInputMapping] = None
     ) -> Dict[str, Any]:
         """Execute a single agent node"""
         
@@ -191,7 +322,7 @@ class ExecutionEngine:
         await self._emit_progress_update(context, node_id, "started")
         
         # Prepare input data from previous nodes and context variables
-        input_data = self._prepare_node_input(node, previous_results, context.variables)
+        input_data = self._prepare_node_input(node, previous_results, context.variables, input_mapping)
         
         # Execute the agent
         start_time = datetime.utcnow()
@@ -201,7 +332,8 @@ class ExecutionEngine:
                 agent_type=agent_type,
                 config=agent_config,
                 input_data=input_data,
-                context=context
+                context=context,
+                node_id=node_id
             )
             
             execution_time = (datetime.utcnow() - start_time).total_seconds()
@@ -227,11 +359,82 @@ class ExecutionEngine:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
+    async def _execute_fused_chain(
+        self,
+        context: ExecutionContext,
+        chain: List[Dict[str, Any]],
+        stages: List[Dict[str, Any]],
+        previous_results: Dict[str, Any],
+        input_mapping: Optional[CompiledInputMapping] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run a fused data_processor chain as one agent call, reporting each node"""
+        
+        head = chain[0]
+        for node in chain:
+            await self._emit_progress_update(context, node['id'], "started")
+        
+        input_data = self._prepare_node_input(head, previous_results, context.variables, input_mapping)
+        input_data['pipeline'] = stages
+        
+        start_time = datetime.utcnow()
+        
+        try:
+            result = await self.agent_runner.execute_agent(
+                agent_type='data_processor',
+                config=head['data'].get('config', {}),
+                input_data=input_data,
+                context=context,
+                node_id=head['id']
+            )
+        except Exception as e:
+            execution_time = (datetime.utcnow() - start_time).total_seconds()
+            return {
+                node['id']: {
+                    'status': 'failed',
+                    'error': str(e),
+                    'execution_time': execution_time,
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+                for node in chain
+            }
+        
+        execution_time = (datetime.utcnow() - start_time).total_seconds()
+        stage_results = result.pop('stages')
+        chain_ids = [node['id'] for node in chain]
+        results = {}
+        
+        for node, stage in zip(chain, stage_results):
+            context.variables.update(stage['variables'])
+            stage['metadata']['fused_chain'] = chain_ids
+            
+            # Only the last node carries data; the others report what they did
+            if node is chain[-1]:
+                node_result = result
+            else:
+                node_result = {
+                    'output': {
+                        'metadata': stage['metadata'],
+                        'operation': stage['operation'],
+                        'timestamp': result['output']['timestamp']
+                    },
+                    'variables': stage['variables']
+                }
+            
+            results[node['id']] = {
+                'status': 'completed',
+                'result': node_result,
+                'execution_time': stage['execution_time'] if stage['execution_time'] is not None else execution_time,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+        
+        return results
+    
     def _prepare_node_input(
         self, 
         node: Dict[str, Any], 
         previous_results: Dict[str, Any], 
-        context_variables: Dict[str, Any]
+        context_variables: Dict[str, Any],
+        input_mapping: Optional[CompiledInputMapping] = None
     ) -> Dict[str, Any]:
         """Prepare input data for a node from previous results and context"""
         
@@ -240,18 +443,14 @@ class ExecutionEngine:
             'previous_results': previous_results
         }
         
-        # Add any node-specific input mappings
-        node_config = node['data'].get('config', {})
-        if 'inputMapping' in node_config:
-            for key, value in node_config['inputMapping'].items():
-                if value.startswith('$'):
-                    # Variable reference
-                    var_name = value[1:]
-                    if var_name in context_variables:
-                        input_data[key] = context_variables[var_name]
-                else:
-                    # Static value
-                    input_data[key] = value
+        # Add any node-specific input mappings: static values, `$var` references
+        # and nested lookups such as `$node.output.data[0].id|int`
+        if input_mapping is None:
+            node_config = node['data'].get('config', {})
+            input_mapping = compile_input_mapping(node_config.get('inputMapping'))
+        
+        if input_mapping is not None:
+            input_mapping.apply(input_data, context_variables, previous_results)
         
         return input_data
     
@@ -0,0 +1,168 @@
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable
+
+MISSING = object()
+
+PATH_TOKEN = re.compile(r"""\[(-?\d+)\]|\[['"](.+?)['"]\]|\.?([^.\[\]]+)""")
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes', 'y', 'on')
+    return bool(value)
+
+CASTS: Dict[str, Callable[[Any], Any]] = {
+    'str': str,
+    'int': _to_int,
+    'float': float,
+    'bool': _to_bool,
+    'json': lambda value: json.loads(value) if isinstance(value, (str, bytes)) else value,
+}
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be compiled"""
+    pass
+
+class ReferenceExpression:
+    """Compiled `$name.path[0].field|cast` reference into variables or node results"""
+    
+    def __init__(self, expression: str):
+        self.expression = expression
+        body, _, cast = expression[1:].partition('|')
+        self.path = self._parse_path(body.strip())
+        self.cast_name = cast.strip() or None
+        
+        if self.cast_name and self.cast_name not in CASTS:
+            raise ExpressionError(f"Unknown cast '{self.cast_name}' in {expression}")
+        self.cast = CASTS.get(self.cast_name)
+    
+    @staticmethod
+    def _parse_path(body: str) -> List[Union[str, int]]:
+        """Split a dotted/indexed path into keys and list indices"""
+        
+        path: List[Union[str, int]] = []
+        position = 0
+        while position < len(body):
+            match = PATH_TOKEN.match(body, position)
+            if not match or match.end() == position:
+                raise ExpressionError(f"Invalid reference path: ${body}")
+            index, quoted, name = match.groups()
+            path.append(int(index) if index is not None else (quoted if quoted is not None else name))
+            position = match.end()
+        
+        if not path or not isinstance(path[0], str):
+            raise ExpressionError(f"Reference must start with a name: ${body}")
+        return path
+    
+    def resolve(self, variables: Dict[str, Any], node_results: Optional[Dict[str, Any]] = None) -> Any:
+        """Resolve against context variables first, then upstream node results"""
+        
+        root, rest = self.path[0], self.path[1:]
+        
+        if root in variables:
+            value = variables[root]
+        elif node_results and root in node_results:
+            # Node references address the agent result, e.g. $node.output.data
+            value = node_results[root]
+            if isinstance(value, dict) and 'result' in value:
+                value = value['result']
+        else:
+            return MISSING
+        
+        for step in rest:
+            try:
+                value = value[step]
+            except (KeyError, IndexError, TypeError):
+                return MISSING
+        
+        if self.cast is not None:
+            try:
+                value = self.cast(value)
+            except (TypeError, ValueError):
+                return MISSING
+        return value
+
+class CompiledInputMapping:
+    """Input mapping with references parsed once per plan"""
+    
+    def __init__(self, mapping: Dict[str, Any]):
+        self.references: List[Tuple[str, ReferenceExpression]] = []
+        self.static: Dict[str, Any] = {}
+        
+        for key, value in mapping.items():
+            if isinstance(value, str) and value.startswith('$'):
+                self.references.append((key, ReferenceExpression(value)))
+            else:
+                self.static[key] = value
+    
+    def apply(
+        self,
+        input_data: Dict[str, Any],
+        variables: Dict[str, Any],
+        node_results: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Write resolved values into input_data; unresolved references are skipped"""
+        
+        input_data.update(self.static)
+        for key, reference in self.references:
+            value = reference.resolve(variables, node_results)
+            if value is not MISSING:
+                input_data[key] = value
+        return input_data
+
+class CompiledVariableExtractor:
+    """Precompiled regex extraction of variables from agent output"""
+    
+    def __init__(self, spec: Dict[str, Any]):
+        self.rules: List[Tuple[str, re.Pattern, Optional[Callable[[Any], Any]]]] = []
+        
+        for var_name, rule in spec.items():
+            if isinstance(rule, dict):
+                pattern, cast_name = rule.get('pattern', ''), rule.get('type')
+            else:
+                pattern, cast_name = rule, None
+            
+            if cast_name and cast_name not in CASTS:
+                raise ExpressionError(f"Unknown cast '{cast_name}' for variable {var_name}")
+            self.rules.append((var_name, re.compile(pattern), CASTS.get(cast_name)))
+    
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Extract every variable whose pattern matches"""
+        
+        variables = {}
+        for var_name, pattern, cast in self.rules:
+            match = pattern.search(text)
+            if not match:
+                continue
+            
+            value = match.group(1) if match.groups() else match.group(0)
+            if cast is not None:
+                try:
+                    value = cast(value)
+                except (TypeError, ValueError):
+                    continue
+            variables[var_name] = value
+        return variables
+
+@lru_cache(maxsize=512)
+def _compile_variable_extractor(spec_json: str) -> CompiledVariableExtractor:
+    return CompiledVariableExtractor(json.loads(spec_json))
+
+def get_variable_extractor(spec: Dict[str, Any]) -> CompiledVariableExtractor:
+    """Get a cached compiled extractor for a variable_extraction config"""
+    
+    return _compile_variable_extractor(json.dumps(spec, sort_keys=True))
+
+def compile_input_mapping(mapping: Optional[Dict[str, Any]]) -> Optional[CompiledInputMapping]:
+    """Compile a node inputMapping, or return None when there is none"""
+    
+    if not mapping:
+        return None
+    return CompiledInputMapping(mapping)
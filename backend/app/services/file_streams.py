@@ -0,0 +1,163 @@
+import json
+import mmap
+import os
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple, Union
+
+import aiofiles
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Rows per csv.writer batch when writing records
+CSV_BATCH_ROWS = 10_000
+
+class FileStream:
+    """Reference to a file whose content is read on demand, passed between nodes as is
+    
+    Iterating yields the content in chunks of at most `chunk_size`
+    characters and `lines()` yields it line by line; every iteration opens
+    the file again, so a stream can be consumed more than once. Nothing is
+    held in memory between iterations, so files larger than RAM can flow
+    from a read to a write or a streaming data_processor node. Streams
+    become a description of the file at the API and WebSocket boundaries.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        file_format: str = 'text',
+        encoding: str = 'utf-8',
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        self.path = path
+        self.format = file_format
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+    
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async with aiofiles.open(self.path, 'r', encoding=self.encoding) as f:
+            while True:
+                chunk = await f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    
+    async def lines(self) -> AsyncIterator[str]:
+        # Split whole chunks rather than iterating the file, which reads each line on a thread
+        carry = ''
+        async for chunk in self:
+            *complete, carry = (carry + chunk).split('\n')
+            for line in complete:
+                yield line + '\n'
+        if carry:
+            yield carry
+    
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+    
+    def describe(self) -> Dict[str, Any]:
+        return {'path': self.path, 'format': self.format, 'encoding': self.encoding, 'size': self.size}
+    
+    def __repr__(self) -> str:
+        return f"FileStream({self.path!r}, format={self.format!r})"
+
+class MappedFile:
+    """Read-only memory map of a file for random-access reads
+    
+    Pages are loaded by the OS as they are touched, so reading a few ranges
+    of a large file costs the ranges rather than the file.
+    """
+    
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # An empty file cannot be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+    
+    def read(self, offset: int, length: Optional[int] = None) -> bytes:
+        """Bytes from offset, up to length (to the end when None); clipped to the file"""
+        
+        if offset < 0:
+            offset = max(offset + self.size, 0)
+        if self._map is None or offset >= self.size:
+            return b''
+        end = self.size if length is None else min(self.size, offset + length)
+        return self._map[offset:end]
+    
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+    
+    def __enter__(self) -> "MappedFile":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_ranges(path: str, ranges: List[Tuple[int, Optional[int]]]) -> List[bytes]:
+    """Read (offset, length) byte ranges of a file through one memory map"""
+    
+    with MappedFile(path) as mapped:
+        return [mapped.read(offset, length) for offset, length in ranges]
+
+async def _pieces(content: Any) -> AsyncIterator[Union[str, bytes]]:
+    if hasattr(content, '__aiter__'):
+        async for piece in content:
+            yield piece
+    else:
+        for piece in content:
+            yield piece
+
+async def write_chunks(
+    path: str,
+    pieces: Any,
+    encoding: str = 'utf-8',
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Write str or bytes pieces from a sync or async iterable; returns bytes written
+    
+    Pieces are gathered into writes of about chunk_size bytes, so small
+    pieces (such as JSON encoder tokens) do not cost a thread hop each.
+    """
+    
+    written = 0
+    buffer: List[bytes] = []
+    buffered = 0
+    async with aiofiles.open(path, 'wb') as f:
+        async for piece in _pieces(pieces):
+            data = piece.encode(encoding) if isinstance(piece, str) else piece
+            buffer.append(data)
+            buffered += len(data)
+            if buffered >= chunk_size:
+                await f.write(b''.join(buffer))
+                written += buffered
+                buffer, buffered = [], 0
+        if buffer:
+            await f.write(b''.join(buffer))
+            written += buffered
+    return written
+
+def iter_csv(rows: Iterable[Dict[str, Any]]) -> Iterable[str]:
+    """CSV text for records, a batch of rows at a time; columns come from the first record"""
+    
+    import csv
+    import io
+    
+    output = io.StringIO()
+    writer = None
+    for count, row in enumerate(rows, 1):
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+        if count % CSV_BATCH_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    if output.tell():
+        yield output.getvalue()
+
+def iter_json_lines(rows: Iterable[Any], default: Any = None) -> Iterable[str]:
+    for row in rows:
+        yield json.dumps(row, default=default) + '\n'
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LLMCacheBackend(ABC):
+    """Storage interface for cached LLM responses"""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value or None if missing or expired"""
+    
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        """Store a value, expiring after ttl seconds when given"""
+    
+    async def close(self):
+        """Release backend resources"""
+        pass
+
+class MemoryCacheBackend(LLMCacheBackend):
+    """In-process LRU cache backend"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Dict[str, Any]]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.time():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        expires_at = time.time() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class SQLiteCacheBackend(LLMCacheBackend):
+    """Local-disk cache backend that survives restarts"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self._lock = asyncio.Lock()
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            row = await asyncio.to_thread(self._get, key)
+        return json.loads(row) if row else None
+    
+    def _get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        return value
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        expires_at = time.time() + ttl if ttl else None
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, json.dumps(value), expires_at)
+    
+    def _set(self, key: str, value: str, expires_at: Optional[float]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at)
+        )
+        self._conn.commit()
+    
+    async def close(self):
+        self._conn.close()
+
+class RedisCacheBackend(LLMCacheBackend):
+    """Redis cache backend shared between API pods and workers"""
+    
+    def __init__(self, url: str, password: Optional[str] = None, prefix: str = "agentflow:llm_cache:"):
+        import redis.asyncio as redis
+        
+        self.prefix = prefix
+        self._client = redis.from_url(url, password=password)
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self._client.get(self.prefix + key)
+        return json.loads(value) if value else None
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        await self._client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+    
+    async def close(self):
+        await self._client.close()
+
+class LLMResponseCache:
+    """Exact-match cache for LLM completions"""
+    
+    def __init__(self, backend: LLMCacheBackend, default_ttl: Optional[int] = 3600):
+        self.backend = backend
+        self.default_ttl = default_ttl
+    
+    def build_key(
+        self,
+        model: str,
+        temperature: Optional[float],
+        prompt: str,
+        tools: Optional[List[str]] = None
+    ) -> str:
+        """Build a cache key from everything that determines the completion"""
+        
+        payload = json.dumps({
+            'model': model,
+            'temperature': temperature,
+            'prompt': prompt,
+            'tools': sorted(tools or [])
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached completion, treating backend errors as misses"""
+        
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+    
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None):
+        """Store a completion, ignoring backend errors"""
+        
+        try:
+            await self.backend.set(key, value, ttl if ttl is not None else self.default_ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+    
+    async def close(self):
+        await self.backend.close()
+
+def create_llm_cache(
+    backend: str,
+    default_ttl: Optional[int] = 3600,
+    max_entries: int = 1024,
+    sqlite_path: str = "./data/llm_cache.db",
+    redis_url: Optional[str] = None,
+    redis_password: Optional[str] = None
+) -> Optional[LLMResponseCache]:
+    """Create an LLM response cache for the configured backend"""
+    
+    if backend == 'none':
+        return None
+    elif backend == 'memory':
+        cache_backend = MemoryCacheBackend(max_entries=max_entries)
+    elif backend == 'sqlite':
+        cache_backend = SQLiteCacheBackend(sqlite_path)
+    elif backend == 'redis':
+        cache_backend = RedisCacheBackend(redis_url, password=redis_password)
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+    
+    return LLMResponseCache(cache_backend, default_ttl=default_ttl)
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_created = False
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide LLM response cache, or None when caching is off"""
+    
+    global _llm_cache, _llm_cache_created
+    if not _llm_cache_created:
+        from app.core.config import settings
+        
+        _llm_cache = create_llm_cache(
+            settings.LLM_CACHE_BACKEND,
+            default_ttl=settings.LLM_CACHE_TTL_SECONDS,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            sqlite_path=settings.LLM_CACHE_SQLITE_PATH,
+            redis_url=settings.REDIS_URL,
+            redis_password=settings.REDIS_PASSWORD
+        )
+        _llm_cache_created = True
+    return _llm_cache
+
+async def close_llm_cache():
+    """Close the process-wide LLM response cache"""
+    
+    global _llm_cache, _llm_cache_created
+    if _llm_cache is not None:
+        await _llm_cache.close()
+    _llm_cache = None
+    _llm_cache_created = False
+
+def record_cache_metrics(
+    context: Any,
+    hit: bool,
+    tokens_saved: int = 0,
+    latency_saved: float = 0.0,
+    tier: str = 'exact'
+):
+    """Accumulate LLM cache usage on the execution context metrics"""
+    
+    metrics = getattr(context, 'metrics', None)
+    if metrics is None:
+        return
+    
+    stats = metrics.setdefault('llm_cache', {
+        'lookups': 0,
+        'hits': 0,
+        'semantic_hits': 0,
+        'hit_rate': 0.0,
+        'tokens_saved': 0,
+        'latency_saved_ms': 0.0
+    })
+    stats['lookups'] += 1
+    if hit:
+        stats['hits'] += 1
+        if tier == 'semantic':
+            stats['semantic_hits'] += 1
+        stats['tokens_saved'] += tokens_saved
+        stats['latency_saved_ms'] += latency_saved * 1000
+    stats['hit_rate'] = stats['hits'] / stats['lookups']
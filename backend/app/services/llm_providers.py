@@ -0,0 +1,146 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from langchain.chat_models import ChatOpenAI
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import AIMessage, ChatGeneration, ChatResult
+from langchain.schema.messages import BaseMessage
+
+from app.services.mock_llm import MockLLMProvider
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = ['openai', 'mock']
+
+class MockChatModel(BaseChatModel):
+    """LangChain chat model backed by the deterministic mock provider"""
+    
+    provider: Any
+    model_name: str = 'mock'
+    temperature: float = 0.0
+    streaming: bool = True
+    
+    @property
+    def _llm_type(self) -> str:
+        return 'mock'
+    
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {'model_name': self.model_name, 'temperature': self.temperature}
+    
+    @property
+    def response_headers(self) -> Dict[str, str]:
+        """Rate-limit headers of the latest mock response"""
+        return self.provider.last_headers
+    
+    def _to_prompt(self, messages: List[BaseMessage]) -> str:
+        return '\n'.join(str(message.content) for message in messages)
+    
+    def _to_result(self, prompt: str, text: str) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={
+                'token_usage': self.provider.usage(prompt, text),
+                'model_name': self.model_name
+            }
+        )
+    
+    def _combine_llm_outputs(self, llm_outputs: List[Optional[dict]]) -> dict:
+        """Sum token usage across generations like ChatOpenAI"""
+        
+        token_usage: Dict[str, int] = {}
+        for output in llm_outputs:
+            for name, count in (output or {}).get('token_usage', {}).items():
+                token_usage[name] = token_usage.get(name, 0) + count
+        return {'token_usage': token_usage, 'model_name': self.model_name}
+    
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt = self._to_prompt(messages)
+        return self._to_result(prompt, self.provider.complete(prompt))
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt = self._to_prompt(messages)
+        on_token = run_manager.on_llm_new_token if run_manager and self.streaming else None
+        text = await self.provider.acomplete(prompt, on_token=on_token)
+        return self._to_result(prompt, text)
+
+class HeaderRecordingChatOpenAI(ChatOpenAI):
+    """ChatOpenAI that keeps the rate-limit headers of its latest response
+    
+    The OpenAI SDK returns parsed bodies only, so the headers are captured
+    with an httpx response hook on the clients it sends requests through.
+    """
+    
+    response_headers: Dict[str, str] = {}
+    
+    def record_headers(self):
+        """Add the response hooks to the httpx clients the SDK already uses
+        
+        The clients keep the http_client, proxy and timeouts passed in the
+        options. The pre-1.0 SDK does not send requests through httpx, so
+        no headers are recorded with it.
+        """
+        
+        import httpx
+        
+        def record(response: httpx.Response):
+            headers = {
+                name: value for name, value in response.headers.items()
+                if name.startswith('x-ratelimit-') or name == 'retry-after'
+            }
+            if headers:
+                self.response_headers = headers
+        
+        async def arecord(response: httpx.Response):
+            record(response)
+        
+        if self.async_client is None:
+            return
+        add_response_hook(self.client._client._client, record)
+        add_response_hook(self.async_client._client._client, arecord)
+
+def add_response_hook(http_client: Any, hook: Any):
+    """Append a response event hook, keeping the ones already installed"""
+    
+    hooks = http_client.event_hooks
+    if hook not in hooks['response']:
+        http_client.event_hooks = {**hooks, 'response': [*hooks['response'], hook]}
+
+def create_llm(
+    provider: str,
+    model: str,
+    temperature: float = 0.1,
+    streaming: bool = True,
+    options: Optional[Dict[str, Any]] = None
+) -> BaseChatModel:
+    """Create the chat model for a provider name"""
+    
+    options = options or {}
+    
+    if provider == 'openai':
+        llm = HeaderRecordingChatOpenAI(model=model, temperature=temperature, streaming=streaming, **options)
+        llm.record_headers()
+        return llm
+    
+    if provider == 'mock':
+        logger.info(f"🧪 Using mock LLM provider: {options}")
+        return MockChatModel(
+            provider=MockLLMProvider(**options),
+            model_name=f"mock-{model}",
+            temperature=temperature,
+            streaming=streaming
+        )
+    
+    raise ValueError(f"Unknown LLM provider: {provider}. Supported: {', '.join(LLM_PROVIDERS)}")
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, List, Optional
+
+from langchain.callbacks.base import AsyncCallbackHandler
+
+from app.services.websocket_manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+class WebSocketStreamHandler(AsyncCallbackHandler):
+    """Forwards LLM tokens to workflow subscribers as coalesced node_stream events
+    
+    The first token is sent as soon as it arrives. After that, tokens are
+    batched every flush interval, or sooner once a chunk grows large. Only
+    one send is in flight at a time, so tokens arriving behind a slow send
+    are folded into the next chunk instead of queueing as separate messages.
+    """
+    
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        workflow_id: str,
+        execution_id: str,
+        node_id: str,
+        flush_interval: float = 0.05,
+        max_chunk_chars: int = 1024,
+        send_timeout: float = 5.0
+    ):
+        self.connection_manager = connection_manager
+        self.workflow_id = workflow_id
+        self.execution_id = execution_id
+        self.node_id = node_id
+        self.flush_interval = flush_interval
+        self.max_chunk_chars = max_chunk_chars
+        self.send_timeout = send_timeout
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._sequence = 0
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        """Buffer a token and make sure the flusher is running"""
+        
+        self._buffer.append(token)
+        self._buffered_chars += len(token)
+        
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        elif self._buffered_chars >= self.max_chunk_chars:
+            self._wakeup.set()
+    
+    async def _flush_loop(self):
+        """Send buffered tokens until the handler is closed and drained"""
+        
+        while True:
+            if self._buffer:
+                await self._send_buffer()
+            
+            if self._closed and not self._buffer:
+                return
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def _send_buffer(self, done: bool = False):
+        """Send everything buffered so far as a single chunk"""
+        
+        chunk = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._sequence += 1
+        
+        try:
+            await self.connection_manager.stream_to_workflow(self.workflow_id, {
+                'type': 'node_stream',
+                'execution_id': self.execution_id,
+                'node_id': self.node_id,
+                'chunk': chunk,
+                'sequence': self._sequence,
+                'done': done,
+                'timestamp': datetime.utcnow().isoformat()
+            }, send_timeout=self.send_timeout)
+        except Exception as e:
+            logger.warning(f"Failed to stream tokens for node {self.node_id}: {e}")
+    
+    async def aclose(self):
+        """Flush remaining tokens and send the end-of-stream marker
+        
+        The marker is sent even when no token arrived, so subscribers see
+        the stream end for calls that produced nothing or failed early.
+        """
+        
+        self._closed = True
+        self._wakeup.set()
+        
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._send_buffer(done=True)
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class MockLLMError(Exception):
+    """Error injected by the mock provider"""
+    
+    def __init__(self, message: str, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        # Mirrors the shape of HTTP client errors so retry logic sees the headers
+        self.response = type('MockResponse', (), {'status_code': status_code, 'headers': headers or {}})()
+
+class MockLLMProvider:
+    """Deterministic offline LLM with configurable latency, token rate and errors
+    
+    Every random draw comes from a seeded generator and responses are derived
+    from a hash of the prompt, so a run with the same seed and inputs produces
+    the same completions, latencies and injected failures.
+    """
+    
+    LATENCY_DISTRIBUTIONS = ['constant', 'uniform', 'normal', 'lognormal', 'exponential']
+    ERROR_TYPES = {
+        'rate_limit': (429, 'Mock rate limit exceeded'),
+        'server_error': (500, 'Mock internal server error'),
+        'timeout': (504, 'Mock upstream timeout'),
+    }
+    
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_distribution: str = 'constant',
+        latency_jitter_ms: float = 0.0,
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        error_type: str = 'rate_limit',
+        retry_after_seconds: float = 1.0,
+        response_tokens: int = 50,
+        response: Optional[str] = None,
+        requests_per_minute: Optional[int] = None,
+        seed: int = 42
+    ):
+        if latency_distribution not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        if error_type not in self.ERROR_TYPES:
+            raise ValueError(f"Unknown error type: {error_type}")
+        
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_jitter_ms = latency_jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_type = error_type
+        self.retry_after_seconds = retry_after_seconds
+        self.response_tokens = response_tokens
+        self.response = response
+        self.requests_per_minute = requests_per_minute
+        self.last_headers: Dict[str, str] = {}
+        self._request_times: deque = deque()
+        self._random = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    
+    def sample_latency(self) -> float:
+        """Draw the time to first token in seconds"""
+        
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        
+        if self.latency_distribution == 'uniform':
+            latency = self._random.uniform(mean - jitter, mean + jitter)
+        elif self.latency_distribution == 'normal':
+            latency = self._random.gauss(mean, jitter)
+        elif self.latency_distribution == 'lognormal':
+            sigma = jitter / mean if mean else 0.0
+            latency = mean * self._random.lognormvariate(0.0, sigma)
+        elif self.latency_distribution == 'exponential':
+            latency = self._random.expovariate(1 / mean) if mean else 0.0
+        else:
+            latency = mean
+        
+        return max(0.0, latency) / 1000
+    
+    def render_response(self, prompt: str) -> str:
+        """Build a deterministic completion for a prompt"""
+        
+        if self.response is not None:
+            return self.response.format(prompt=prompt)
+        
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        words = [f"tok{digest[i % len(digest):i % len(digest) + 4]}" for i in range(max(0, self.response_tokens - 3))]
+        # Agents stop once they see a final answer
+        return "Final Answer: " + ' '.join(words)
+    
+    def _start_request(self, prompt: str) -> float:
+        """Count the request, maybe inject an error, and return the latency"""
+        
+        self.stats['requests'] += 1
+        self.stats['prompt_tokens'] += len(prompt) // 4
+        latency = self.sample_latency()
+        
+        self._enforce_rate_limit()
+        
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            status_code, message = self.ERROR_TYPES[self.error_type]
+            headers = {'retry-after': str(self.retry_after_seconds)} if status_code == 429 else {}
+            raise MockLLMError(message, status_code, headers)
+        
+        return latency
+    
+    def _enforce_rate_limit(self):
+        """Reject requests over requests_per_minute and report the remaining quota like OpenAI"""
+        
+        if not self.requests_per_minute:
+            return
+        
+        now = time.monotonic()
+        while self._request_times and self._request_times[0] <= now - 60:
+            self._request_times.popleft()
+        
+        reset = f"{self._request_times[0] + 60 - now:.3f}s" if self._request_times else '0s'
+        if len(self._request_times) >= self.requests_per_minute:
+            self.stats['errors'] += 1
+            raise MockLLMError('Mock rate limit exceeded', 429, {
+                'retry-after': reset[:-1],
+                'x-ratelimit-remaining-requests': '0',
+                'x-ratelimit-reset-requests': reset
+            })
+        
+        self._request_times.append(now)
+        self.last_headers = {
+            'x-ratelimit-limit-requests': str(self.requests_per_minute),
+            'x-ratelimit-remaining-requests': str(self.requests_per_minute - len(self._request_times)),
+            'x-ratelimit-reset-requests': reset
+        }
+    
+    def complete(self, prompt: str) -> str:
+        """Blocking completion"""
+        
+        latency = self._start_request(prompt)
+        text = self.render_response(prompt)
+        tokens = text.split(' ')
+        
+        generation_time = len(tokens) / self.tokens_per_second if self.tokens_per_second else 0.0
+        time.sleep(latency + generation_time)
+        
+        self.stats['completion_tokens'] += len(tokens)
+        return text
+    
+    async def acomplete(
+        self,
+        prompt: str,
+        on_token: Optional[Callable[[str], Awaitable[Any]]] = None
+    ) -> str:
+        """Async completion, optionally streaming tokens at the configured rate"""
+        
+        latency = self._start_request(prompt)
+        text = self.render_response(prompt)
+        tokens = text.split(' ')
+        
+        await asyncio.sleep(latency)
+        
+        if on_token is None:
+            if self.tokens_per_second:
+                await asyncio.sleep(len(tokens) / self.tokens_per_second)
+        else:
+            delay = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+            for i, token in enumerate(tokens):
+                await on_token(token if i == 0 else ' ' + token)
+                if delay:
+                    await asyncio.sleep(delay)
+        
+        self.stats['completion_tokens'] += len(tokens)
+        return text
+    
+    def usage(self, prompt: str, text: str) -> Dict[str, int]:
+        """Token usage in the OpenAI response format"""
+        
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(text.split(' '))
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
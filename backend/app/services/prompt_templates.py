@@ -0,0 +1,215 @@
+import json
+from _string import formatter_field_name_split
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, Optional
+
+from jinja2 import ChainableUndefined, StrictUndefined, TemplateError, Undefined
+from jinja2.utils import missing
+from jinja2.sandbox import SandboxedEnvironment
+
+from app.services.columnar import ColumnarTable
+
+# `format` templates use str.format placeholders ({input}, {data.items[0]}, {amount:.2f});
+# `jinja` templates opt in to Jinja syntax
+TEMPLATE_SYNTAXES = ('format', 'jinja')
+
+class PromptTemplateError(ValueError):
+    """Raised when a prompt template cannot be compiled or rendered"""
+    pass
+
+class PromptTooLargeError(ValueError):
+    """Raised when a rendered prompt exceeds its size budget"""
+    pass
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token"""
+    return (len(text) + 3) // 4
+
+def truncate_chars(value: Any, length: int = 1000, marker: str = '…') -> str:
+    """Cut a value's text to a number of characters"""
+    
+    text = value if isinstance(value, str) else _to_text(value)
+    if len(text) <= length:
+        return text
+    return text[:max(0, length - len(marker))] + marker
+
+def truncate_tokens(value: Any, tokens: int = 500) -> str:
+    """Cut a value's text to an approximate number of tokens"""
+    return truncate_chars(value, tokens * 4)
+
+def summarize(value: Any, max_items: int = 5, max_chars: int = 2000) -> str:
+    """Compact large upstream values: head of lists, keys of dicts, head and tail of text"""
+    
+    if isinstance(value, ColumnarTable):
+        value = value.to_records()
+    
+    if isinstance(value, list) and len(value) > max_items:
+        head = _to_text(value[:max_items])
+        text = f"{head} … ({len(value) - max_items} more items, {len(value)} total)"
+    elif isinstance(value, dict) and len(value) > max_items:
+        keys = list(value.keys())
+        shown = {key: value[key] for key in keys[:max_items]}
+        text = f"{_to_text(shown)} … ({len(keys) - max_items} more keys: {', '.join(map(str, keys[max_items:max_items * 2]))})"
+    else:
+        text = value if isinstance(value, str) else _to_text(value)
+    
+    if len(text) <= max_chars:
+        return text
+    
+    half = max_chars // 2
+    return f"{text[:half]} … [{len(text) - max_chars} chars omitted] … {text[-half:]}"
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, ColumnarTable):
+        return value.to_json()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+class InputUndefined(ChainableUndefined):
+    """Missing keys and attributes of an input render empty; a missing input raises
+    
+    A typo in a variable name, or an input the node never received, would
+    otherwise send the LLM a prompt with a silent gap. Tests such as
+    `{% if name %}` and the `default` filter still work on missing inputs.
+    """
+    
+    __slots__ = ()
+    
+    def __str__(self) -> str:
+        if self._undefined_obj is missing:
+            self._fail_with_undefined_error()
+        return ''
+
+def format_value(value: Any, format_spec: str = '', conversion: Optional[str] = None) -> str:
+    """Apply a str.format conversion and format spec, as `{value!r:>10}` would"""
+    
+    if isinstance(value, Undefined):
+        # Raises for a missing input; a missing field renders empty, unformatted
+        return str(value)
+    if conversion == 'r':
+        value = repr(value)
+    elif conversion == 'a':
+        value = ascii(value)
+    elif conversion == 's':
+        value = str(value)
+    try:
+        return format(value, format_spec)
+    except (TypeError, ValueError) as e:
+        raise PromptTemplateError(f"Cannot format {type(value).__name__} value with '{format_spec}': {e}") from e
+
+def _build_environment(strict: bool) -> SandboxedEnvironment:
+    environment = SandboxedEnvironment(
+        undefined=StrictUndefined if strict else InputUndefined,
+        autoescape=False,
+        keep_trailing_newline=True
+    )
+    environment.filters['truncate_chars'] = truncate_chars
+    environment.filters['truncate_tokens'] = truncate_tokens
+    environment.filters['summarize'] = summarize
+    environment.filters['json'] = _to_text
+    environment.filters['format_value'] = format_value
+    return environment
+
+_environments = {
+    False: _build_environment(strict=False),
+    True: _build_environment(strict=True),
+}
+
+def to_jinja_source(template: str) -> str:
+    """Convert a str.format template to Jinja source that renders the same text
+    
+    Literal text, including `{{`/`}}` escapes, becomes Jinja string
+    constants, so braces in it are never read as Jinja syntax. Fields keep
+    their attribute and index lookups, and conversions and format specs go
+    through the format_value filter.
+    """
+    
+    try:
+        # parse is lazy, so unbalanced braces only surface while iterating
+        fields = list(Formatter().parse(template))
+    except ValueError as e:
+        raise PromptTemplateError(f"Invalid prompt template: {e}") from e
+    
+    parts = []
+    for literal, field_name, format_spec, conversion in fields:
+        if literal:
+            parts.append(_jinja_literal(literal))
+        if field_name is None:
+            continue
+        if '{' in format_spec:
+            raise PromptTemplateError(
+                f"Invalid prompt template: nested fields in the format spec of {{{field_name}}} are not supported"
+            )
+        if conversion not in (None, 'r', 's', 'a'):
+            raise PromptTemplateError(f"Invalid prompt template: unknown conversion !{conversion} in {{{field_name}}}")
+        expression = _jinja_field(field_name)
+        if format_spec or conversion:
+            expression = f"{expression} | format_value({json.dumps(format_spec)}, {json.dumps(conversion)})"
+        parts.append(f"{{{{ {expression} }}}}")
+    return ''.join(parts)
+
+def _jinja_literal(text: str) -> str:
+    if not any(marker in text for marker in ('{', '}', '#', '%')):
+        return text
+    # Jinja string literals take backslash escapes, so a JSON string reads back unchanged
+    return f"{{{{ {json.dumps(text)} }}}}"
+
+def _jinja_field(field_name: str) -> str:
+    first, rest = formatter_field_name_split(field_name)
+    if not isinstance(first, str) or not first.isidentifier():
+        raise PromptTemplateError(
+            f"Invalid prompt template: {{{field_name}}} needs a named input, not a positional field"
+        )
+    expression = first
+    for is_attribute, key in rest:
+        if is_attribute and key.isidentifier():
+            # Jinja falls back to keys, so {data.rows} also reaches dict inputs
+            expression += f".{key}"
+        else:
+            # As in str.format, digits index and anything else is a string key
+            expression += f"[{key}]" if isinstance(key, int) else f"[{json.dumps(key)}]"
+    return expression
+
+@lru_cache(maxsize=256)
+def compile_template(template: str, strict: bool = False, syntax: str = 'format'):
+    """Compile a prompt template once; compiled templates are kept in an LRU cache"""
+    
+    if syntax not in TEMPLATE_SYNTAXES:
+        raise PromptTemplateError(
+            f"Unsupported template syntax: {syntax}. Supported: {', '.join(TEMPLATE_SYNTAXES)}"
+        )
+    source = template if syntax == 'jinja' else to_jinja_source(template)
+    try:
+        return _environments[strict].from_string(source)
+    except TemplateError as e:
+        raise PromptTemplateError(f"Invalid prompt template: {e}") from e
+
+def render_prompt(
+    template: str,
+    values: Dict[str, Any],
+    max_tokens: Optional[int] = None,
+    strict: bool = False,
+    syntax: str = 'format'
+) -> str:
+    """Render a prompt in the sandbox and enforce the prompt-size budget"""
+    
+    compiled = compile_template(template, strict, syntax)
+    try:
+        prompt = compiled.render(**values)
+    except TemplateError as e:
+        raise PromptTemplateError(f"Failed to render prompt template: {e}") from e
+    
+    if not prompt.strip():
+        raise PromptTemplateError("Prompt template rendered an empty prompt; check the node's inputs")
+    
+    if max_tokens is not None:
+        tokens = estimate_tokens(prompt)
+        if tokens > max_tokens:
+            raise PromptTooLargeError(
+                f"Prompt is ~{tokens} tokens, over the budget of {max_tokens}; "
+                f"use the truncate_tokens or summarize filters on large inputs"
+            )
+    
+    return prompt
@@ -0,0 +1,361 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from typing import Dict, Any, Optional, Tuple, List
+
+logger = logging.getLogger(__name__)
+
+class LocalBucketStore:
+    """Process-wide token buckets for requests and tokens per minute"""
+    
+    def __init__(self):
+        # key -> [available_requests, available_tokens, last_refill, blocked_until]
+        self._buckets: Dict[str, List[float]] = {}
+    
+    async def try_acquire(
+        self,
+        key: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        tokens: int
+    ) -> float:
+        """Consume capacity and return 0, or return the seconds to wait"""
+        
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(key, [requests_per_minute, tokens_per_minute, now, 0.0])
+        
+        elapsed = now - bucket[2]
+        bucket[0] = min(requests_per_minute, bucket[0] + elapsed * requests_per_minute / 60)
+        bucket[1] = min(tokens_per_minute, bucket[1] + elapsed * tokens_per_minute / 60)
+        bucket[2] = now
+        
+        if bucket[3] > now:
+            return bucket[3] - now
+        
+        # Requests larger than the whole budget are let through once the bucket is full
+        tokens = min(tokens, tokens_per_minute)
+        request_wait = (1 - bucket[0]) * 60 / requests_per_minute if bucket[0] < 1 else 0.0
+        token_wait = (tokens - bucket[1]) * 60 / tokens_per_minute if bucket[1] < tokens else 0.0
+        wait = max(request_wait, token_wait)
+        
+        if wait <= 0:
+            bucket[0] -= 1
+            bucket[1] -= tokens
+        return wait
+    
+    async def penalize(self, key: str, retry_after: float, remaining_requests: Optional[int] = None, remaining_tokens: Optional[int] = None):
+        """Apply provider feedback to a bucket"""
+        
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        
+        if retry_after:
+            bucket[3] = max(bucket[3], now + retry_after)
+        if remaining_requests is not None:
+            bucket[0] = min(bucket[0], remaining_requests)
+        if remaining_tokens is not None:
+            bucket[1] = min(bucket[1], remaining_tokens)
+
+class RedisBucketStore:
+    """Token buckets shared by every process through Redis"""
+    
+    ACQUIRE_SCRIPT = """
+    local key = KEYS[1]
+    local rpm = tonumber(ARGV[1])
+    local tpm = tonumber(ARGV[2])
+    local tokens = math.min(tonumber(ARGV[3]), tpm)
+    local now = tonumber(ARGV[4])
+    
+    local state = redis.call('HMGET', key, 'requests', 'tokens', 'ts', 'blocked_until')
+    local requests_left = tonumber(state[1]) or rpm
+    local tokens_left = tonumber(state[2]) or tpm
+    local ts = tonumber(state[3]) or now
+    local blocked_until = tonumber(state[4]) or 0
+    
+    local elapsed = math.max(0, now - ts)
+    requests_left = math.min(rpm, requests_left + elapsed * rpm / 60)
+    tokens_left = math.min(tpm, tokens_left + elapsed * tpm / 60)
+    
+    local wait = 0
+    if blocked_until > now then
+        wait = blocked_until - now
+    else
+        if requests_left < 1 then
+            wait = (1 - requests_left) * 60 / rpm
+        end
+        if tokens_left < tokens then
+            wait = math.max(wait, (tokens - tokens_left) * 60 / tpm)
+        end
+        if wait <= 0 then
+            requests_left = requests_left - 1
+            tokens_left = tokens_left - tokens
+        end
+    end
+    
+    redis.call('HSET', key, 'requests', requests_left, 'tokens', tokens_left, 'ts', now, 'blocked_until', blocked_until)
+    redis.call('EXPIRE', key, 120)
+    return tostring(wait)
+    """
+    
+    PENALIZE_SCRIPT = """
+    local key = KEYS[1]
+    local blocked_until = tonumber(ARGV[1])
+    local current = tonumber(redis.call('HGET', key, 'blocked_until')) or 0
+    redis.call('HSET', key, 'blocked_until', math.max(current, blocked_until))
+    if ARGV[2] ~= '' then
+        local requests_left = tonumber(redis.call('HGET', key, 'requests')) or tonumber(ARGV[2])
+        redis.call('HSET', key, 'requests', math.min(requests_left, tonumber(ARGV[2])))
+    end
+    if ARGV[3] ~= '' then
+        local tokens_left = tonumber(redis.call('HGET', key, 'tokens')) or tonumber(ARGV[3])
+        redis.call('HSET', key, 'tokens', math.min(tokens_left, tonumber(ARGV[3])))
+    end
+    redis.call('EXPIRE', key, 120)
+    return 1
+    """
+    
+    def __init__(self, url: str, password: Optional[str] = None, prefix: str = "agentflow:llm_rate:"):
+        import redis.asyncio as redis
+        
+        self.prefix = prefix
+        self._client = redis.from_url(url, password=password)
+        self._acquire = self._client.register_script(self.ACQUIRE_SCRIPT)
+        self._penalize = self._client.register_script(self.PENALIZE_SCRIPT)
+    
+    async def try_acquire(
+        self,
+        key: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        tokens: int
+    ) -> float:
+        """Consume capacity atomically in Redis and return the seconds to wait"""
+        
+        wait = await self._acquire(
+            keys=[self.prefix + key],
+            args=[requests_per_minute, tokens_per_minute, tokens, time.time()]
+        )
+        return float(wait)
+    
+    async def penalize(self, key: str, retry_after: float, remaining_requests: Optional[int] = None, remaining_tokens: Optional[int] = None):
+        """Apply provider feedback to the shared bucket"""
+        
+        await self._penalize(
+            keys=[self.prefix + key],
+            args=[
+                time.time() + (retry_after or 0),
+                '' if remaining_requests is None else remaining_requests,
+                '' if remaining_tokens is None else remaining_tokens
+            ]
+        )
+
+class LLMRateLimiter:
+    """Token-bucket limiter for LLM providers with priority-aware waiting"""
+    
+    def __init__(
+        self,
+        store: Any = None,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 30000,
+        limits: Optional[Dict[str, Dict[str, int]]] = None
+    ):
+        self.store = store or LocalBucketStore()
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.limits = limits or {}
+        self._waiters: Dict[str, List[Tuple[int, int]]] = {}
+        self._conditions: Dict[str, asyncio.Condition] = {}
+        self._sequence = itertools.count()
+    
+    def get_limits(self, provider: str, model: str) -> Tuple[int, int]:
+        """Resolve requests and tokens per minute for a provider and model"""
+        
+        limits = self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+        return (
+            limits.get('requests_per_minute', self.requests_per_minute),
+            limits.get('tokens_per_minute', self.tokens_per_minute)
+        )
+    
+    async def acquire(self, provider: str, model: str, tokens: int = 0, priority: int = 0) -> float:
+        """Wait for capacity and return the time spent queued in seconds
+        
+        Higher priority waiters are served first; equal priorities are FIFO.
+        """
+        
+        key = f"{provider}:{model}"
+        requests_per_minute, tokens_per_minute = self.get_limits(provider, model)
+        waiters = self._waiters.setdefault(key, [])
+        condition = self._conditions.setdefault(key, asyncio.Condition())
+        
+        entry = (-priority, next(self._sequence))
+        heapq.heappush(waiters, entry)
+        started = time.monotonic()
+        
+        try:
+            async with condition:
+                while True:
+                    timeout = None
+                    if waiters[0] == entry:
+                        wait = await self.store.try_acquire(
+                            key, requests_per_minute, tokens_per_minute, tokens
+                        )
+                        if wait <= 0:
+                            return time.monotonic() - started
+                        timeout = wait
+                    
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if entry in waiters:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+            async with condition:
+                condition.notify_all()
+    
+    async def report_rate_limit(
+        self,
+        provider: str,
+        model: str,
+        retry_after: Optional[float] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Slow down after a 429 using Retry-After and rate-limit headers"""
+        
+        feedback = parse_rate_limit_headers(headers or {})
+        if retry_after is None:
+            retry_after = feedback['retry_after']
+        
+        logger.warning(f"LLM provider rate limited {provider}:{model}, backing off {retry_after or 0:.1f}s")
+        
+        await self.store.penalize(
+            f"{provider}:{model}",
+            retry_after or 0,
+            remaining_requests=feedback['remaining_requests'],
+            remaining_tokens=feedback['remaining_tokens']
+        )
+    
+    async def update_from_headers(self, provider: str, model: str, headers: Dict[str, str]):
+        """Sync bucket levels with the rate-limit headers of a successful response
+        
+        Buckets refill at the configured rate, so an exhausted quota also
+        blocks the key until the provider's reset time.
+        """
+        
+        feedback = parse_rate_limit_headers(headers)
+        if feedback['remaining_requests'] is None and feedback['remaining_tokens'] is None:
+            return
+        
+        resets = [
+            feedback[reset] for remaining, reset in (
+                ('remaining_requests', 'reset_requests'), ('remaining_tokens', 'reset_tokens')
+            )
+            if feedback[remaining] == 0 and feedback[reset] is not None
+        ]
+        
+        await self.store.penalize(
+            f"{provider}:{model}",
+            max(resets, default=0),
+            remaining_requests=feedback['remaining_requests'],
+            remaining_tokens=feedback['remaining_tokens']
+        )
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse durations like '20', '1.5s', '250ms' or '6m0s' into seconds"""
+    
+    if value is None:
+        return None
+    
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    
+    multipliers = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(amount) * multipliers[unit] for amount, unit in parts)
+
+def parse_rate_limit_headers(headers: Dict[str, str]) -> Dict[str, Any]:
+    """Extract Retry-After and remaining-capacity values from response headers"""
+    
+    headers = {str(k).lower(): v for k, v in headers.items()}
+    
+    def _int(name: str) -> Optional[int]:
+        try:
+            return int(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    reset_requests = parse_duration(headers.get('x-ratelimit-reset-requests'))
+    reset_tokens = parse_duration(headers.get('x-ratelimit-reset-tokens'))
+    
+    retry_after = parse_duration(headers.get('retry-after'))
+    if retry_after is None:
+        resets = [reset for reset in (reset_requests, reset_tokens) if reset is not None]
+        retry_after = max(resets) if resets else None
+    
+    return {
+        'retry_after': retry_after,
+        'remaining_requests': _int('x-ratelimit-remaining-requests'),
+        'remaining_tokens': _int('x-ratelimit-remaining-tokens'),
+        'reset_requests': reset_requests,
+        'reset_tokens': reset_tokens
+    }
+
+def get_rate_limit_error_headers(error: Exception) -> Optional[Dict[str, str]]:
+    """Return response headers if the error is a provider 429, else None"""
+    
+    response = getattr(error, 'response', None)
+    status_code = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status_code != 429 and type(error).__name__ != 'RateLimitError':
+        return None
+    
+    return dict(getattr(response, 'headers', None) or {})
+
+def record_queue_metrics(context: Any, queue_time: float):
+    """Accumulate rate-limiter queue time on the execution context metrics"""
+    
+    metrics = getattr(context, 'metrics', None)
+    if metrics is None:
+        return
+    
+    stats = metrics.setdefault('llm_rate_limit', {
+        'requests': 0,
+        'queue_time_ms': 0.0,
+        'max_queue_time_ms': 0.0
+    })
+    stats['requests'] += 1
+    stats['queue_time_ms'] += queue_time * 1000
+    stats['max_queue_time_ms'] = max(stats['max_queue_time_ms'], queue_time * 1000)
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """Get the process-wide LLM rate limiter"""
+    
+    global _rate_limiter
+    if _rate_limiter is None:
+        from app.core.config import settings
+        
+        if settings.LLM_RATE_LIMIT_BACKEND == 'redis':
+            store = RedisBucketStore(settings.REDIS_URL, password=settings.REDIS_PASSWORD)
+        else:
+            store = LocalBucketStore()
+        
+        _rate_limiter = LLMRateLimiter(
+            store=store,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            limits=settings.LLM_RATE_LIMITS
+        )
+    return _rate_limiter
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import re
+import time
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EmbeddingFunction = Callable[[str], np.ndarray]
+
+class HashingEmbedder:
+    """Local embedding function based on hashed word and character n-grams"""
+    
+    TOKEN_PATTERN = re.compile(r"\w+")
+    
+    def __init__(self, dimensions: int = 512, char_ngram: int = 3):
+        self.dimensions = dimensions
+        self.char_ngram = char_ngram
+    
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        
+        for feature in self._features(text.lower()):
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _features(self, text: str) -> List[str]:
+        """Word unigrams plus character n-grams of each word"""
+        
+        features = []
+        for token in self.TOKEN_PATTERN.findall(text):
+            features.append(f"w:{token}")
+            padded = f"#{token}#"
+            for i in range(max(1, len(padded) - self.char_ngram + 1)):
+                features.append(f"c:{padded[i:i + self.char_ngram]}")
+        return features
+
+class VectorIndex:
+    """Bounded in-process vector index searched by brute-force cosine similarity"""
+    
+    def __init__(self, dimensions: int, max_entries: int = 10000):
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self._vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._namespaces = np.zeros(max_entries, dtype=np.int64)
+        self._last_used = np.full(max_entries, -np.inf)
+        self._expires_at = np.full(max_entries, np.inf)
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        self._payloads: List[Optional[Dict[str, Any]]] = [None] * max_entries
+    
+    def __len__(self) -> int:
+        return int(self._occupied.sum())
+    
+    def add(self, vector: np.ndarray, namespace: int, payload: Dict[str, Any], ttl: Optional[int] = None):
+        """Insert a vector, evicting the least recently used entry when full"""
+        
+        now = time.time()
+        free = np.flatnonzero(~self._occupied | (self._expires_at < now))
+        slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+        
+        self._vectors[slot] = vector
+        self._namespaces[slot] = namespace
+        self._last_used[slot] = now
+        self._expires_at[slot] = now + ttl if ttl else np.inf
+        self._occupied[slot] = True
+        self._payloads[slot] = payload
+    
+    def search(self, vector: np.ndarray, namespace: int) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return the most similar live payload in a namespace and its similarity"""
+        
+        now = time.time()
+        candidates = self._occupied & (self._namespaces == namespace) & (self._expires_at >= now)
+        if not candidates.any():
+            return None, 0.0
+        
+        scores = self._vectors @ vector
+        scores[~candidates] = -np.inf
+        slot = int(np.argmax(scores))
+        
+        self._last_used[slot] = now
+        return self._payloads[slot], float(scores[slot])
+    
+    def clear(self):
+        """Drop every entry"""
+        
+        self._occupied[:] = False
+        self._payloads = [None] * self.max_entries
+
+class SemanticLLMCache:
+    """Similarity-based LLM response cache for prompts that differ only slightly"""
+    
+    def __init__(
+        self,
+        embedder: Optional[EmbeddingFunction] = None,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        dimensions: int = 512
+    ):
+        self.embedder = embedder or HashingEmbedder(dimensions=dimensions)
+        self.threshold = threshold
+        self.index = VectorIndex(dimensions=dimensions, max_entries=max_entries)
+    
+    def build_namespace(
+        self,
+        model: str,
+        temperature: Optional[float],
+        tools: Optional[List[str]] = None,
+        template: Optional[str] = None
+    ) -> int:
+        """Hash the non-varying parts of a request so only compatible entries match"""
+        
+        key = f"{model}|{temperature}|{','.join(sorted(tools or []))}|{template}"
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little', signed=True)
+    
+    def lookup(
+        self,
+        prompt: str,
+        namespace: int,
+        threshold: Optional[float] = None
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Find a cached completion whose prompt is similar enough"""
+        
+        payload, similarity = self.index.search(self._embed(prompt), namespace)
+        if payload is None or similarity < (threshold if threshold is not None else self.threshold):
+            return None, similarity
+        return payload, similarity
+    
+    def store(self, prompt: str, namespace: int, payload: Dict[str, Any], ttl: Optional[int] = None):
+        """Add a completion to the index"""
+        
+        self.index.add(self._embed(prompt), namespace, payload, ttl=ttl)
+    
+    def _embed(self, prompt: str) -> np.ndarray:
+        """Embed a prompt as a unit vector so dot products are cosine similarities"""
+        
+        vector = np.asarray(self.embedder(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+_semantic_cache: Optional[SemanticLLMCache] = None
+
+def get_semantic_cache() -> SemanticLLMCache:
+    """Get the process-wide semantic cache, so its index serves later executions"""
+    
+    global _semantic_cache
+    if _semantic_cache is None:
+        from app.core.config import settings
+        
+        _semantic_cache = SemanticLLMCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES
+        )
+    return _semantic_cache
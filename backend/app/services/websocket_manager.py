@@ -1,11 +1,13 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from fastapi import WebSocket
 from datetime import datetime
 import uuid
 
+from app.core.serialization import json_default
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
@@ -171,7 +173,7 @@ class ConnectionManager:
         if not connections:
             return
         
-        message_str = json.dumps(message)
+        message_str = json.dumps(message, default=json_default)
         disconnected = []
         
         for websocket in connections:
@@ -185,6 +187,35 @@ class ConnectionManager:
         for websocket in disconnected:
             self.disconnect(websocket, workflow_id)
     
+    async def stream_to_workflow(
+        self,
+        workflow_id: str,
+        message: Dict,
+        send_timeout: float = 5.0
+    ):
+        """Send a streaming message to all connections concurrently
+        
+        A socket that cannot accept the message within send_timeout is
+        disconnected rather than allowed to stall the stream for others.
+        """
+        
+        connections = self.workflow_connections.get(workflow_id)
+        if not connections:
+            return
+        
+        message_str = json.dumps(message, default=json_default)
+        connections = list(connections)
+        
+        results = await asyncio.gather(
+            *(asyncio.wait_for(websocket.send_text(message_str), send_timeout) for websocket in connections),
+            return_exceptions=True
+        )
+        
+        for websocket, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Dropping slow or broken WebSocket from stream: {result!r}")
+                self.disconnect(websocket, workflow_id)
+    
     async def send_execution_update(
         self, 
         workflow_id: str, 
@@ -224,18 +255,12 @@ class ConnectionManager:
         
         return active_users
 
+_connection_manager: Optional[ConnectionManager] = None
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+def get_connection_manager() -> ConnectionManager:
+    """Get the process-wide connection manager shared by sockets and executions"""
+    
+    global _connection_manager
+    if _connection_manager is None:
+        _connection_manager = ConnectionManager()
+    return _connection_manager
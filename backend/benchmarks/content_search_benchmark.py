@@ -0,0 +1,83 @@
+"""Content search with and without the persistent content index.
+
+Builds a tree of text files (kept between runs under the given root) and
+times a content search that reads every file, the first indexed search
+(which builds the index), a repeat of it, and a repeat after a few files
+changed. Text is seeded. Run from the backend directory:
+    
+    python -m benchmarks.content_search_benchmark [files] [root]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.agents.file_handler import FileHandlerAgent
+
+SEED = 7
+FILE_CHARS = 8 * 1024
+FILES_PER_DIRECTORY = 500
+CHANGED_FILES = 20
+
+WORDS = ['order', 'invoice', 'customer', 'shipment', 'payment', 'refund', 'status', 'total', 'region', 'account']
+
+def build_tree(root: str, files: int):
+    """Files of FILE_CHARS of random words; one in a hundred mentions the search term"""
+    
+    marker = os.path.join(root, f'.tree-{files}')
+    if os.path.exists(marker):
+        return
+    rng = random.Random(SEED)
+    for number in range(files):
+        directory = os.path.join(root, f'd{number // FILES_PER_DIRECTORY:04d}')
+        os.makedirs(directory, exist_ok=True)
+        words = []
+        while sum(len(word) + 1 for word in words) < FILE_CHARS:
+            words.append(rng.choice(WORDS))
+        if number % 100 == 0:
+            words.insert(rng.randrange(len(words)), 'Chargeback')
+        with open(os.path.join(directory, f'f{number:07d}.txt'), 'w') as f:
+            f.write(' '.join(words))
+    open(marker, 'w').close()
+
+async def timed(coroutine) -> tuple:
+    started = time.perf_counter()
+    result = await coroutine
+    return result, time.perf_counter() - started
+
+async def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    root = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), 'content_search_benchmark')
+    data = os.path.join(root, 'data')
+    os.makedirs(data, exist_ok=True)
+    build_tree(data, files)
+    
+    index_path = os.path.join(root, 'content_index.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(index_path + suffix):
+            os.remove(index_path + suffix)
+    agent = FileHandlerAgent({'index_path': index_path})
+    
+    print(f"{files} files of {FILE_CHARS // 1024} KB under {data}")
+    print(f"{'search':<34} {'matches':>8} {'seconds':>8}")
+    
+    async def report(name: str, parameters: dict):
+        result, seconds = await timed(agent._search_files(data, {'content_search': 'chargeback', **parameters}))
+        print(f"{name:<34} {result['total_matches']:>8} {seconds:>8.3f}")
+    
+    await report('read every file', {})
+    await report('index: first search (builds)', {'use_index': True})
+    await report('index: repeat', {'use_index': True})
+    
+    changed = sorted(os.path.join(directory, name) for directory, _, names in os.walk(data) for name in names
+                     if name.endswith('.txt'))[:CHANGED_FILES]
+    for file_path in changed:
+        with open(file_path, 'a') as f:
+            f.write(' chargeback')
+    await report(f'index: after {CHANGED_FILES} files changed', {'use_index': True})
+    await report('index: repeat', {'use_index': True})
+
+if __name__ == '__main__':
+    asyncio.run(main())
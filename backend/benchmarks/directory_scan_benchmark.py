@@ -0,0 +1,104 @@
+"""Directory listing and search with DirectoryScanner against the os.walk scan it replaced.
+
+Builds a tree of empty files (kept between runs under the given root) and
+times a full recursive listing, a pattern search and a listing stopped by
+max_results. The legacy scan makes the same stat calls the agent used to:
+exists, stat, isfile, isdir and getsize per file. Timings are for a warm
+page cache. Run from the backend directory:
+    
+    python -m benchmarks.directory_scan_benchmark [files] [root]
+"""
+import fnmatch
+import mimetypes
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from app.services.directory_scanner import DirectoryScanner
+
+FILES_PER_DIRECTORY = 1000
+DIRECTORIES_PER_PARENT = 32
+
+def build_tree(root: str, files: int):
+    """Directories of FILES_PER_DIRECTORY files, grouped under parents, one file in ten a .csv"""
+    
+    marker = os.path.join(root, f'.tree-{files}')
+    if os.path.exists(marker):
+        return
+    for index in range(0, files, FILES_PER_DIRECTORY):
+        directory_index = index // FILES_PER_DIRECTORY
+        directory = os.path.join(
+            root, f'p{directory_index // DIRECTORIES_PER_PARENT:03d}', f'd{directory_index:05d}'
+        )
+        os.makedirs(directory, exist_ok=True)
+        for number in range(index, min(index + FILES_PER_DIRECTORY, files)):
+            extension = 'csv' if number % 10 == 0 else 'txt'
+            open(os.path.join(directory, f'f{number:07d}.{extension}'), 'w').close()
+    open(marker, 'w').close()
+
+def legacy_info(file_path: str) -> dict:
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    stat = os.stat(file_path)
+    return {
+        'path': file_path,
+        'name': os.path.basename(file_path),
+        'size': stat.st_size,
+        'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        'is_file': os.path.isfile(file_path),
+        'is_directory': os.path.isdir(file_path),
+        'mime_type': mimetypes.guess_type(file_path)[0]
+    }
+
+def legacy_list(root: str) -> int:
+    found = 0
+    for directory, dirs, filenames in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for filename in filenames:
+            if not filename.startswith('.'):
+                legacy_info(os.path.join(directory, filename))
+                found += 1
+    return found
+
+def legacy_search(root: str, pattern: str) -> int:
+    found = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            file_path = os.path.join(directory, filename)
+            if not fnmatch.fnmatch(filename, pattern):
+                continue
+            os.path.getsize(file_path)
+            legacy_info(file_path)
+            found += 1
+    return found
+
+def timed(function) -> tuple:
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    root = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), 'directory_scan_benchmark')
+    os.makedirs(root, exist_ok=True)
+    
+    _, seconds = timed(lambda: build_tree(root, files))
+    print(f"{files} files under {root} (built in {seconds:.1f} s)")
+    print(f"{'scan':<34} {'files':>9} {'seconds':>8}")
+    
+    def report(name: str, function):
+        found, seconds = timed(function)
+        print(f"{name:<34} {found:>9} {seconds:>8.2f}")
+    
+    report('list: os.walk + stat calls', lambda: legacy_list(root))
+    for workers in (1, 4, 16):
+        report(f'list: scanner, {workers} workers', lambda: len(DirectoryScanner(root, workers=workers).scan()))
+    report('search *.csv: os.walk + stat calls', lambda: legacy_search(root, '*.csv'))
+    report('search *.csv: scanner', lambda: len(DirectoryScanner(root, pattern='*.csv', include_hidden=True).scan()))
+    report('list max_results=100: scanner', lambda: len(DirectoryScanner(root, max_results=100).scan()))
+
+if __name__ == '__main__':
+    main()
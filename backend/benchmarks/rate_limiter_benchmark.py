@@ -0,0 +1,115 @@
+"""Provider 429s and tail latency with and without the LLM rate limiter.
+
+A local fake provider enforces its own requests-per-minute quota and answers
+with 429 and Retry-After when it is exceeded. Run from the backend directory:
+    
+    python -m benchmarks.rate_limiter_benchmark
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.rate_limiter import LLMRateLimiter, get_rate_limit_error_headers
+
+PROVIDER_RPM = 600
+CONCURRENT_CALLS = 650
+MAX_RETRIES = 5
+
+class FakeRateLimitError(Exception):
+    """429 raised by the fake provider"""
+    
+    status_code = 429
+    
+    def __init__(self, retry_after: float):
+        super().__init__("Rate limit exceeded")
+        self.response = type('Response', (), {
+            'status_code': 429,
+            'headers': {'retry-after': f"{retry_after:.3f}"}
+        })()
+
+class FakeProvider:
+    """Token-bucket quota with fixed completion latency, like hosted LLM APIs"""
+    
+    def __init__(self, requests_per_minute: int, latency: float = 0.05):
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.available = float(requests_per_minute)
+        self.last_refill = time.monotonic()
+        self.rejected = 0
+    
+    async def complete(self, prompt: str) -> str:
+        now = time.monotonic()
+        refill = (now - self.last_refill) * self.requests_per_minute / 60
+        self.available = min(self.requests_per_minute, self.available + refill)
+        self.last_refill = now
+        
+        if self.available < 1:
+            self.rejected += 1
+            raise FakeRateLimitError((1 - self.available) * 60 / self.requests_per_minute)
+        
+        self.available -= 1
+        await asyncio.sleep(self.latency)
+        return f"completion for {prompt}"
+
+async def call_without_limiter(provider: FakeProvider, prompt: str):
+    """Naive client retrying with jittered exponential backoff"""
+    
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await provider.complete(prompt)
+        except FakeRateLimitError:
+            await asyncio.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+    return None
+
+async def call_with_limiter(provider: FakeProvider, limiter: LLMRateLimiter, prompt: str, priority: int):
+    """Client going through the limiter and honouring Retry-After"""
+    
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire('fake', 'model', tokens=10, priority=priority)
+        try:
+            return await provider.complete(prompt)
+        except Exception as e:
+            headers = get_rate_limit_error_headers(e)
+            await limiter.report_rate_limit('fake', 'model', headers=headers)
+    return None
+
+async def measure(label: str, make_call):
+    """Run the concurrent calls and print rejection and latency figures"""
+    
+    provider = FakeProvider(PROVIDER_RPM)
+    latencies = {}
+    
+    async def timed(i):
+        started = time.monotonic()
+        result = await make_call(provider, i)
+        latencies.setdefault(i % 3, []).append((time.monotonic() - started, result is not None))
+    
+    await asyncio.gather(*(timed(i) for i in range(CONCURRENT_CALLS)))
+    
+    results = [item for group in latencies.values() for item in group]
+    durations = sorted(duration for duration, _ in results)
+    completed = sum(1 for _, ok in results if ok)
+    by_priority = ' '.join(
+        f"p{priority}={statistics.mean(d for d, _ in latencies[priority]):.2f}s"
+        for priority in sorted(latencies, reverse=True)
+    )
+    print(
+        f"{label:<14} completed={completed}/{CONCURRENT_CALLS} 429s={provider.rejected} "
+        f"p50={statistics.median(durations):.2f}s max={durations[-1]:.2f}s mean by priority: {by_priority}"
+    )
+
+async def main():
+    await measure(
+        'no limiter',
+        lambda provider, i: call_without_limiter(provider, f"prompt {i}")
+    )
+    
+    limiter = LLMRateLimiter(requests_per_minute=PROVIDER_RPM, tokens_per_minute=1_000_000)
+    await measure(
+        'with limiter',
+        lambda provider, i: call_with_limiter(provider, limiter, f"prompt {i}", priority=i % 3)
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Lookup latency of the semantic LLM cache against index size.
+
+Run from the backend directory:
+    
+    python -m benchmarks.semantic_cache_benchmark
+"""
+import statistics
+import time
+
+from app.services.semantic_cache import SemanticLLMCache
+
+INDEX_SIZES = [1_000, 10_000, 50_000, 100_000]
+LOOKUPS = 200
+
+def build_cache(size: int) -> SemanticLLMCache:
+    """Fill a cache with templated prompts"""
+    
+    cache = SemanticLLMCache(max_entries=size)
+    namespace = cache.build_namespace('gpt-4', 0.1)
+    
+    for i in range(size):
+        prompt = f"Summarize the support ticket #{i} opened on 2024-01-{i % 28 + 1:02d} by customer {i * 7}"
+        cache.store(prompt, namespace, {'output': f"summary {i}", 'tokens': 100, 'latency': 1.0})
+    
+    return cache
+
+def run():
+    """Print lookup latency percentiles per index size"""
+    
+    print(f"{'entries':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    
+    for size in INDEX_SIZES:
+        cache = build_cache(size)
+        namespace = cache.build_namespace('gpt-4', 0.1)
+        timings = []
+        
+        for i in range(LOOKUPS):
+            prompt = f"Summarize the support ticket #{i * 13} opened on 2024-02-{i % 28 + 1:02d} by customer {i}"
+            started = time.perf_counter()
+            cache.lookup(prompt, namespace)
+            timings.append((time.perf_counter() - started) * 1000)
+        
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{size:>10} {p50:>10.3f} {p99:>10.3f}")
+
+if __name__ == "__main__":
+    run()
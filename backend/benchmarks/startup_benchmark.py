@@ -0,0 +1,73 @@
+"""Startup-time budget check for the API entry point.
+
+Imports main.py and the execution engine in a fresh interpreter, then fails
+if the import took longer than the budget or pulled in an agent framework or
+data library that should only load on first use. Run from the backend
+directory:
+    
+    python -m benchmarks.startup_benchmark [budget_seconds]
+"""
+import json
+import subprocess
+import sys
+
+DEFAULT_BUDGET_SECONDS = 3.0
+
+# Modules that must not be imported until an agent actually needs them
+LAZY_MODULES = [
+    'langchain',
+    'crewai',
+    'pandas',
+    'numpy',
+    'psycopg2',
+    'pymysql',
+    'aiofiles',
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+import app.services.execution_engine
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'seconds': elapsed,
+    'loaded': [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+def measure(runs: int = 3) -> dict:
+    """Import main.py in fresh interpreters and keep the fastest run"""
+    
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    
+    return min(results, key=lambda result: result['seconds'])
+
+def run(budget: float = DEFAULT_BUDGET_SECONDS) -> int:
+    """Print import time and return a non-zero exit code when over budget"""
+    
+    result = measure()
+    print(f"main.py import: {result['seconds']:.3f}s (budget {budget:.3f}s)")
+    
+    failures = []
+    if result['seconds'] > budget:
+        failures.append(f"import time {result['seconds']:.3f}s exceeds budget {budget:.3f}s")
+    if result['loaded']:
+        failures.append(f"eagerly imported: {', '.join(result['loaded'])}")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_SECONDS
+    sys.exit(run(budget))
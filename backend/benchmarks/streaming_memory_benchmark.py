@@ -0,0 +1,103 @@
+"""Peak memory of DataProcessorAgent in-memory vs chunked streaming execution.
+
+Writes a seeded CSV file, then runs a filter + group_by pipeline over it in a
+fresh interpreter per mode and reports wall time and peak RSS. The in-memory
+mode passes the CSV text as `data`, the streaming mode passes `source_path`.
+Modes that run out of memory are reported as failed. Run from the backend
+directory:
+    
+    python -m benchmarks.streaming_memory_benchmark [rows] [chunk_size]
+"""
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROWS = 10_000_000
+WRITE_BATCH = 1_000_000
+
+PIPELINE = {
+    'operation': 'filter',
+    'parameters': {'conditions': [
+        {'column': 'amount', 'operator': 'greater_than', 'value': 20},
+        {'column': 'region', 'operator': 'not_equals', 'value': 'west'},
+    ]},
+    'pipeline': [{'operation': 'group_by', 'parameters': {
+        'group_by': 'region',
+        'aggregations': {'count': 'size', 'stats': {'amount': 'sum', 'quantity': 'mean'}}
+    }}]
+}
+
+def write_csv(path: str, rows: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    regions = np.array(['east', 'west', 'north', 'south'])
+    for offset in range(0, rows, WRITE_BATCH):
+        size = min(WRITE_BATCH, rows - offset)
+        pd.DataFrame({
+            'id': np.arange(offset, offset + size),
+            'region': regions[rng.integers(0, len(regions), size)],
+            'amount': rng.lognormal(3, 1, size).round(2),
+            'quantity': rng.integers(1, 20, size),
+        }).to_csv(path, mode='a', header=offset == 0, index=False)
+
+async def run_child(mode: str, path: str, chunk_size: int):
+    from app.agents.data_processor import DataProcessorAgent
+    
+    agent = DataProcessorAgent({})
+    request = json.loads(json.dumps(PIPELINE))
+    started = time.perf_counter()
+    
+    if mode == 'streaming':
+        request['source_path'] = path
+        request['parameters']['chunk_size'] = chunk_size
+    else:
+        with open(path) as f:
+            request['data'] = f.read()
+    
+    result = await agent.execute(request, None)
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'groups': len(result['output']['data'])
+    }))
+
+def measure(mode: str, path: str, chunk_size: int) -> dict:
+    child = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.streaming_memory_benchmark', '--child', mode, path, str(chunk_size)],
+        capture_output=True,
+        text=True
+    )
+    if child.returncode != 0:
+        return {'error': (child.stderr.strip().splitlines() or [f"exit code {child.returncode}"])[-1]}
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        asyncio.run(run_child(sys.argv[2], sys.argv[3], int(sys.argv[4])))
+        return
+    
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rows.csv')
+        write_csv(path, rows)
+        print(f"{rows} rows, {os.path.getsize(path) / 1024 / 1024:.0f} MB CSV, chunk size {chunk_size}")
+        print(f"{'mode':<10} {'seconds':>8} {'peak RSS MB':>12}")
+        
+        for mode in ('memory', 'streaming'):
+            result = measure(mode, path, chunk_size)
+            if 'error' in result:
+                print(f"{mode:<10} failed: {result['error']}")
+            else:
+                print(f"{mode:<10} {result['seconds']:>8.1f} {result['peak_rss_mb']:>12.0f}")
+
+if __name__ == '__main__':
+    main()
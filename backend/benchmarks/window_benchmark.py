@@ -0,0 +1,82 @@
+"""Window operation timings on frames of millions of rows.
+
+Times each window function through the pandas and Polars engines of
+DataProcessorAgent, and a running mean against the per-partition
+`groupby().apply` it replaces. Data is seeded. Run from the backend
+directory:
+    
+    python -m benchmarks.window_benchmark [rows] [partitions]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.polars_engine import PolarsDataEngine
+
+SEED = 7
+
+WINDOWS = [
+    ('running sum', {'function': 'sum', 'column': 'amount'}),
+    ('running max', {'function': 'max', 'column': 'amount'}),
+    ('rolling mean 7', {'function': 'mean', 'column': 'amount', 'frame': {'preceding': 6}, 'target_column': 'mean_7'}),
+    ('centered std 5', {'function': 'std', 'column': 'amount', 'frame': {'preceding': 2, 'following': 2}}),
+    ('partition mean', {'function': 'mean', 'column': 'amount', 'frame': {'preceding': None, 'following': None}}),
+    ('lag', {'function': 'lag', 'column': 'amount'}),
+    ('diff', {'function': 'diff', 'column': 'quantity'}),
+    ('row_number', {'function': 'row_number'}),
+    ('rank', {'function': 'rank', 'column': 'amount', 'ascending': False}),
+]
+
+def make_frame(rows: int, partitions: int) -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    amount = rng.lognormal(3, 1, rows).round(2)
+    amount[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'account': rng.integers(0, partitions, rows),
+        'ts': rng.permutation(rows),
+        'amount': amount,
+        'quantity': rng.integers(1, 20, rows),
+    })
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    partitions = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    df = make_frame(rows, partitions)
+    # Built from the arrays, as from_pandas needs pyarrow; NaN is missing as in pandas
+    pl_df = pl.DataFrame({column: df[column].to_numpy() for column in df.columns}, nan_to_null=True)
+    agent = DataProcessorAgent({})
+    engine = PolarsDataEngine()
+    base = {'partition_by': 'account', 'order_by': 'ts'}
+    
+    print(f"{rows} rows, {partitions} partitions")
+    print(f"{'window':<16} {'pandas ms':>10} {'polars ms':>10}")
+    for name, window in WINDOWS:
+        parameters = {**base, 'windows': [window]}
+        pandas_ms = timed(lambda: agent._window_data(df, parameters))
+        polars_ms = timed(lambda: engine.execute(pl_df, 'window', parameters))
+        print(f"{name:<16} {pandas_ms:>10.1f} {polars_ms:>10.1f}")
+    
+    parameters = {**base, 'windows': [window for _, window in WINDOWS]}
+    pandas_ms = timed(lambda: agent._window_data(df, parameters))
+    polars_ms = timed(lambda: engine.execute(pl_df, 'window', parameters))
+    print(f"{'all together':<16} {pandas_ms:>10.1f} {polars_ms:>10.1f}")
+    
+    # What a window used to take: a Python call per partition
+    def per_partition():
+        ordered = df.sort_values('ts')
+        ordered.groupby('account', group_keys=False)['amount'].apply(lambda part: part.expanding().mean())
+    
+    vectorized_ms = timed(lambda: agent._window_data(df, {**base, 'windows': [{'function': 'mean', 'column': 'amount'}]}))
+    print(f"\nrunning mean: groupby().apply {timed(per_partition):.1f} ms, window {vectorized_ms:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,13 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     logger.info("🛑 Shutting down AgentFlow API...")
+    
+    # Close pooled agents and the LLM cache shared by every execution
+    from app.services.agent_pool import get_agent_pool
+    from app.services.llm_cache import close_llm_cache
+    await get_agent_pool().close()
+    await close_llm_cache()
+    
     logger.info("✅ AgentFlow API shutdown complete")
 
 # Create FastAPI app
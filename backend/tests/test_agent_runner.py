@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services.agent_pool import get_agent_pool
+from app.services.agent_runner import AgentRunner
+from app.services.llm_providers import MockChatModel
+from app.services.mock_llm import MockLLMProvider
+
+def make_context(execution_id: str) -> SimpleNamespace:
+    return SimpleNamespace(workflow_id='test', execution_id=execution_id, config={}, metrics={})
+
+async def run_execution(execution_id: str, agent_type: str, config: dict, input_data: dict):
+    # The API builds a new engine, and so a new runner, for every execution
+    runner = AgentRunner(llm=MockChatModel(provider=MockLLMProvider(latency_ms=0), model_name='mock-gpt-4'))
+    await runner.initialize()
+    try:
+        return runner, await runner.execute_agent(agent_type, config, input_data, make_context(execution_id))
+    finally:
+        await runner.cleanup()
+
+def test_pooled_agents_are_reused_by_later_executions():
+    async def run():
+        config = {'pool_test': 'reuse'}
+        input_data = {'data': [{'a': 1}], 'operation': 'clean', 'parameters': {}}
+        
+        first_runner, _ = await run_execution('first', 'data_processor', config, input_data)
+        hits = get_agent_pool().get_stats()['hits']
+        second_runner, _ = await run_execution('second', 'data_processor', config, input_data)
+        return first_runner, second_runner, get_agent_pool().get_stats()['hits'] - hits
+    
+    first_runner, second_runner, new_hits = asyncio.run(run())
+    assert first_runner.agent_pool is second_runner.agent_pool is get_agent_pool()
+    assert new_hits == 1
+
+def test_llm_responses_are_cached_across_executions():
+    async def run():
+        config = {'input_template': '{prompt}'}
+        input_data = {'prompt': 'Summarize the quarterly cache report'}
+        
+        _, first = await run_execution('first', 'llm_text_generator', config, input_data)
+        _, second = await run_execution('second', 'llm_text_generator', config, input_data)
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first['metadata']['llm_cache'] == {'hit': False}
+    assert second['metadata']['llm_cache']['hit'] is True
+    assert second['output'] == first['output']
+
+def test_semantic_cache_index_serves_later_executions(monkeypatch):
+    monkeypatch.setattr(settings, 'SEMANTIC_CACHE_ENABLED', True)
+    
+    async def run():
+        config = {'input_template': 'Answer briefly: {question}', 'semantic_cache': True}
+        
+        _, first = await run_execution(
+            'first', 'llm_text_generator', config, {'question': 'How do I reset my account password?'}
+        )
+        _, second = await run_execution(
+            'second', 'llm_text_generator', config, {'question': 'How do I reset my account password'}
+        )
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first['metadata']['llm_cache'] == {'hit': False}
+    assert second['metadata']['llm_cache']['tier'] == 'semantic'
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+
+CHUNK_SIZE = 37
+
+def make_rows(count: int = 500, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(0, 100, count).astype(float)
+    amounts[rng.random(count) < 0.05] = np.nan
+    rows = [
+        {'region': ['north', 'south', 'east'][i % 3], 'product': f"p{i % 7}", 'amount': amount, 'units': int(i % 11)}
+        for i, amount in enumerate(amounts)
+    ]
+    # Duplicates that straddle chunk boundaries
+    return rows + rows[:60]
+
+ROWS = make_rows()
+
+def process(data, pipeline: list, **options) -> dict:
+    first, rest = pipeline[0], pipeline[1:]
+    agent = DataProcessorAgent({})
+    input_data = {
+        'data': data,
+        'operation': first['operation'],
+        'parameters': {**first['parameters'], **options},
+        'pipeline': rest
+    }
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    return asyncio.run(agent.execute(input_data, context))
+
+def frame(result: dict) -> pd.DataFrame:
+    return pd.DataFrame(result['output']['data'])
+
+def assert_streaming_matches_in_memory(pipeline: list, data=ROWS):
+    expected = frame(process(data, pipeline))
+    streamed = process(data, pipeline, streaming=True, chunk_size=CHUNK_SIZE)
+    pd.testing.assert_frame_equal(frame(streamed), expected, check_dtype=False)
+    return streamed
+
+FILTER = {'operation': 'filter', 'parameters': {
+    'conditions': [{'column': 'units', 'operator': 'greater_than', 'value': 2}]
+}}
+TRANSFORM = {'operation': 'transform', 'parameters': {
+    'transformations': [{'column': 'amount', 'operation': 'multiply', 'value': 2, 'target_column': 'doubled'}]
+}}
+CLEAN = {'operation': 'clean', 'parameters': {'operations': ['remove_duplicates', 'handle_missing']}}
+
+@pytest.mark.parametrize('pipeline', [
+    [FILTER],
+    [FILTER, TRANSFORM],
+    [CLEAN],
+    [{'operation': 'clean', 'parameters': {
+        'operations': ['handle_missing'], 'missing_strategy': 'forward_fill'
+    }}],
+    [{'operation': 'sample', 'parameters': {'method': 'head', 'size': 90}}],
+    [{'operation': 'sample', 'parameters': {'method': 'tail', 'size': 90}}],
+], ids=['filter', 'filter-transform', 'clean', 'forward-fill', 'head', 'tail'])
+def test_streamed_row_stages_match_in_memory(pipeline):
+    assert_streaming_matches_in_memory(pipeline)
+
+@pytest.mark.parametrize('aggregations', [
+    {'total': {'amount': 'sum'}},
+    {'amount': {'amount': 'mean'}, 'units': {'units': 'max'}},
+    {'count': 'size'},
+    {'sum': 'units', 'count': 'amount'},
+    {'min': 'units', 'max': 'amount'},
+])
+def test_group_by_merges_chunk_partials(aggregations):
+    group_by = {'operation': 'group_by', 'parameters': {'group_by': ['region', 'product'], 'aggregations': aggregations}}
+    assert_streaming_matches_in_memory([FILTER, CLEAN, group_by])
+
+def test_aggregate_merges_chunk_partials():
+    aggregate = {'operation': 'aggregate', 'parameters': {
+        'aggregations': {'amount': ['sum', 'mean', 'min', 'max', 'count'], 'units': 'sum'}
+    }}
+    assert_streaming_matches_in_memory([FILTER, aggregate])
+
+def test_stages_after_the_first_whole_frame_stage_run_in_memory():
+    sort = {'operation': 'sort', 'parameters': {'sort_by': ['amount', 'units', 'region', 'product']}}
+    head = {'operation': 'sample', 'parameters': {'method': 'head', 'size': 10}}
+    streamed = assert_streaming_matches_in_memory([FILTER, sort, head])
+    
+    filter_stage, sort_stage, head_stage = streamed['stages']
+    assert filter_stage['metadata']['streaming'] is True
+    assert filter_stage['metadata']['chunks'] == -(-len(ROWS) // CHUNK_SIZE)
+    assert 'streaming' not in sort_stage['metadata']
+    assert head_stage['variables']['processed_rows'] == 10
+
+def test_random_sample_is_a_seeded_subset():
+    sample = [{'operation': 'sample', 'parameters': {'method': 'random', 'size': 50, 'random_state': 3}}]
+    first = frame(process(ROWS, sample, streaming=True, chunk_size=CHUNK_SIZE))
+    second = frame(process(ROWS, sample, streaming=True, chunk_size=CHUNK_SIZE))
+    
+    assert len(first) == 50
+    pd.testing.assert_frame_equal(first, second)
+    # Every sampled row comes from the input
+    assert len(first.merge(pd.DataFrame(ROWS).drop_duplicates(), how='inner')) == 50
+
+@pytest.mark.parametrize('extension', ['csv', 'tsv', 'jsonl'])
+def test_source_files_stream_like_in_memory_data(tmp_path, extension):
+    df = pd.DataFrame(ROWS)
+    path = tmp_path / f"rows.{extension}"
+    if extension == 'jsonl':
+        df.to_json(path, orient='records', lines=True)
+    else:
+        df.to_csv(path, sep='\t' if extension == 'tsv' else ',', index=False)
+    
+    pipeline = [FILTER, {'operation': 'group_by', 'parameters': {
+        'group_by': 'region', 'aggregations': {'total': {'units': 'sum'}}
+    }}]
+    agent = DataProcessorAgent({})
+    input_data = {
+        'source_path': str(path),
+        'operation': 'filter',
+        'parameters': {**FILTER['parameters'], 'chunk_size': CHUNK_SIZE},
+        'pipeline': pipeline[1:]
+    }
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    from_file = frame(asyncio.run(agent.execute(input_data, context)))
+    pd.testing.assert_frame_equal(from_file, frame(process(ROWS, pipeline)), check_dtype=False)
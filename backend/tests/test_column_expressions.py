@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.column_expressions import compile_expressions
+from app.agents.data_processor import DataProcessorAgent
+from app.services.expressions import ExpressionError
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    return make_frame(
+        'name', rows=500,
+        price=lambda rng, rows: np.where(rng.random(rows) < 0.05, np.nan, rng.uniform(1, 50, rows).round(2)),
+        qty=lambda rng, rows: rng.integers(1, 20, rows),
+        discount=lambda rng, rows: rng.choice([0.0, 0.1, 0.25], rows),
+        **{'unit cost': lambda rng, rows: rng.uniform(0.5, 30, rows).round(2)},
+    )
+
+def assert_column_equal(actual: pd.Series, expected) -> None:
+    expected = pd.Series(expected, index=actual.index, name=actual.name)
+    pd.testing.assert_series_equal(actual, expected, check_dtype=False)
+
+def transform(df: pd.DataFrame, expression: str, target_column: str = None) -> pd.DataFrame:
+    parameters = {'transformations': [{'operation': 'expression', 'expression': expression, 'target_column': target_column}]}
+    return DataProcessorAgent({})._transform_data(df, parameters)
+
+CASES = {
+    'arithmetic': (
+        'revenue = price * qty * (1 - discount)',
+        lambda df: {'revenue': df['price'] * df['qty'] * (1 - df['discount'])},
+    ),
+    'chained-assignments': (
+        'gross = price * qty; net = gross - gross * discount\nshare = net / gross',
+        lambda df: {
+            'gross': df['price'] * df['qty'],
+            'net': df['price'] * df['qty'] - df['price'] * df['qty'] * df['discount'],
+            'share': 1 - df['discount'].where(df['price'].notna()),
+        },
+    ),
+    'backticks': (
+        'margin = price - `unit cost`',
+        lambda df: {'margin': df['price'] - df['unit cost']},
+    ),
+    'comparisons': (
+        'mid = 10 <= price < 30; bulk = qty >= 10 and not discount == 0',
+        lambda df: {
+            'mid': (df['price'] >= 10) & (df['price'] < 30),
+            'bulk': (df['qty'] >= 10) & ~(df['discount'] == 0),
+        },
+    ),
+    'conditional': (
+        'tier = "high" if price > 25 else "low"',
+        lambda df: {'tier': np.where(df['price'] > 25, 'high', 'low')},
+    ),
+    'functions': (
+        'a = sqrt(abs(price - 25)); b = floor(log10(qty * 100)); c = fillna(price, 0); d = where(isnull(price), -1, ceil(price))',
+        lambda df: {
+            'a': np.sqrt((df['price'] - 25).abs()),
+            'b': np.floor(np.log10(df['qty'] * 100)),
+            'c': df['price'].fillna(0),
+            'd': np.where(df['price'].isna(), -1, np.ceil(df['price'])),
+        },
+    ),
+    'strings': (
+        'loud = upper(name); quiet = lower(name)',
+        lambda df: {'loud': df['name'].str.upper(), 'quiet': df['name'].str.lower()},
+    ),
+}
+
+@pytest.mark.parametrize('name', CASES.keys())
+def test_expressions_match_hand_written_pandas(df, name):
+    expression, expected = CASES[name]
+    result = transform(df, expression)
+    
+    for column, values in expected(df).items():
+        assert_column_equal(result[column], values)
+    # Input columns are left alone
+    pd.testing.assert_frame_equal(result[df.columns], df)
+
+def test_bare_expression_uses_the_target_column(df):
+    result = transform(df, 'price * 2', target_column='doubled')
+    pd.testing.assert_series_equal(result['doubled'], df['price'] * 2, check_names=False)
+
+@pytest.mark.parametrize('expression', [
+    'x = price.__class__',
+    'x = name[0]',
+    'x = __import__("os").system("true")',
+    'x = (lambda: 1)()',
+    'x = [price]',
+    'x = "a" * 10 ** 9',
+    'x = round(price)',
+    'x = sqrt(price, 2)',
+    'x = fillna(price=price, fill=0)',
+    'x, y = price, qty',
+    'price * 2',
+    'import os',
+    '',
+    'x = ' + '1 + ' * 2000 + '1',
+])
+def test_unsafe_or_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ExpressionError):
+        compile_expressions(expression)
+
+def test_unknown_columns_and_type_errors_raise_expression_errors(df):
+    with pytest.raises(ExpressionError, match="Unknown column 'cost'"):
+        transform(df, 'margin = price - cost')
+    with pytest.raises(ExpressionError, match="Cannot compute 'bad'"):
+        transform(df, 'bad = name - price')
+
+def test_integer_constants_do_not_grow_without_bound(df):
+    # NumPy scalars wrap around (with a warning) instead of building a huge Python int
+    with pytest.warns(RuntimeWarning, match='overflow'):
+        result = transform(df.head(3), 'big = 2 ** 62 * 4')
+    assert result['big'].dtype == np.int64
+
+def test_compiled_expressions_are_cached():
+    assert compile_expressions('x = price + 1') is compile_expressions('x = price + 1')
+
+def run(df: pd.DataFrame, engine: str, expression: str, **options) -> pd.DataFrame:
+    agent = DataProcessorAgent({})
+    input_data = {
+        'data': df.to_dict('records'),
+        'operation': 'transform',
+        'parameters': {
+            'transformations': [{'operation': 'expression', 'expression': expression}],
+            'engine': engine,
+            **options
+        }
+    }
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    return pd.DataFrame(asyncio.run(agent.execute(input_data, context))['output']['data'])
+
+@pytest.mark.parametrize('name', ['arithmetic', 'chained-assignments', 'backticks', 'comparisons', 'strings'])
+def test_polars_and_streaming_match_the_pandas_engine(df, name):
+    expression, _ = CASES[name]
+    expected = run(df, 'pandas', expression)
+    
+    pd.testing.assert_frame_equal(run(df, 'pandas', expression, streaming=True, chunk_size=64), expected)
+    polars = run(df, 'polars', expression)
+    for column in expected.columns:
+        assert_column_equal(polars[column], expected[column])
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.file_handler import FileHandlerAgent
+from app.core.serialization import dumps
+from app.services.columnar import ColumnarTable, to_jsonable
+
+RECORDS = [
+    {'id': 1, 'name': 'alpha', 'score': 0.5, 'active': True},
+    {'id': 2, 'name': 'beta', 'score': None, 'active': False},
+    {'id': 3, 'name': 'gamma', 'score': 2.25, 'active': True},
+]
+
+def make_context() -> SimpleNamespace:
+    return SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+
+def test_records_round_trip():
+    table = ColumnarTable.from_records(RECORDS)
+    assert table.to_records() == RECORDS
+    assert table.num_rows == len(table) == 3
+    assert table.columns == ['id', 'name', 'score', 'active']
+    assert ColumnarTable.from_records([]).num_rows == 0
+
+def test_table_reads_like_a_list_of_rows():
+    table = ColumnarTable.from_records(RECORDS)
+    assert table[0] == RECORDS[0]
+    assert table[-1]['name'] == 'gamma'
+    assert table[1:] == RECORDS[1:]
+    assert table['name'] == ['alpha', 'beta', 'gamma']
+    assert list(table) == RECORDS
+    assert table == RECORDS
+    assert table == ColumnarTable.from_records(RECORDS)
+    assert str(table) == str(RECORDS)
+    with pytest.raises(KeyError):
+        table['missing']
+
+def test_rows_are_materialized_once():
+    table = ColumnarTable.from_records(RECORDS)
+    assert table.to_records() is table.to_records()
+
+def test_from_rows_matches_from_records():
+    rows = [tuple(record.values()) for record in RECORDS]
+    assert ColumnarTable.from_rows(rows, list(RECORDS[0])) == ColumnarTable.from_records(RECORDS)
+    assert ColumnarTable.from_rows([], ['id', 'name']).columns == ['id', 'name']
+
+def test_pandas_round_trip_keeps_values_and_missing_entries():
+    df = pd.DataFrame({
+        'id': np.arange(5),
+        'value': [1.5, np.nan, 3.0, np.nan, 5.5],
+        'label': ['a', 'b', None, 'd', 'e'],
+    })
+    table = ColumnarTable.from_pandas(df)
+    assert table['value'] == [1.5, None, 3.0, None, 5.5]
+    assert table['label'] == ['a', 'b', None, 'd', 'e']
+    pd.testing.assert_frame_equal(table.to_pandas(), df, check_dtype=False)
+
+def test_csv_parsing_produces_typed_columns():
+    table = ColumnarTable.from_csv('id,price,name\n1,2.5,apple\n2,3.75,pear\n')
+    assert table.to_records() == [
+        {'id': 1, 'price': 2.5, 'name': 'apple'},
+        {'id': 2, 'price': 3.75, 'name': 'pear'},
+    ]
+    assert ColumnarTable.from_csv(table.to_csv()) == table
+
+def test_ipc_round_trip():
+    table = ColumnarTable.from_records(RECORDS)
+    assert ColumnarTable.from_ipc(table.to_ipc()) == table
+
+def test_json_boundary_converts_tables_and_scalars():
+    table = ColumnarTable.from_records(RECORDS)
+    payload = {'output': {'data': table, 'day': date(2024, 5, 1), 'total': Decimal('1.5'), 'n': np.int64(3)}}
+    assert json.loads(dumps(payload)) == {
+        'output': {'data': RECORDS, 'day': '2024-05-01', 'total': 1.5, 'n': 3}
+    }
+    assert to_jsonable({'results': [table, (1, 2)]}) == {'results': [RECORDS, [1, 2]]}
+    assert json.loads(table.to_json()) == RECORDS
+
+def test_serialization_does_not_import_the_services():
+    code = "import sys, app.core.serialization; print(sorted(m for m in sys.modules if m.startswith('app.services')))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+def test_data_processor_table_output_matches_records():
+    def run(data, output_format: str) -> dict:
+        agent = DataProcessorAgent({})
+        input_data = {
+            'data': data,
+            'operation': 'sort',
+            'parameters': {'sort_by': 'id', 'ascending': False, 'output_format': output_format},
+        }
+        return asyncio.run(agent.execute(input_data, make_context()))['output']['data']
+    
+    # pandas turns a missing float into NaN and the table into null, so compare complete rows
+    rows = [{**row, 'score': row['score'] or 0.0} for row in RECORDS]
+    records = run(rows, 'records')
+    table = run(rows, 'table')
+    assert isinstance(table, ColumnarTable)
+    assert json.loads(dumps(table)) == json.loads(dumps(records))
+    # A table from an upstream node is consumed as is
+    assert json.loads(dumps(run(table, 'records'))) == json.loads(dumps(records))
+
+def test_file_handler_reads_and_writes_tables(tmp_path):
+    path = tmp_path / 'rows.csv'
+    path.write_text('id,name\n1,alpha\n2,beta\n')
+    agent = FileHandlerAgent({})
+    
+    def run(input_data: dict) -> dict:
+        return asyncio.run(agent.execute(input_data, make_context()))['output']
+    
+    records = run({'operation': 'read', 'file_path': str(path)})['content']
+    table = run({'operation': 'read', 'file_path': str(path), 'parameters': {'output_format': 'table'}})['content']
+    assert isinstance(table, ColumnarTable)
+    # CSV records are strings, the table keeps the parsed types
+    assert [{key: str(value) for key, value in row.items()} for row in table] == records
+    
+    for file_format in ('csv', 'json'):
+        run({
+            'operation': 'write',
+            'file_path': str(tmp_path / f"out.{file_format}"),
+            'content': table,
+            'parameters': {'format': file_format}
+        })
+    assert ColumnarTable.from_csv((tmp_path / 'out.csv').read_text()) == table
+    assert json.loads((tmp_path / 'out.json').read_text()) == table.to_records()
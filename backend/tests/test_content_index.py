@@ -0,0 +1,137 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.file_handler import FileHandlerAgent
+from app.services.content_index import ContentIndex, get_content_index
+from app.services.directory_scanner import DirectoryScanner
+
+CONTEXT = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+
+WORDS = ['alpha', 'Bravo', 'charlie', 'delta "quoted"', 'echo-foxtrot', 'golf_hotel', 'Straße']
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / 'docs'
+    for group in range(3):
+        directory = root / f"group{group}"
+        directory.mkdir(parents=True)
+        for i in range(20):
+            words = [WORDS[(i + j * group) % len(WORDS)] for j in range(1, 4)]
+            (directory / f"note{i}.txt").write_text(f"note {group}-{i}: " + ' '.join(words), encoding='utf-8')
+    # A sibling whose name shares the prefix of a searched directory
+    (root / 'group10').mkdir()
+    (root / 'group10' / 'other.txt').write_text('alpha alpha')
+    (root / 'binary.bin').write_bytes(b'\xff\xfe alpha \x00')
+    return root
+
+@pytest.fixture
+def index(tmp_path):
+    index = ContentIndex(str(tmp_path / 'index' / 'content.db'))
+    yield index
+    index.close()
+
+def files(directory) -> list:
+    return DirectoryScanner(str(directory), include_hidden=True).scan()
+
+def substring_matches(directory, text: str) -> set:
+    """Paths a full read of every file finds"""
+    
+    found = set()
+    for entry in files(directory):
+        try:
+            with open(entry['path'], encoding='utf-8') as f:
+                if text.lower() in f.read().lower():
+                    found.add(os.path.abspath(entry['path']))
+        except UnicodeDecodeError:
+            pass
+    return found
+
+@pytest.mark.parametrize('text', ['alpha', 'ALPHA', 'bravo charlie', 'delta "quoted"', '-fox', 'note 1-1', 'ra', 'e', 'straße', 'zulu'])
+def test_search_matches_a_substring_test_of_every_file(docs, index, text):
+    index.refresh(str(docs), files(docs), complete=True)
+    assert index.search(text, str(docs)) == substring_matches(docs, text)
+
+def test_search_is_limited_to_the_directory(docs, index):
+    index.refresh(str(docs), files(docs), complete=True)
+    found = index.search('alpha', str(docs / 'group1'))
+    
+    assert found == substring_matches(docs / 'group1', 'alpha')
+    assert all(path.startswith(str(docs / 'group1') + os.sep) for path in found)
+
+def test_refresh_only_reads_changed_files(docs, index):
+    assert index.refresh(str(docs), files(docs)) == {'indexed': 62, 'unchanged': 0, 'removed': 0}
+    assert index.refresh(str(docs), files(docs)) == {'indexed': 0, 'unchanged': 62, 'removed': 0}
+    
+    (docs / 'group0' / 'note0.txt').write_text('zulu now')
+    os.remove(docs / 'group2' / 'note5.txt')
+    # Without complete, files missing from the list are kept
+    assert index.refresh(str(docs), files(docs)) == {'indexed': 1, 'unchanged': 60, 'removed': 0}
+    assert index.refresh(str(docs), files(docs), complete=True) == {'indexed': 0, 'unchanged': 61, 'removed': 1}
+    
+    assert index.search('zulu', str(docs)) == {str(docs / 'group0' / 'note0.txt')}
+    assert index.search('note 2-5', str(docs)) == set()
+
+def test_unreadable_files_never_match_until_they_change(docs, index):
+    binary = docs / 'binary.bin'
+    index.refresh(str(docs), files(docs))
+    assert str(binary) not in index.search('alpha', str(docs))
+    
+    binary.write_text('alpha, now as text')
+    index.refresh(str(docs), files(docs))
+    assert str(binary) in index.search('alpha', str(docs))
+
+def test_the_index_persists_across_connections(docs, tmp_path):
+    path = str(tmp_path / 'persisted.db')
+    first = ContentIndex(path)
+    first.refresh(str(docs), files(docs))
+    first.close()
+    
+    second = ContentIndex(path)
+    assert second.refresh(str(docs), files(docs))['indexed'] == 0
+    assert second.search('charlie', str(docs)) == substring_matches(docs, 'charlie')
+    second.close()
+
+def test_indexes_are_shared_per_path(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    assert get_content_index(path) is get_content_index(os.path.relpath(path))
+
+def search(agent: FileHandlerAgent, directory, **parameters) -> dict:
+    input_data = {'operation': 'search', 'parameters': {'directory': str(directory), **parameters}}
+    return asyncio.run(agent.execute(input_data, CONTEXT))['output']
+
+@pytest.mark.parametrize('parameters', [
+    {'content_search': 'alpha'},
+    {'content_search': 'Bravo', 'pattern': 'note1*'},
+    {'content_search': 'golf', 'file_types': ['.txt'], 'max_results': 4},
+], ids=['all', 'pattern', 'max_results'])
+def test_indexed_search_matches_direct_search(docs, tmp_path, parameters):
+    agent = FileHandlerAgent({'index_path': str(tmp_path / 'agent.db')})
+    direct = search(agent, docs, **parameters)
+    indexed = search(agent, docs, use_index=True, **parameters)
+    
+    assert indexed['total_matches'] == direct['total_matches']
+    assert indexed['truncated'] == direct['truncated']
+    if 'max_results' not in parameters:
+        assert indexed['matching_files'] == direct['matching_files']
+
+def test_repeat_searches_use_the_index_and_large_files_are_read(docs, tmp_path):
+    agent = FileHandlerAgent({'index_path': str(tmp_path / 'agent.db'), 'max_file_size': 1024})
+    note = docs / 'group0' / 'note3.txt'
+    large = docs / 'large.txt'
+    large.write_text('x' * 2000 + ' kilo')
+    
+    def matches(text: str) -> set:
+        return {entry['path'] for entry in search(agent, docs, content_search=text, use_index=True)['matching_files']}
+    
+    assert matches('kilo') == {str(large)}
+    # Same size and mtime: the index keeps the old content, so the file was not read again
+    stat = note.stat()
+    note.write_text('k' * stat.st_size)
+    os.utime(note, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert str(note) in matches('note 0-3')
+    
+    large.write_text('x' * 2000 + ' lima')
+    assert matches('lima') == {str(large)}
@@ -0,0 +1,159 @@
+import asyncio
+import fnmatch
+import mimetypes
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.file_handler import FileHandlerAgent
+from app.services.directory_scanner import DirectoryScanner, mime_type
+
+CONTEXT = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+
+def run(agent: FileHandlerAgent, operation: str, **input_data) -> dict:
+    return asyncio.run(agent.execute({'operation': operation, **input_data}, CONTEXT))
+
+@pytest.fixture
+def tree(tmp_path):
+    """A few hundred files across nested, hidden and linked directories"""
+    
+    for a in range(4):
+        for b in range(5):
+            directory = tmp_path / f"dir{a}" / f"sub{b}" / 'deep'
+            directory.mkdir(parents=True)
+            for i in range(6):
+                suffix = ['.txt', '.csv', '.JSON', '.tar.gz', ''][i % 5]
+                (directory.parent / f"file{i}{suffix}").write_text('x' * (a * 100 + b * 10 + i))
+                (directory / f"deep{i}.txt").write_text(f"needle {i}" if i == a else 'hay')
+    (tmp_path / '.hidden').mkdir()
+    (tmp_path / '.hidden' / 'secret.txt').write_text('needle')
+    (tmp_path / '.dotfile.txt').write_text('needle')
+    (tmp_path / 'top.csv').write_text('a,b\n1,2\n')
+    (tmp_path / 'linked').symlink_to(tmp_path / 'dir0', target_is_directory=True)
+    (tmp_path / 'link.txt').symlink_to(tmp_path / 'top.csv')
+    return tmp_path
+
+def walk(root, pattern='*', extensions=None, min_size=0, max_size=float('inf'), include_hidden=False) -> set:
+    """Matching file paths found the way os.walk-based listing did"""
+    
+    found = set()
+    for directory, directories, files in os.walk(root):
+        if not include_hidden:
+            directories[:] = [name for name in directories if not name.startswith('.')]
+        for name in files:
+            path = os.path.join(directory, name)
+            if not include_hidden and name.startswith('.'):
+                continue
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+            if extensions and os.path.splitext(name)[1].lower() not in extensions:
+                continue
+            if min_size <= os.path.getsize(path) <= max_size:
+                found.add(path)
+    return found
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'include_hidden': True},
+    {'pattern': 'file*'},
+    {'pattern': 'deep[0-2].txt'},
+    {'extensions': ['.txt', '.json']},
+    {'min_size': 150, 'max_size': 320},
+], ids=['all', 'hidden', 'pattern', 'character-class', 'extensions', 'sizes'])
+def test_scan_finds_what_os_walk_finds(tree, options):
+    scanner = DirectoryScanner(str(tree), workers=4, **options)
+    found = scanner.scan()
+    
+    assert {entry['path'] for entry in found} == walk(tree, **options)
+    assert len(found) == len({entry['path'] for entry in found})
+    assert scanner.errors == 0
+    assert not scanner.truncated
+
+def test_entries_match_get_file_info(tree):
+    agent = FileHandlerAgent({})
+    for entry in DirectoryScanner(str(tree / 'dir1')).scan()[:20]:
+        assert entry == asyncio.run(agent._get_file_info(entry['path']))
+
+def test_mime_types_match_mimetypes():
+    for name in ['a.txt', 'b.CSV', 'archive.tar.gz', 'photo.jpeg', 'noext', '.bashrc', 'x.unknownext']:
+        assert mime_type(name) == mimetypes.guess_type(name)[0]
+
+def test_depth_limits_and_non_recursive_scans(tree):
+    top = DirectoryScanner(str(tree), recursive=False, include_directories=True).scan()
+    assert {entry['name'] for entry in top} == {'top.csv', 'link.txt', 'dir0', 'dir1', 'dir2', 'dir3', 'linked'}
+    
+    shallow = DirectoryScanner(str(tree), max_depth=2, pattern='file*').scan()
+    assert {entry['path'] for entry in shallow} == walk(tree, pattern='file*')
+    assert not DirectoryScanner(str(tree), max_depth=1, pattern='file*').scan()
+
+def test_max_results_stops_the_scan(tree):
+    scanner = DirectoryScanner(str(tree), max_results=7, workers=2)
+    found = scanner.scan()
+    
+    assert len(found) == 7
+    assert scanner.truncated
+    assert {entry['path'] for entry in found} <= walk(tree)
+
+def test_closing_the_iterator_stops_the_worker_threads(tree):
+    batches = DirectoryScanner(str(tree), workers=4).iter_batches()
+    next(batches)
+    batches.close()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('scan')]
+
+def test_stream_stops_when_the_consumer_does(tree):
+    scanner = DirectoryScanner(str(tree), workers=4)
+    
+    async def first_batch():
+        stream = scanner.stream()
+        async for batch in stream:
+            await stream.aclose()
+            return batch
+    
+    assert asyncio.run(first_batch())
+    assert scanner._stopped.is_set()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('scan')]
+
+def test_missing_directories_raise(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DirectoryScanner(str(tmp_path / 'missing')).scan()
+    
+    async def consume():
+        return [batch async for batch in DirectoryScanner(str(tmp_path / 'missing')).stream()]
+    
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(consume())
+
+def test_list_files_matches_listdir(tree):
+    output = run(FileHandlerAgent({}), 'list', parameters={'directory': str(tree)})['output']
+    
+    names = [name for name in os.listdir(tree) if not name.startswith('.')]
+    assert sorted(output['directories']) == sorted(name for name in names if os.path.isdir(tree / name))
+    assert [entry['name'] for entry in output['files']] == sorted(
+        name for name in names if os.path.isfile(tree / name)
+    )
+    assert output['truncated'] is False
+
+def test_recursive_list_respects_max_results(tree):
+    agent = FileHandlerAgent({})
+    output = run(agent, 'list', parameters={'directory': str(tree), 'recursive': True, 'pattern': '*.txt'})['output']
+    assert {entry['path'] for entry in output['files']} == walk(tree, pattern='*.txt')
+    assert [entry['path'] for entry in output['files']] == sorted(entry['path'] for entry in output['files'])
+    
+    limited = run(agent, 'list', parameters={'directory': str(tree), 'recursive': True, 'max_results': 5})['output']
+    assert limited['total_files'] == 5
+    assert limited['truncated'] is True
+
+def test_content_search_matches_across_chunk_boundaries(tree):
+    agent = FileHandlerAgent({'chunk_size': 4})
+    output = run(agent, 'search', parameters={'directory': str(tree), 'content_search': 'NEEDLE', 'file_types': ['.txt']})['output']
+    
+    expected = {path for path in walk(tree, extensions=['.txt'], include_hidden=True) if 'needle' in open(path).read()}
+    assert {entry['path'] for entry in output['matching_files']} == expected
+    # One deep file per dir/sub pair, plus the hidden ones
+    assert output['total_matches'] == 4 * 5 + 2
+    
+    limited = run(agent, 'search', parameters={'directory': str(tree), 'content_search': 'needle', 'max_results': 3})['output']
+    assert limited['total_matches'] == 3
+    assert limited['truncated'] is True
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.dtype_compaction import (
+    MIN_ROWS,
+    compact_dtypes,
+    compaction_safe,
+    pyarrow_available,
+    restore_dtypes
+)
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    return make_frame(
+        'store', 'region', rows=1000,
+        order_id=lambda rng, rows: np.arange(rows, dtype='int64'),
+        quantity=lambda rng, rows: np.where(rng.random(rows) < 0.1, np.nan, rng.integers(0, 100, rows)),
+        price=lambda rng, rows: rng.normal(20, 5, rows),
+        big=lambda rng, rows: rng.integers(0, 2 ** 40, rows),
+    )
+
+def test_columns_get_the_smallest_dtype_their_values_allow(df):
+    compacted, report = compact_dtypes(df)
+    
+    assert report['converted_columns'] == {
+        'order_id': 'int16',
+        'store': 'int8',
+        'region': 'category',
+        'quantity': 'Int8',
+    }
+    # Floats and wide integers keep their dtype
+    assert compacted['price'].dtype == 'float64'
+    assert compacted['big'].dtype == 'int64'
+    assert report['memory_after'] < report['memory_before']
+    pd.testing.assert_frame_equal(restore_dtypes(compacted).astype(df.dtypes.to_dict()), df)
+
+def test_small_frames_and_unchanged_frames_are_left_alone(df):
+    _, report = compact_dtypes(df.head(MIN_ROWS - 1))
+    assert report['converted_columns'] == {}
+    assert report['memory_after'] == report['memory_before']
+    
+    already_compact = df[['price', 'big']]
+    assert compact_dtypes(already_compact)[0] is already_compact
+
+def test_high_cardinality_strings_use_arrow_strings_only_when_pyarrow_works():
+    df = pd.DataFrame({'code': [f"code-{i}" for i in range(200)]})
+    compacted, report = compact_dtypes(df)
+    
+    expected = {'code': 'string[pyarrow]'} if pyarrow_available() else {}
+    assert report['converted_columns'] == expected
+    assert restore_dtypes(compacted)['code'].tolist() == df['code'].tolist()
+
+def test_restore_turns_missing_values_into_none(df):
+    compacted, _ = compact_dtypes(df)
+    restored = restore_dtypes(compacted)
+    
+    assert restored['quantity'].dtype == object
+    assert restored['quantity'][df['quantity'].isna()].map(lambda value: value is None).all()
+    assert restored['region'].dtype == object
+    assert restored['store'].dtype == 'int8'
+
+def test_stages_that_compute_new_values_are_not_compaction_safe():
+    assert compaction_safe([{'operation': 'group_by', 'parameters': {}}, {'operation': 'sort', 'parameters': {}}])
+    assert not compaction_safe([{'operation': 'sort', 'parameters': {}}, {'operation': 'transform', 'parameters': {}}])
+    assert not compaction_safe([{'operation': 'clean', 'parameters': {'missing_strategy': 'mean'}}])
+
+def process(df: pd.DataFrame, operation: str, parameters: dict, pipeline: list = ()) -> dict:
+    agent = DataProcessorAgent({})
+    input_data = {
+        'data': df.to_dict('records'),
+        'operation': operation,
+        'parameters': parameters,
+        'pipeline': list(pipeline)
+    }
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    return asyncio.run(agent.execute(input_data, context))
+
+@pytest.mark.parametrize('operation,parameters', [
+    ('group_by', {'group_by': ['region', 'store'], 'aggregations': {'total': {'quantity': 'sum'}, 'count': 'size'}}),
+    ('sort', {'sort_by': ['region', 'quantity', 'order_id']}),
+    ('pivot', {'index': 'region', 'columns': 'store', 'values': 'price', 'aggfunc': 'sum'}),
+    ('clean', {'operations': ['remove_duplicates', 'handle_missing']}),
+    ('aggregate', {'aggregations': {'quantity': ['sum', 'max'], 'price': 'mean'}}),
+], ids=['group_by', 'sort', 'pivot', 'clean', 'aggregate'])
+def test_compacted_results_match_uncompacted(df, operation, parameters):
+    expected = process(df, operation, parameters)
+    compacted = process(df, operation, {**parameters, 'compact_dtypes': True})
+    
+    assert compacted['output']['metadata']['dtype_compaction']['converted_columns']
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(compacted['output']['data']), pd.DataFrame(expected['output']['data']), check_dtype=False
+    )
+
+def test_compaction_is_skipped_when_a_later_stage_transforms_values(df):
+    transform = {'operation': 'transform', 'parameters': {
+        'transformations': [{'column': 'store', 'operation': 'multiply', 'value': 1000}]
+    }}
+    result = process(df, 'sort', {'sort_by': 'order_id', 'compact_dtypes': True}, [transform])
+    
+    assert all('dtype_compaction' not in stage['metadata'] for stage in result['stages'])
+    # int8 would have wrapped around
+    assert max(row['store'] for row in result['output']['data']) == df['store'].max() * 1000
@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.execution_engine import ExecutionContext, ExecutionEngine
+from app.services.llm_providers import MockChatModel
+from app.services.mock_llm import MockLLMProvider
+
+ROWS = [{'region': 'north' if i % 3 else 'south', 'amount': i} for i in range(30)]
+
+def processor_node(node_id: str, data: str, operation: str, parameters: dict) -> dict:
+    return {
+        'id': node_id,
+        'data': {
+            'agentType': 'data_processor',
+            'config': {'inputMapping': {'data': data, 'operation': operation, 'parameters': parameters}}
+        }
+    }
+
+NODES = [
+    processor_node('filter', '$rows', 'filter', {
+        'conditions': [{'column': 'amount', 'operator': 'greater_than', 'value': 4}]
+    }),
+    processor_node('sort', '$filter.output.data', 'sort', {'sort_by': 'amount', 'ascending': False}),
+    processor_node('group', '$sort.output.data', 'group_by', {
+        'group_by': 'region', 'aggregations': {'total': {'amount': 'sum'}}
+    }),
+]
+EDGES = [{'source': 'filter', 'target': 'sort'}, {'source': 'sort', 'target': 'group'}]
+
+def run_workflow(execution_config: dict) -> dict:
+    async def run():
+        engine = ExecutionEngine()
+        engine.agent_runner.llm = MockChatModel(provider=MockLLMProvider(latency_ms=0), model_name='mock-gpt-4')
+        await engine.agent_runner.initialize()
+        context = ExecutionContext(
+            execution_id=uuid.uuid4(),
+            workflow_id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            input_data={'rows': ROWS},
+            variables={'rows': ROWS},
+            started_at=datetime.utcnow(),
+            config=execution_config
+        )
+        # As execute_workflow resolves it, without the database status updates
+        fuse = context.config.get('fuse_data_processors')
+        if fuse is None:
+            fuse = settings.DATA_PROCESSOR_FUSION_ENABLED
+        graph = engine._build_execution_graph(NODES, EDGES, fuse)
+        result = await engine._execute_graph(context, graph)
+        await engine.agent_runner.cleanup()
+        return graph, result['results']
+    
+    return asyncio.run(run())
+
+def test_fusion_is_off_by_default_and_every_node_keeps_its_data():
+    graph, results = run_workflow({})
+    assert not any('fused_chain' in entry for entry in graph['graph'].values())
+    assert all('data' in results[node_id]['result']['output'] for node_id in ('filter', 'sort', 'group'))
+
+def test_fused_chain_matches_separate_nodes():
+    _, separate = run_workflow({})
+    graph, fused = run_workflow({'fuse_data_processors': True})
+    
+    assert graph['graph']['filter']['fused_chain'] == ['filter', 'sort', 'group']
+    assert fused['group']['result']['output']['data'] == separate['group']['result']['output']['data']
+    # Intermediate nodes report what they did without carrying their data
+    assert 'data' not in fused['sort']['result']['output']
+    assert fused['sort']['result']['variables'] == separate['sort']['result']['variables']
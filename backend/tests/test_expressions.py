@@ -0,0 +1,103 @@
+import re
+
+import pytest
+
+from app.services.expressions import (
+    MISSING,
+    ExpressionError,
+    ReferenceExpression,
+    compile_input_mapping,
+    get_variable_extractor
+)
+
+VARIABLES = {
+    'name': 'Ada',
+    'count': '42',
+    'ratio': '0.5',
+    'flag': 'yes',
+    'payload': '{"id": 7}',
+    'rows': [{'id': 1, 'tags': ['a', 'b']}, {'id': 2, 'tags': []}],
+    'settings': {'mode': 'fast', 'limits': {'max': 10}, 'dotted.key': 'x'},
+}
+
+NODE_RESULTS = {
+    'fetch': {'status': 'completed', 'result': {'output': {'data': [{'id': 'first'}]}}},
+}
+
+def legacy_input_mapping(mapping: dict, variables: dict) -> dict:
+    # The evaluator the compiled mapping replaced
+    input_data = {}
+    for key, value in mapping.items():
+        if value.startswith('$'):
+            if value[1:] in variables:
+                input_data[key] = variables[value[1:]]
+        else:
+            input_data[key] = value
+    return input_data
+
+def legacy_extract(patterns: dict, text: str) -> dict:
+    variables = {}
+    for var_name, pattern in patterns.items():
+        match = re.search(pattern, text)
+        if match:
+            variables[var_name] = match.group(1) if match.groups() else match.group(0)
+    return variables
+
+@pytest.mark.parametrize('mapping', [
+    {'text': '$name'},
+    {'text': '$name', 'mode': 'static', 'rows': '$rows'},
+    {'missing': '$not_there', 'kept': 'value'},
+    {'settings': '$settings', 'count': '$count'},
+])
+def test_input_mapping_matches_legacy_evaluator_on_plain_references(mapping):
+    compiled = compile_input_mapping(mapping).apply({}, VARIABLES)
+    assert compiled == legacy_input_mapping(mapping, VARIABLES)
+
+@pytest.mark.parametrize('expression,expected', [
+    ('$rows[0].id', 1),
+    ('$rows[-1].id', 2),
+    ('$rows[0].tags[1]', 'b'),
+    ('$settings.limits.max', 10),
+    ("$settings['dotted.key']", 'x'),
+    ('$count|int', 42),
+    ('$ratio|float', 0.5),
+    ('$flag|bool', True),
+    ('$payload|json', {'id': 7}),
+    ('$fetch.output.data[0].id', 'first'),
+])
+def test_nested_paths_casts_and_node_results(expression, expected):
+    assert ReferenceExpression(expression).resolve(VARIABLES, NODE_RESULTS) == expected
+
+@pytest.mark.parametrize('expression', ['$rows[5].id', '$settings.limits.min', '$name|int', '$unknown.field'])
+def test_unresolvable_references_are_missing_and_skipped(expression):
+    assert ReferenceExpression(expression).resolve(VARIABLES, NODE_RESULTS) is MISSING
+    assert compile_input_mapping({'value': expression}).apply({}, VARIABLES, NODE_RESULTS) == {}
+
+def test_context_variables_shadow_node_results():
+    assert ReferenceExpression('$fetch').resolve({'fetch': 'variable'}, NODE_RESULTS) == 'variable'
+
+@pytest.mark.parametrize('expression', ['$count|decimal', '$[0]', '$rows..id'])
+def test_invalid_expressions_fail_at_compile_time(expression):
+    with pytest.raises(ExpressionError):
+        ReferenceExpression(expression)
+
+TEXT = 'Score: 87/100. Verdict: APPROVED by reviewer-3 on 2024-05-01'
+
+@pytest.mark.parametrize('patterns', [
+    {'score': r'Score: (\d+)'},
+    {'verdict': r'Verdict: (\w+)', 'date': r'\d{4}-\d{2}-\d{2}'},
+    {'missing': r'Rating: (\d+)'},
+])
+def test_variable_extraction_matches_legacy_evaluator(patterns):
+    assert get_variable_extractor(patterns).extract(TEXT) == legacy_extract(patterns, TEXT)
+
+def test_variable_extraction_casts_and_drops_failed_casts():
+    extractor = get_variable_extractor({
+        'score': {'pattern': r'Score: (\d+)', 'type': 'int'},
+        'verdict': {'pattern': r'Verdict: (\w+)', 'type': 'int'},
+    })
+    assert extractor.extract(TEXT) == {'score': 87}
+
+def test_extractors_are_compiled_once_per_config():
+    first = get_variable_extractor({'a': r'(\d+)', 'b': r'(\w+)'})
+    assert get_variable_extractor({'b': r'(\w+)', 'a': r'(\d+)'}) is first
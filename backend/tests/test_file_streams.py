@@ -0,0 +1,150 @@
+import asyncio
+import csv
+import json
+from types import SimpleNamespace
+
+from app.agents.file_handler import FileHandlerAgent
+from app.services.file_streams import FileStream, MappedFile, iter_csv, read_ranges, write_chunks
+
+CONTEXT = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+
+def run(agent: FileHandlerAgent, operation: str, **input_data) -> dict:
+    return asyncio.run(agent.execute({'operation': operation, **input_data}, CONTEXT))
+
+def write_lines(path, count: int = 5000, accent: str = 'é') -> str:
+    text = ''.join(f"line {i}: {accent * (i % 7)}\n" for i in range(count))
+    path.write_text(text, encoding='utf-8')
+    return text
+
+async def collect(iterable) -> list:
+    return [piece async for piece in iterable]
+
+def test_file_stream_chunks_and_lines_can_be_read_repeatedly(tmp_path):
+    path = tmp_path / 'big.txt'
+    text = write_lines(path) + 'no trailing newline'
+    path.write_text(text, encoding='utf-8')
+    stream = FileStream(str(path), chunk_size=1000)
+    
+    chunks = asyncio.run(collect(stream))
+    assert ''.join(chunks) == text
+    assert max(len(chunk) for chunk in chunks) == 1000
+    assert asyncio.run(collect(stream.lines())) == text.splitlines(keepends=True)
+    # Nothing is consumed: a second pass sees the whole file again
+    assert ''.join(asyncio.run(collect(stream))) == text
+    assert stream.describe() == {'path': str(path), 'format': 'text', 'encoding': 'utf-8', 'size': len(text.encode())}
+
+def test_stream_reads_have_no_size_limit(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('id,name\n' + ''.join(f"{i},row {i}\n" for i in range(2000)))
+    agent = FileHandlerAgent({'max_file_size': 1024})
+    
+    assert 'File too large' in run(agent, 'read', file_path=str(path))['output']['error']
+    output = run(agent, 'read', file_path=str(path), parameters={'stream': True, 'chunk_size': 100})['output']
+    assert output['streaming'] is True
+    assert output['format'] == 'csv'
+    assert isinstance(output['content'], FileStream)
+    assert output['content'].chunk_size == 100
+    assert ''.join(asyncio.run(collect(output['content']))) == path.read_text()
+
+def test_raw_content_can_be_left_out(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps([{'a': 1}, {'a': 2}]))
+    agent = FileHandlerAgent({})
+    
+    full = run(agent, 'read', file_path=str(path))['output']
+    assert full['raw_content'] == path.read_text()
+    output = run(agent, 'read', file_path=str(path), parameters={'include_raw_content': False})['output']
+    assert 'raw_content' not in output
+    assert output['content'] == full['content']
+
+def test_range_reads_match_slices_of_the_file(tmp_path):
+    path = tmp_path / 'lines.txt'
+    data = write_lines(path, accent='e').encode()
+    agent = FileHandlerAgent({})
+    
+    single = run(agent, 'read', file_path=str(path), parameters={'offset': 100, 'length': 50})['output']
+    assert single['content'] == data[100:150].decode()
+    assert single['ranges'] == [{'offset': 100, 'length': 50}]
+    
+    ranges = [[0, 10], [-20, None], [len(data) - 5, 100], [len(data) + 10, 5]]
+    output = run(agent, 'read', file_path=str(path), parameters={'ranges': ranges})['output']
+    assert output['content'] == [
+        data[:10].decode(), data[-20:].decode(), data[-5:].decode(), ''
+    ]
+    assert [r['length'] for r in output['ranges']] == [10, 20, 5, 0]
+
+def test_range_reads_decode_with_the_given_error_handling(tmp_path):
+    path = tmp_path / 'accents.txt'
+    path.write_text('éééé', encoding='utf-8')
+    agent = FileHandlerAgent({})
+    
+    # Byte 1 is in the middle of the first character
+    assert 'error' in run(agent, 'read', file_path=str(path), parameters={'offset': 1})['output']
+    output = run(agent, 'read', file_path=str(path), parameters={'offset': 1, 'errors': 'replace'})['output']
+    assert output['content'] == '�ééé'
+
+def test_range_reads_share_the_size_limit(tmp_path):
+    path = tmp_path / 'lines.txt'
+    data = write_lines(path, accent='e').encode()
+    agent = FileHandlerAgent({'max_file_size': 1000})
+    
+    assert len(run(agent, 'read', file_path=str(path), parameters={'offset': 500, 'length': 1000})['output']['content']) > 0
+    too_large = run(agent, 'read', file_path=str(path), parameters={'ranges': [[0, 600], [1000, 600]]})['output']
+    assert 'Requested ranges too large' in too_large['error']
+    # Clipped to the file, the tail is small enough
+    tail = run(agent, 'read', file_path=str(path), parameters={'offset': -100, 'length': 10_000})['output']
+    assert tail['content'] == data[-100:].decode()
+
+def test_mapped_files_clip_reads_and_handle_empty_files(tmp_path):
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+    with MappedFile(str(path)) as mapped:
+        assert mapped.size == 0
+        assert mapped.read(0) == b''
+    
+    path.write_bytes(bytes(range(256)))
+    assert read_ranges(str(path), [(250, None), (-3, 2), (-1000, 4), (300, 1)]) == [
+        bytes(range(250, 256)), bytes([253, 254]), bytes(range(4)), b''
+    ]
+
+def test_write_chunks_accepts_sync_and_async_pieces(tmp_path):
+    async def pieces():
+        for i in range(1000):
+            yield f"{i},"
+    
+    path = tmp_path / 'out.txt'
+    expected = ''.join(f"{i}," for i in range(1000))
+    assert asyncio.run(write_chunks(str(path), pieces(), chunk_size=64)) == len(expected)
+    assert path.read_text() == expected
+    
+    written = asyncio.run(write_chunks(str(path), iter([b'abc', 'é']), chunk_size=64))
+    assert written == 5
+    assert path.read_bytes() == 'abcé'.encode()
+
+def test_generated_records_are_written_in_batches(tmp_path):
+    def records():
+        for i in range(25_000):
+            yield {'id': i, 'name': f"row {i}", 'note': 'has, comma' if i % 3 == 0 else ''}
+    
+    assert len(list(iter_csv(records()))) == 3
+    
+    agent = FileHandlerAgent({})
+    csv_path, jsonl_path = tmp_path / 'out' / 'rows.csv', tmp_path / 'rows.jsonl'
+    run(agent, 'write', file_path=str(csv_path), content=records(), parameters={'format': 'csv'})
+    run(agent, 'write', file_path=str(jsonl_path), content=records(), parameters={'format': 'jsonl'})
+    
+    expected = [{key: str(value) for key, value in row.items()} for row in records()]
+    with open(csv_path, newline='') as f:
+        assert list(csv.DictReader(f)) == expected
+    assert [json.loads(line) for line in jsonl_path.read_text().splitlines()] == list(records())
+
+def test_streamed_read_can_be_written_without_loading_it(tmp_path):
+    source, destination = tmp_path / 'source.txt', tmp_path / 'copy.csv'
+    text = write_lines(source)
+    agent = FileHandlerAgent({'max_file_size': 1024})
+    
+    stream = run(agent, 'read', file_path=str(source), parameters={'stream': True, 'chunk_size': 512})['output']['content']
+    # A FileStream is copied as text even for a records format
+    output = run(agent, 'write', file_path=str(destination), content=stream, parameters={'format': 'csv'})['output']
+    assert output['bytes_written'] == len(text.encode())
+    assert destination.read_text(encoding='utf-8') == text
@@ -0,0 +1,136 @@
+import pandas as pd
+import polars as pl
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.filter_compiler import compile_mask, compile_polars
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    df = make_frame('id', 'amount', 'name', 'region', missing=0.1, flag=lambda rng, rows: rng.random(rows) < 0.5)
+    return df.astype({'region': 'category'})
+
+def legacy_filter(df: pd.DataFrame, parameters: dict) -> pd.DataFrame:
+    # The per-condition loop the compiled mask replaced
+    for condition in parameters.get('conditions', []):
+        column = condition.get('column')
+        operator = condition.get('operator')
+        value = condition.get('value')
+        if column not in df.columns:
+            continue
+        if operator == 'equals':
+            df = df[df[column] == value]
+        elif operator == 'not_equals':
+            df = df[df[column] != value]
+        elif operator == 'greater_than':
+            df = df[df[column] > value]
+        elif operator == 'less_than':
+            df = df[df[column] < value]
+        elif operator == 'contains':
+            df = df[df[column].astype(str).str.contains(str(value), na=False)]
+        elif operator == 'in':
+            df = df[df[column].isin(value if isinstance(value, list) else [value])]
+    return df
+
+def compiled_filter(df: pd.DataFrame, parameters: dict) -> pd.DataFrame:
+    return DataProcessorAgent({})._filter_data(df, parameters)
+
+def leaf(column: str, operator: str, value=None) -> dict:
+    return {'column': column, 'operator': operator, 'value': value}
+
+LEGACY_CASES = {
+    'equals': [leaf('region', 'equals', 'north')],
+    'not-equals-with-nulls': [leaf('amount', 'not_equals', 50.0)],
+    'range': [leaf('amount', 'greater_than', 30), leaf('amount', 'less_than', 60)],
+    'contains-literal': [leaf('name', 'contains', 'item-1')],
+    'contains-regex': [leaf('name', 'contains', r'item-(?:3|7)$')],
+    'contains-number': [leaf('amount', 'contains', '.5')],
+    'in': [leaf('region', 'in', ['east', 'west'])],
+    'in-scalar': [leaf('id', 'in', 7)],
+    'bool': [leaf('flag', 'equals', True), leaf('amount', 'greater_than', 40)],
+    'missing-column': [leaf('nope', 'equals', 1), leaf('id', 'less_than', 100)],
+    # Enough conditions that later ones only see the open rows
+    'narrowed': [
+        leaf('amount', 'greater_than', 20), leaf('region', 'not_equals', 'west'),
+        leaf('name', 'contains', '1'), leaf('id', 'less_than', 1500), leaf('flag', 'equals', False),
+    ],
+    'empty': [],
+}
+
+@pytest.mark.parametrize('conditions', LEGACY_CASES.values(), ids=LEGACY_CASES.keys())
+def test_flat_conditions_match_the_legacy_loop(df, conditions):
+    parameters = {'conditions': conditions}
+    pd.testing.assert_frame_equal(compiled_filter(df, parameters), legacy_filter(df, parameters))
+
+@pytest.mark.parametrize('tree,expected', [
+    (
+        {'or': [leaf('region', 'equals', 'north'), leaf('amount', 'greater_than', 80)]},
+        lambda df: (df['region'] == 'north') | (df['amount'] > 80)
+    ),
+    (
+        {'and': [leaf('flag', 'equals', True), {'or': [leaf('id', 'less_than', 10), leaf('id', 'greater_than', 1990)]}]},
+        lambda df: df['flag'] & ((df['id'] < 10) | (df['id'] > 1990))
+    ),
+    # Boolean null handling: NOT simply inverts, so missing amounts are kept
+    ({'not': leaf('amount', 'greater_than', 50)}, lambda df: ~(df['amount'] > 50)),
+    (
+        [leaf('amount', 'greater_than_or_equal', 50), leaf('amount', 'less_than_or_equal', 55)],
+        lambda df: (df['amount'] >= 50) & (df['amount'] <= 55)
+    ),
+    ([leaf('name', 'is_null')], lambda df: df['name'].isna()),
+    ([leaf('name', 'is_not_null'), leaf('name', 'not_contains', '2')],
+     lambda df: df['name'].notna() & ~df['name'].fillna('').str.contains('2')),
+    ([leaf('region', 'not_in', ['north', 'south'])], lambda df: ~df['region'].isin(['north', 'south'])),
+    # Missing values match not_equals and not_in, as with the flat list
+    ([leaf('name', 'not_in', ['item-1'])], lambda df: ~df['name'].isin(['item-1'])),
+])
+def test_condition_trees_and_new_operators(df, tree, expected):
+    result = compiled_filter(df, {'conditions': tree})
+    pd.testing.assert_frame_equal(result, df[expected(df)])
+
+def test_sql_null_handling_drops_unknown_rows(df):
+    tree = {'not': leaf('amount', 'greater_than', 50)}
+    result = compiled_filter(df, {'conditions': tree, 'null_handling': 'sql'})
+    pd.testing.assert_frame_equal(result, df[df['amount'] <= 50])
+    
+    # An OR is true as soon as one side is, whatever the other side's nulls
+    tree = {'or': [leaf('amount', 'greater_than', 50), leaf('id', 'less_than', 100)]}
+    result = compiled_filter(df, {'conditions': tree, 'null_handling': 'sql'})
+    pd.testing.assert_frame_equal(result, df[(df['amount'] > 50) | (df['id'] < 100)])
+
+def test_missing_value_in_an_in_list_follows_boolean_null_handling(df):
+    # pandas may match None against None; missing values still only match negative operators
+    result = compiled_filter(df, {'conditions': [leaf('name', 'in', ['item-1', None])]})
+    pd.testing.assert_frame_equal(result, df[df['name'] == 'item-1'])
+    result = compiled_filter(df, {'conditions': [leaf('name', 'not_in', ['item-1', None])]})
+    pd.testing.assert_frame_equal(result, df[df['name'] != 'item-1'])
+
+@pytest.mark.parametrize('conditions', [[leaf('amount', 'between', [1, 2])], {'xor': []}, 'amount > 1'])
+def test_invalid_conditions_raise(df, conditions):
+    with pytest.raises(ValueError):
+        compile_mask(df, conditions)
+
+def test_unknown_null_handling_raises(df):
+    with pytest.raises(ValueError):
+        compile_mask(df, [leaf('id', 'equals', 1)], null_handling='ternary')
+
+def test_no_applicable_condition_returns_no_mask(df):
+    assert compile_mask(df, [leaf('nope', 'equals', 1)]) is None
+    assert compile_polars(df.columns, [leaf('nope', 'equals', 1)]) is None
+
+@pytest.mark.parametrize('null_handling', ['boolean', 'sql'])
+@pytest.mark.parametrize('tree', [
+    [leaf('amount', 'greater_than', 30), leaf('name', 'contains', 'item-2')],
+    {'or': [leaf('amount', 'less_than', 20), {'not': leaf('name', 'in', ['item-1', 'item-2'])}]},
+    {'not': {'and': [leaf('amount', 'greater_than_or_equal', 40), leaf('name', 'not_equals', 'item-5')]}},
+    [leaf('name', 'is_null'), leaf('amount', 'not_in', [10.0, 20.0])],
+])
+def test_polars_predicate_matches_pandas_mask(df, tree, null_handling):
+    # Polars has no Categorical comparisons with strings here, so compare on the rest
+    df = df.drop(columns=['region'])
+    mask = compile_mask(df, tree, null_handling)
+    frame = pl.from_dicts(df.to_dict('records'), infer_schema_length=None).with_columns(
+        pl.col('amount').fill_nan(None)
+    )
+    predicate = compile_polars(frame.columns, tree, null_handling)
+    assert frame.filter(predicate)['id'].to_list() == df[mask]['id'].tolist()
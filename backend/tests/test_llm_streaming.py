@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.agent_runner import AgentRunner
+from app.services.llm_cache import LLMResponseCache, MemoryCacheBackend
+from app.services.llm_providers import MockChatModel
+from app.services.llm_streaming import WebSocketStreamHandler
+from app.services.mock_llm import MockLLMProvider
+
+class RecordingConnectionManager:
+    def __init__(self):
+        self.messages = []
+    
+    async def stream_to_workflow(self, workflow_id, message, send_timeout=5.0):
+        self.messages.append(message)
+
+def test_stream_ends_with_done_marker_even_without_tokens():
+    manager = RecordingConnectionManager()
+    
+    async def run():
+        handler = WebSocketStreamHandler(manager, workflow_id='w', execution_id='e', node_id='n')
+        await handler.aclose()
+    
+    asyncio.run(run())
+    assert [(message['chunk'], message['done']) for message in manager.messages] == [('', True)]
+
+def test_llm_node_tokens_reach_subscribers_in_order():
+    manager = RecordingConnectionManager()
+    
+    async def run():
+        runner = AgentRunner(
+            llm=MockChatModel(provider=MockLLMProvider(latency_ms=0), model_name='mock-gpt-4'),
+            llm_cache=LLMResponseCache(MemoryCacheBackend()),
+            connection_manager=manager
+        )
+        await runner.initialize()
+        context = SimpleNamespace(workflow_id='w', execution_id='e', config={}, metrics={})
+        result = await runner.execute_agent(
+            'llm_text_generator', {'input_template': '{prompt}'}, {'prompt': 'stream this'}, context,
+            node_id='n'
+        )
+        await runner.cleanup()
+        return result
+    
+    result = asyncio.run(run())
+    assert ''.join(message['chunk'] for message in manager.messages) == result['output']
+    assert [message['sequence'] for message in manager.messages] == list(range(1, len(manager.messages) + 1))
+    assert manager.messages[-1]['done'] is True
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.lookup_tables import LookupTableCache, content_hash
+
+CUSTOMERS = [{'customer_id': i, 'segment': ['retail', 'enterprise', 'public'][i % 3]} for i in range(50)]
+
+@pytest.fixture(scope='module')
+def orders(make_frame) -> pd.DataFrame:
+    # Some ids have no customer, so left joins produce missing values
+    return make_frame('amount', rows=200, missing=0, customer_id=lambda rng, rows: rng.integers(0, 60, rows))
+
+def join(owner, parameters: dict, data: list) -> dict:
+    context = SimpleNamespace(user_id=owner, workflow_id='workflow')
+    agent = DataProcessorAgent({})
+    return asyncio.run(agent.execute({'data': data, 'operation': 'join', 'parameters': parameters}, context))
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'outer'])
+def test_lookup_join_matches_merge(orders, how):
+    cache = LookupTableCache()
+    right = pd.DataFrame(CUSTOMERS)
+    table = cache.register('owner', 'customers', CUSTOMERS)
+    
+    expected = orders.merge(right, on=['customer_id'], how=how)
+    result = cache.join(table, orders, ['customer_id'], how)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+def test_lookup_join_with_duplicate_keys_falls_back_to_merge(orders):
+    cache = LookupTableCache()
+    table = cache.register('owner', 'customers', CUSTOMERS + CUSTOMERS[:5])
+    
+    expected = orders.merge(pd.DataFrame(CUSTOMERS + CUSTOMERS[:5]), on=['customer_id'], how='inner')
+    pd.testing.assert_frame_equal(cache.join(table, orders, ['customer_id'], 'inner'), expected)
+
+def test_unchanged_table_is_only_built_once():
+    cache = LookupTableCache()
+    first = cache.register('owner', 'customers', CUSTOMERS)
+    assert cache.register('owner', 'customers', list(CUSTOMERS)) is first
+    assert first.digest == content_hash(CUSTOMERS)
+
+def test_tables_are_only_visible_to_their_owner():
+    cache = LookupTableCache()
+    table = cache.register('alice', 'customers', CUSTOMERS)
+    
+    assert cache.get('alice', 'customers') is table
+    assert cache.get('bob', 'customers') is None
+    
+    # Registering the same name under another owner leaves the first table alone
+    cache.register('bob', 'customers', CUSTOMERS[:1])
+    assert cache.get('alice', 'customers') is table
+
+def test_join_by_name_does_not_reach_another_users_table(orders):
+    records = orders.head(20).to_dict('records')
+    parameters = {'lookup_table': 'shared-name-customers', 'join_on': 'customer_id', 'join_type': 'left'}
+    
+    registered = join('alice', {**parameters, 'join_data': CUSTOMERS}, records)
+    assert registered['variables']['operation_success'] is True
+    assert join('alice', parameters, records)['output']['data'] == registered['output']['data']
+    
+    with pytest.raises(ValueError, match='Unknown lookup table'):
+        join('bob', parameters, records)
+
+def test_eviction_keeps_most_recently_used_table():
+    cache = LookupTableCache(max_bytes=1)
+    cache.register('owner', 'first', CUSTOMERS)
+    cache.register('owner', 'second', CUSTOMERS)
+    assert cache.get('owner', 'first') is None
+    assert cache.get('owner', 'second') is not None
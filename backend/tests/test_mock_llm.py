@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from langchain.schema import HumanMessage
+
+from app.services.llm_providers import MockChatModel, create_llm
+from app.services.mock_llm import MockLLMError, MockLLMProvider
+
+def test_same_seed_gives_same_completions_latencies_and_errors():
+    def run(seed: int) -> list:
+        provider = MockLLMProvider(
+            latency_ms=100, latency_distribution='lognormal', latency_jitter_ms=40, error_rate=0.3, seed=seed
+        )
+        events = []
+        for i in range(50):
+            latency = provider.sample_latency()
+            try:
+                provider._start_request(f"prompt {i}")
+                events.append((latency, provider.render_response(f"prompt {i}")))
+            except MockLLMError as error:
+                events.append((latency, error.status_code))
+        return events
+    
+    assert run(7) == run(7)
+    assert run(7) != run(8)
+
+def test_responses_depend_only_on_the_prompt():
+    provider = MockLLMProvider(response_tokens=20)
+    first = provider.render_response('What is 2 + 2?')
+    assert first == MockLLMProvider(seed=1, response_tokens=20).render_response('What is 2 + 2?')
+    assert first != provider.render_response('What is 3 + 3?')
+    assert first.startswith('Final Answer: ')
+    # 'Final Answer:' stands in for the first few tokens of the budget
+    assert len(first.split(' ')) <= 20
+    assert MockLLMProvider(response='Echo: {prompt}').render_response('hi') == 'Echo: hi'
+
+@pytest.mark.parametrize('distribution', ['uniform', 'normal', 'lognormal', 'exponential'])
+def test_latency_samples_center_on_the_configured_mean(distribution):
+    provider = MockLLMProvider(latency_ms=200, latency_distribution=distribution, latency_jitter_ms=50)
+    samples = [provider.sample_latency() for _ in range(5000)]
+    assert min(samples) >= 0.0
+    assert sum(samples) / len(samples) == pytest.approx(0.2, rel=0.1)
+
+def test_constant_latency_has_no_jitter():
+    provider = MockLLMProvider(latency_ms=150, latency_jitter_ms=50)
+    assert {provider.sample_latency() for _ in range(10)} == {0.15}
+
+def test_unknown_options_are_rejected():
+    with pytest.raises(ValueError):
+        MockLLMProvider(latency_distribution='pareto')
+    with pytest.raises(ValueError):
+        MockLLMProvider(error_type='teapot')
+
+def test_error_rate_is_respected_and_counted():
+    provider = MockLLMProvider(latency_ms=0, error_rate=0.25, retry_after_seconds=2.5)
+    errors = []
+    for i in range(2000):
+        try:
+            provider.complete(f"prompt {i}")
+        except MockLLMError as error:
+            errors.append(error)
+    
+    assert len(errors) / 2000 == pytest.approx(0.25, abs=0.03)
+    assert provider.stats['errors'] == len(errors)
+    assert provider.stats['requests'] == 2000
+    # Retry logic reads the headers from the response like an HTTP client error
+    assert errors[0].response.status_code == 429
+    assert errors[0].response.headers == {'retry-after': '2.5'}
+
+def test_server_errors_have_no_retry_after():
+    provider = MockLLMProvider(latency_ms=0, error_rate=1.0, error_type='server_error')
+    with pytest.raises(MockLLMError) as raised:
+        provider.complete('prompt')
+    assert raised.value.status_code == 500
+    assert raised.value.response.headers == {}
+
+def test_requests_per_minute_limit_reports_remaining_quota():
+    provider = MockLLMProvider(latency_ms=0, requests_per_minute=3)
+    for remaining in ('2', '1', '0'):
+        provider.complete('prompt')
+        assert provider.last_headers['x-ratelimit-remaining-requests'] == remaining
+    
+    with pytest.raises(MockLLMError) as raised:
+        provider.complete('prompt')
+    assert raised.value.status_code == 429
+    assert float(raised.value.response.headers['retry-after']) > 0
+
+def test_streaming_emits_every_token_and_tracks_usage():
+    async def run():
+        provider = MockLLMProvider(latency_ms=0, response_tokens=10)
+        tokens = []
+        
+        async def on_token(token: str):
+            tokens.append(token)
+        
+        text = await provider.acomplete('Tell me a story', on_token=on_token)
+        return provider, tokens, text
+    
+    provider, tokens, text = asyncio.run(run())
+    assert ''.join(tokens) == text
+    assert provider.stats['completion_tokens'] == len(tokens)
+    assert provider.stats['prompt_tokens'] == len('Tell me a story') // 4
+    assert provider.usage('Tell me a story', text) == {
+        'prompt_tokens': 3,
+        'completion_tokens': len(tokens),
+        'total_tokens': 3 + len(tokens)
+    }
+
+def test_token_rate_paces_generation():
+    async def run():
+        provider = MockLLMProvider(latency_ms=0, response_tokens=10, tokens_per_second=200)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        text = await provider.acomplete('prompt')
+        return text, loop.time() - started
+    
+    text, elapsed = asyncio.run(run())
+    assert elapsed >= 0.9 * len(text.split(' ')) / 200
+
+def test_create_llm_builds_the_mock_chat_model():
+    llm = create_llm('mock', 'gpt-4', options={'latency_ms': 0, 'response': 'ok'})
+    assert isinstance(llm, MockChatModel)
+    assert llm.model_name == 'mock-gpt-4'
+    
+    result = asyncio.run(llm.agenerate([[HumanMessage(content='hello')]]))
+    assert result.generations[0][0].text == 'ok'
+    assert result.llm_output['token_usage']['completion_tokens'] == 1
+    
+    with pytest.raises(ValueError, match='Unknown LLM provider'):
+        create_llm('anthropic', 'model')
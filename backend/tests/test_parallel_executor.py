@@ -0,0 +1,106 @@
+import glob
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.parallel_executor import (
+    MIN_PARTITION_CELLS,
+    MIN_PARTITION_ROWS,
+    OPERATION_METHODS,
+    ParallelDataProcessor,
+    _get_pool
+)
+
+WORKERS = 2
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    df = make_frame('customer', 'region', 'amount', rows=20_000, units=lambda rng, rows: rng.integers(1, 5, rows))
+    # Duplicate rows in different places, and labels that are not positions
+    df = pd.concat([df, df.iloc[::7]])
+    return df.set_axis(pd.Index(np.arange(len(df)) * 3 + 11))
+
+def shared_segments() -> set:
+    return set(glob.glob('/dev/shm/psm_*'))
+
+def serial(df: pd.DataFrame, stage: dict) -> pd.DataFrame:
+    processor = DataProcessorAgent({})
+    return getattr(processor, OPERATION_METHODS[stage['operation']])(df, stage['parameters'])
+
+STAGES = {
+    'filter': {'operation': 'filter', 'parameters': {
+        'conditions': {'or': [
+            {'column': 'amount', 'operator': 'greater_than', 'value': 150},
+            {'column': 'region', 'operator': 'equals', 'value': 'west'},
+        ]}
+    }},
+    'transform': {'operation': 'transform', 'parameters': {
+        'transformations': [
+            {'column': 'amount', 'operation': 'multiply', 'value': 3, 'target_column': 'tripled'},
+            {'column': 'region', 'operation': 'uppercase'},
+        ]
+    }},
+    'clean': {'operation': 'clean', 'parameters': {'operations': ['remove_duplicates', 'handle_missing']}},
+    'drop-missing': {'operation': 'clean', 'parameters': {'operations': ['handle_missing']}},
+    'group_by': {'operation': 'group_by', 'parameters': {
+        'group_by': ['region', 'customer'],
+        'aggregations': {'total': {'amount': 'sum'}, 'units': {'units': 'max'}, 'count': 'size'},
+    }},
+}
+
+@pytest.mark.parametrize('name', STAGES.keys())
+def test_parallel_result_matches_serial(df, name):
+    stage = STAGES[name]
+    before = shared_segments()
+    result, metadata = ParallelDataProcessor(DataProcessorAgent({}), WORKERS).execute(df, stage, WORKERS)
+    
+    pd.testing.assert_frame_equal(result, serial(df, stage))
+    assert metadata['parallel']['partitions'] == WORKERS
+    assert metadata['result_shape'] == result.shape
+    # Input and result segments are unlinked once the results are read back
+    assert shared_segments() <= before
+
+def test_worker_errors_propagate_and_clean_up(df):
+    stage = {'operation': 'group_by', 'parameters': {'group_by': 'missing', 'aggregations': {'n': 'size'}}}
+    before = shared_segments()
+    
+    with pytest.raises(KeyError):
+        ParallelDataProcessor(DataProcessorAgent({}), WORKERS).execute(df, stage, WORKERS)
+    assert shared_segments() <= before
+
+@pytest.mark.parametrize('stage,supported', [
+    ({'operation': 'filter', 'parameters': {}}, True),
+    ({'operation': 'transform', 'parameters': {'transformations': [{'operation': 'normalize'}]}}, False),
+    ({'operation': 'clean', 'parameters': {'operations': ['handle_missing'], 'missing_strategy': 'mean'}}, False),
+    ({'operation': 'clean', 'parameters': {'operations': ['remove_outliers']}}, False),
+    ({'operation': 'group_by', 'parameters': {}}, False),
+    ({'operation': 'sort', 'parameters': {'sort_by': 'amount'}}, False),
+])
+def test_only_partitionable_stages_are_supported(stage, supported):
+    assert ParallelDataProcessor.supports(stage) is supported
+
+def test_small_frames_run_in_process(df):
+    parallel = ParallelDataProcessor(DataProcessorAgent({}), workers=8)
+    assert parallel.plan(df) == 1
+    
+    rows = 4 * MIN_PARTITION_ROWS
+    wide = pd.DataFrame(np.zeros((rows, MIN_PARTITION_CELLS // MIN_PARTITION_ROWS)))
+    assert parallel.plan(wide) == 4
+    # Too few cells per worker for a narrow frame
+    assert parallel.plan(wide.iloc[:, :1]) == 1
+
+def test_concurrent_runs_with_different_worker_counts_share_one_pool(df):
+    stage = STAGES['filter']
+    expected = serial(df, stage)
+    
+    def run(workers: int) -> pd.DataFrame:
+        return ParallelDataProcessor(DataProcessorAgent({}), workers).execute(df, stage, workers)[0]
+    
+    with ThreadPoolExecutor(max_workers=4) as threads:
+        results = list(threads.map(run, [1, 2, 3, 4] * 2))
+    for result in results:
+        pd.testing.assert_frame_equal(result, expected)
+    assert _get_pool() is _get_pool()
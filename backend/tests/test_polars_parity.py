@@ -0,0 +1,108 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+
+CASES = [
+    ('filter', {'conditions': [
+        {'column': 'amount', 'operator': 'greater_than', 'value': 20},
+        {'column': 'region', 'operator': 'not_equals', 'value': 'west'},
+        {'column': 'product', 'operator': 'contains', 'value': 'pro'},
+    ]}),
+    ('filter', {'conditions': [{'column': 'region', 'operator': 'in', 'value': ['east', 'north']}]}),
+    ('sort', {'sort_by': ['region', 'amount'], 'ascending': [True, False]}),
+    ('group_by', {'group_by': 'region', 'aggregations': {
+        'count': 'size', 'sum': 'amount', 'stats': {'quantity': 'mean', 'amount': 'max'}
+    }}),
+    ('aggregate', {'aggregations': {'amount': ['sum', 'mean', 'min'], 'quantity': ['max', 'count']}}),
+    ('transform', {'transformations': [
+        {'operation': 'multiply', 'column': 'amount', 'value': 2, 'target_column': 'double'},
+        {'operation': 'add', 'column': 'double', 'value': 1},
+        {'operation': 'uppercase', 'column': 'product', 'target_column': 'product_upper'},
+        {'operation': 'normalize', 'column': 'quantity', 'target_column': 'quantity_norm'},
+        {'operation': 'standardize', 'column': 'amount', 'target_column': 'amount_z'},
+    ]}),
+    ('transform', {'transformations': [{'operation': 'expression', 'expression': (
+        "revenue = amount * quantity * (1 - 0.1)\n"
+        "large = revenue > 500 and region != 'west'\n"
+        "label = upper(region) if large else lower(product)"
+    )}]}),
+    ('join', {'join_on': 'region', 'join_type': 'left', 'join_data': [
+        {'region': 'east', 'manager': 'Ana'}, {'region': 'west', 'manager': 'Bo'},
+    ]}),
+    ('pivot', {'index': 'region', 'columns': 'product', 'values': 'amount', 'aggfunc': 'sum'}),
+    ('clean', {'operations': ['remove_duplicates', 'handle_missing'], 'missing_strategy': 'drop'}),
+    ('clean', {'operations': ['handle_missing'], 'missing_strategy': 'mean'}),
+    ('clean', {'operations': ['remove_outliers']}),
+    ('sample', {'method': 'head', 'size': 50}),
+    ('sample', {'method': 'tail', 'size': 50}),
+    ('statistics', {'columns': 'numeric'}),
+    ('statistics', {'columns': 'all'}),
+    ('window', {'partition_by': 'region', 'order_by': 'id', 'windows': [
+        {'function': 'sum', 'column': 'amount', 'target_column': 'running_amount'},
+        {'function': 'mean', 'column': 'amount', 'frame': {'preceding': 6}, 'min_periods': 3},
+        {'function': 'max', 'column': 'quantity', 'frame': {'preceding': 0, 'following': 4}},
+        {'function': 'std', 'column': 'amount', 'frame': {'preceding': 2, 'following': 2}},
+        {'function': 'count', 'column': 'amount', 'frame': {'preceding': None, 'following': None}},
+        {'function': 'lag', 'column': 'amount', 'periods': 2},
+        {'function': 'lead', 'column': 'product'},
+        {'function': 'diff', 'column': 'quantity'},
+        {'function': 'row_number'},
+    ]}),
+    ('window', {'partition_by': ['region', 'product'], 'order_by': ['quantity', 'amount'], 'ascending': [False, True], 'windows': [
+        {'function': 'rank', 'column': 'amount', 'method': 'dense', 'ascending': False},
+        {'function': 'rank', 'column': 'quantity', 'method': 'first'},
+        {'function': 'min', 'column': 'amount', 'frame': {'preceding': 0, 'following': None}},
+        {'function': 'std', 'column': 'amount'},
+        {'function': 'mean', 'column': 'quantity', 'frame': {'preceding': None, 'following': None}},
+    ]}),
+]
+
+def make_rows(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    regions = ['east', 'west', 'north', 'south', None]
+    products = ['basic', 'pro', 'pro-max', 'enterprise']
+    return [
+        {
+            'id': i,
+            'region': rng.choice(regions),
+            'product': rng.choice(products),
+            'amount': round(rng.lognormvariate(3, 1), 2) if rng.random() > 0.05 else None,
+            'quantity': rng.randint(1, 20),
+        }
+        for i in range(count)
+    ]
+
+def normalize(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+def canonical(records: list, ordered: bool) -> list:
+    rows = [tuple(sorted((str(k), normalize(v)) for k, v in row.items())) for row in records]
+    return rows if ordered else sorted(rows, key=repr)
+
+@pytest.fixture(scope='module')
+def rows() -> list:
+    return make_rows(2000)
+
+@pytest.mark.parametrize(
+    'operation,parameters', CASES, ids=[f"{operation}-{i}" for i, (operation, _) in enumerate(CASES)]
+)
+def test_polars_engine_matches_pandas(rows, operation, parameters):
+    agent = DataProcessorAgent({})
+    outputs = {}
+    for engine in ('pandas', 'polars'):
+        result = asyncio.run(agent.execute(
+            {'data': rows, 'operation': operation, 'parameters': {**parameters, 'engine': engine}}, None
+        ))
+        outputs[engine] = result['output']['data']
+    
+    # Window columns are added in place, so rows keep their order
+    ordered = operation in ('sort', 'window')
+    assert canonical(outputs['polars'], ordered) == canonical(outputs['pandas'], ordered)
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.agent_runner import AgentRunner
+from app.services.llm_cache import LLMResponseCache, MemoryCacheBackend
+from app.services.llm_providers import MockChatModel
+from app.services.mock_llm import MockLLMProvider
+from app.services.prompt_templates import (
+    PromptTemplateError,
+    PromptTooLargeError,
+    compile_template,
+    render_prompt
+)
+
+def test_legacy_placeholders_render_like_str_format():
+    values = {'name': 'Ada', 'task': 'review the diff'}
+    template = 'Hello {name}, please {task}.'
+    assert render_prompt(template, values) == template.format(**values)
+
+def test_legacy_placeholders_reach_nested_fields():
+    values = {'data': {'rows': ['first', 'second']}}
+    assert render_prompt('Row: {data.rows[0]}', values) == 'Row: first'
+
+@pytest.mark.parametrize('template', [
+    'Return JSON like {{"name": "x"}} for {text}',
+    'Total: {amount:.2f}, padded [{amount:>10.1f}], repr {text!r}, percent {share:.0%}',
+    'Literal Jinja markers stay text: {{{{ text }}}} {{% if %}} {{# note #}} 100%',
+    'Keys and indexes: {data[rows][1]} {data[key with space]} {items[0]}',
+    'Quotes "and" backslashes \\ pass through: {text}',
+])
+def test_legacy_templates_render_exactly_like_str_format(template):
+    values = {
+        'text': 'a "quoted" text',
+        'amount': 3.14159,
+        'share': 0.256,
+        'data': {'rows': ['first', 'second'], 'key with space': 'spaced'},
+        'items': [7, 8],
+    }
+    assert render_prompt(template, values) == template.format(**values)
+
+@pytest.mark.parametrize('template', ['Unbalanced {', 'Unbalanced }', 'Positional {0}', '{}', '{text!x}', '{text:{width}}'])
+def test_invalid_legacy_templates_raise_template_errors(template):
+    with pytest.raises(PromptTemplateError):
+        render_prompt(template, {'text': 'x', 'width': 5})
+
+def test_format_specs_that_do_not_fit_the_value_raise_template_errors():
+    with pytest.raises(PromptTemplateError, match="Cannot format str"):
+        render_prompt('Total: {amount:.2f}', {'amount': 'n/a'})
+
+def test_jinja_syntax_is_opt_in():
+    values = {'items': ['a', 'b']}
+    template = '{% for item in items %}- {{ item }}\n{% endfor %}'
+    assert render_prompt(template, values, syntax='jinja') == '- a\n- b\n'
+    with pytest.raises(PromptTemplateError):
+        render_prompt(template, values)
+    with pytest.raises(PromptTemplateError, match='Unsupported template syntax'):
+        render_prompt('{items}', values, syntax='mustache')
+
+def test_missing_input_raises_instead_of_rendering_empty():
+    with pytest.raises(PromptTemplateError, match="'promt' is undefined"):
+        render_prompt('Answer this: {promt}', {'prompt': 'why?'})
+    with pytest.raises(PromptTemplateError):
+        render_prompt('{{ missing.field }}', {}, syntax='jinja')
+
+def test_missing_fields_of_an_input_and_optional_inputs_render_empty():
+    values = {'user': {'name': 'Ada'}}
+    assert render_prompt('{user.name}|{user.email}', values) == 'Ada|'
+    template = "{% if notes %}{{ notes }}{% endif %}{{ tone | default('plain') }}"
+    assert render_prompt(template, {}, syntax='jinja') == 'plain'
+
+def test_strict_templates_also_reject_missing_fields():
+    with pytest.raises(PromptTemplateError):
+        render_prompt('{user.email}', {'user': {'name': 'Ada'}}, strict=True)
+
+def test_empty_prompt_is_rejected():
+    with pytest.raises(PromptTemplateError, match='empty prompt'):
+        render_prompt('{text}', {'text': '  '})
+
+def test_prompt_budget_and_truncation_filters():
+    long_text = 'word ' * 2000
+    with pytest.raises(PromptTooLargeError):
+        render_prompt('{text}', {'text': long_text}, max_tokens=100)
+    prompt = render_prompt('{{ text | truncate_tokens(50) }}', {'text': long_text}, max_tokens=100, syntax='jinja')
+    assert len(prompt) == 200
+
+def test_sandbox_blocks_unsafe_attribute_access():
+    with pytest.raises(PromptTemplateError):
+        render_prompt("{{ text.__class__.__mro__[1].__subclasses__() }}", {'text': 'x'}, syntax='jinja')
+    with pytest.raises(PromptTemplateError):
+        render_prompt('{text.__class__.__mro__}', {'text': 'x'})
+
+def test_templates_are_compiled_once():
+    assert compile_template('Summarize {input}') is compile_template('Summarize {input}')
+    assert compile_template('Summarize {input}') is not compile_template('Summarize {input}', syntax='jinja')
+
+def test_llm_text_generator_uses_its_schema_default_template():
+    async def run():
+        runner = AgentRunner(
+            llm=MockChatModel(provider=MockLLMProvider(latency_ms=0), model_name='mock-gpt-4'),
+            llm_cache=LLMResponseCache(MemoryCacheBackend())
+        )
+        await runner.initialize()
+        agent_def = runner.agent_registry['llm_text_generator']
+        template = runner._get_input_template(agent_def, {})
+        context = SimpleNamespace(workflow_id='test', execution_id='test', config={}, metrics={})
+        # No input_template in the node config
+        result = await runner.execute_agent('llm_text_generator', {}, {'prompt': 'Describe the weather'}, context)
+        await runner.cleanup()
+        return agent_def, template, result
+    
+    agent_def, template, result = asyncio.run(run())
+    assert template == agent_def['config_schema']['properties']['input_template']['default'] == '{{ prompt }}'
+    assert result['output']
+
+def test_node_templates_are_legacy_unless_the_node_or_schema_default_opts_in():
+    runner = AgentRunner(llm=MockChatModel(provider=MockLLMProvider(latency_ms=0), model_name='mock-gpt-4'))
+    asyncio.run(runner._load_builtin_agents())
+    agent_def = runner.agent_registry['llm_text_generator']
+    
+    assert runner._get_template_syntax(agent_def, {}) == 'jinja'
+    legacy = {'input_template': 'Return JSON like {{"name": "x"}} for {prompt}'}
+    assert runner._get_template_syntax(agent_def, legacy) == 'format'
+    assert runner._prepare_agent_input({'prompt': 'hi'}, legacy, legacy['input_template']) == 'Return JSON like {"name": "x"} for hi'
+    assert runner._get_template_syntax(agent_def, {'input_template': '{{ prompt }}', 'template_syntax': 'jinja'}) == 'jinja'
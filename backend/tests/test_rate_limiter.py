@@ -0,0 +1,119 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services.agent_runner import AgentRunner
+from app.services.llm_cache import LLMResponseCache, MemoryCacheBackend
+from app.services.llm_providers import MockChatModel, add_response_hook
+from app.services.mock_llm import MockLLMProvider
+from app.services.rate_limiter import LLMRateLimiter, parse_rate_limit_headers
+
+def make_runner(provider: MockLLMProvider, limiter: LLMRateLimiter) -> AgentRunner:
+    return AgentRunner(
+        llm=MockChatModel(provider=provider, model_name='mock-gpt-4'),
+        llm_provider='mock',
+        llm_cache=LLMResponseCache(MemoryCacheBackend()),
+        rate_limiter=limiter
+    )
+
+async def generate(runner: AgentRunner, prompt: str):
+    context = SimpleNamespace(workflow_id='test', execution_id=prompt, config={}, metrics={})
+    return await runner.execute_agent(
+        'llm_text_generator', {'input_template': '{prompt}'}, {'prompt': prompt}, context
+    )
+
+def test_requests_are_spaced_to_the_requests_per_minute_limit():
+    async def run():
+        limiter = LLMRateLimiter(requests_per_minute=600, tokens_per_minute=10_000_000)
+        # The bucket starts full, so the first 600 are immediate; drain it
+        for _ in range(600):
+            await limiter.acquire('mock', 'm')
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire('mock', 'm')
+        return time.monotonic() - started
+    
+    # 600 per minute refills one request every 0.1 s
+    assert asyncio.run(run()) == pytest.approx(0.3, abs=0.1)
+
+def test_higher_priority_waiters_are_served_first():
+    async def run():
+        limiter = LLMRateLimiter(requests_per_minute=1200, tokens_per_minute=10_000_000)
+        for _ in range(1200):
+            await limiter.acquire('mock', 'm')
+        served = []
+        
+        async def call(name: str, priority: int):
+            await limiter.acquire('mock', 'm', priority=priority)
+            served.append(name)
+        
+        await asyncio.gather(call('first', 0), call('second', 0), call('high', 5))
+        return served
+    
+    # Equal priorities keep their arrival order
+    assert asyncio.run(run()) == ['high', 'first', 'second']
+
+def test_remaining_quota_headers_hold_back_calls_before_the_provider_rejects_them():
+    async def run():
+        provider = MockLLMProvider(latency_ms=0, requests_per_minute=3)
+        # Static limits far above the provider's real quota
+        limiter = LLMRateLimiter(requests_per_minute=10_000, tokens_per_minute=10_000_000)
+        runner = make_runner(provider, limiter)
+        await runner.initialize()
+        for i in range(3):
+            await generate(runner, f"prompt {i}")
+        
+        # The provider said no requests remain, so the next call queues instead of sending
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(generate(runner, 'prompt 3'), 0.5)
+        await runner.cleanup()
+        return provider.stats
+    
+    stats = asyncio.run(run())
+    assert stats['requests'] == 3
+    assert stats['errors'] == 0
+
+def test_rate_limited_calls_back_off_and_retry():
+    async def run():
+        provider = MockLLMProvider(latency_ms=0, error_rate=0.5, retry_after_seconds=0.05, seed=3)
+        runner = make_runner(provider, LLMRateLimiter(requests_per_minute=10_000, tokens_per_minute=10_000_000))
+        await runner.initialize()
+        results = [await generate(runner, f"prompt {i}") for i in range(5)]
+        await runner.cleanup()
+        return provider.stats, results
+    
+    stats, results = asyncio.run(run())
+    assert stats['errors'] > 0
+    assert all(result['output'].startswith('Final Answer') for result in results)
+
+def test_parse_rate_limit_headers():
+    feedback = parse_rate_limit_headers({
+        'X-RateLimit-Remaining-Requests': '12',
+        'x-ratelimit-remaining-tokens': '4000',
+        'x-ratelimit-reset-requests': '1s',
+        'x-ratelimit-reset-tokens': '6m0s'
+    })
+    assert feedback == {
+        'retry_after': 360.0,
+        'remaining_requests': 12,
+        'remaining_tokens': 4000,
+        'reset_requests': 1.0,
+        'reset_tokens': 360.0
+    }
+
+def test_response_hooks_are_added_to_the_configured_client():
+    seen = []
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, headers={'x-ratelimit-remaining-requests': '9'}))
+    client = httpx.Client(transport=transport, event_hooks={'response': [lambda response: seen.append('own')]})
+    
+    def record(response: httpx.Response):
+        seen.append(response.headers['x-ratelimit-remaining-requests'])
+    
+    add_response_hook(client, record)
+    add_response_hook(client, record)
+    client.get('https://api.example.com/v1/chat/completions')
+    assert seen == ['own', '9']
+    assert client._transport is transport
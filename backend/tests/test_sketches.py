@@ -0,0 +1,147 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.sketches import FrameSketch, FrequentItems, HyperLogLog, KLLSketch
+
+QS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+def distributions(rows: int = 200_000) -> dict:
+    rng = np.random.default_rng(0)
+    return {
+        'uniform': rng.uniform(0, 1000, rows),
+        'lognormal': rng.lognormal(3, 1.5, rows),
+        'ascending': np.arange(rows, dtype=np.float64),
+        'few-values': rng.integers(0, 5, rows).astype(np.float64),
+    }
+
+DATA = distributions()
+
+def assert_within_rank_error(sketch: KLLSketch, values: np.ndarray):
+    ordered = np.sort(values)
+    for q, estimate in zip(QS, sketch.quantiles(QS)):
+        # The estimate's rank range covers ties, so repeated values count as exact
+        low = np.searchsorted(ordered, estimate, 'left') / len(ordered)
+        high = np.searchsorted(ordered, estimate, 'right') / len(ordered)
+        assert low - sketch.rank_error() <= q <= high + sketch.rank_error()
+
+@pytest.mark.parametrize('name', DATA.keys())
+def test_kll_quantiles_stay_within_the_rank_error(name):
+    values = DATA[name]
+    sketch = KLLSketch()
+    for batch in np.array_split(values, 50):
+        sketch.update(batch)
+    
+    assert sketch.count == len(values)
+    assert_within_rank_error(sketch, values)
+    # O(k) values are kept, not the input
+    assert sum(len(level) for level in sketch.levels) < 4 * sketch.k
+
+@pytest.mark.parametrize('name', DATA.keys())
+def test_sorted_batches_and_merged_sketches_keep_the_bound(name):
+    values = DATA[name]
+    merged = KLLSketch(seed=1)
+    for i, batch in enumerate(np.array_split(values, 8)):
+        part = KLLSketch(seed=i + 2)
+        part.update_sorted(np.sort(batch))
+        merged.merge(part)
+    
+    assert merged.count == len(values)
+    assert_within_rank_error(merged, values)
+
+def test_empty_kll_sketch_has_no_quantiles():
+    assert all(np.isnan(value) for value in KLLSketch().quantiles([0.5, 0.9]))
+
+@pytest.mark.parametrize('distinct', [100, 5_000, 300_000])
+def test_hyperloglog_estimate_within_three_standard_errors(distinct):
+    rng = np.random.default_rng(distinct)
+    hashes = rng.integers(0, 2 ** 63, distinct, dtype=np.int64).astype(np.uint64) * np.uint64(2)
+    sketch = HyperLogLog()
+    # Repeats must not change the estimate
+    sketch.update_hashes(np.concatenate([hashes, hashes[: distinct // 2]]))
+    
+    assert abs(sketch.estimate() - distinct) <= 3 * sketch.relative_error() * distinct
+
+def test_hyperloglog_merge_is_the_sketch_of_the_union():
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2 ** 63, 50_000, dtype=np.int64).astype(np.uint64)
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.update_hashes(hashes[:30_000])
+    right.update_hashes(hashes[20_000:])
+    union.update_hashes(hashes)
+    
+    left.merge(right)
+    np.testing.assert_array_equal(left.registers, union.registers)
+
+def test_frequent_items_undercount_by_at_most_the_reported_error():
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.zipf(1.5, 100_000) % 1000)
+    sketch = FrequentItems(k=16)
+    for offset in range(0, len(values), 5_000):
+        sketch.update_counts(values.iloc[offset:offset + 5_000].value_counts())
+    
+    exact = values.value_counts()
+    for item, count in sketch.counts.items():
+        assert exact[item] - sketch.error <= count <= exact[item]
+    assert sketch.top()[0] == exact.idxmax()
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    return make_frame(
+        'units', rows=50_000, seed=1,
+        amount=lambda rng, rows: np.where(rng.random(rows) < 0.05, np.nan, rng.lognormal(4, 1, rows)),
+        sku=lambda rng, rows: [f"sku-{value}" for value in rng.zipf(1.7, rows) % 3000],
+    )
+
+def test_frame_sketch_moments_are_exact_across_chunks(df):
+    sketch = FrameSketch()
+    for offset in range(0, len(df), 3_847):
+        sketch.update(df.iloc[offset:offset + 3_847])
+    
+    described = sketch.describe(['amount', 'units'])
+    exact = df[['amount', 'units']].describe()
+    for stat in ('count', 'mean', 'std', 'min', 'max'):
+        np.testing.assert_allclose(described.loc[stat], exact.loc[stat], rtol=1e-9)
+
+def statistics(df: pd.DataFrame, **parameters) -> dict:
+    agent = DataProcessorAgent({})
+    input_data = {'data': df.to_dict('records'), 'operation': 'statistics', 'parameters': parameters}
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    return asyncio.run(agent.execute(input_data, context))['output']
+
+@pytest.mark.parametrize('streaming', [False, True], ids=['in-memory', 'streaming'])
+def test_approximate_statistics_match_describe_within_their_bounds(df, streaming):
+    options = {'streaming': True, 'chunk_size': 7_000} if streaming else {}
+    output = statistics(df, approximate=True, **options)
+    approximate = pd.DataFrame(output['data']).set_index('index')
+    exact = df.describe(include='all')
+    bounds = output['metadata']['approximation']
+    
+    for column in ('amount', 'units'):
+        values = df[column].dropna().sort_values().to_numpy()
+        for stat in ('count', 'mean', 'std', 'min', 'max'):
+            assert float(approximate.loc[stat, column]) == pytest.approx(float(exact.loc[stat, column]), rel=1e-9)
+        for stat, q in (('25%', 0.25), ('50%', 0.5), ('75%', 0.75)):
+            estimate = float(approximate.loc[stat, column])
+            low = np.searchsorted(values, estimate, 'left') / len(values)
+            high = np.searchsorted(values, estimate, 'right') / len(values)
+            assert low - bounds['quantile_rank_error'] <= q <= high + bounds['quantile_rank_error']
+    
+    unique = df['sku'].nunique()
+    assert abs(approximate.loc['unique', 'sku'] - unique) <= 3 * bounds['unique_relative_error'] * unique
+    assert approximate.loc['top', 'sku'] == exact.loc['top', 'sku']
+    assert exact.loc['freq', 'sku'] - bounds['freq_max_undercount']['sku'] <= approximate.loc['freq', 'sku']
+
+def test_approximate_outlier_removal_matches_exact_quartiles_closely(df):
+    df = df[['units']].astype(float)
+    df.loc[:20, 'units'] = 10_000
+    agent = DataProcessorAgent({})
+    exact = agent._clean_data(df, {'operations': ['remove_outliers']})
+    approximate = agent._clean_data(df, {'operations': ['remove_outliers'], 'approximate': True})
+    
+    assert approximate['units'].max() < 10_000
+    assert abs(len(approximate) - len(exact)) <= 0.01 * len(df)
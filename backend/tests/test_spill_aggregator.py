@@ -0,0 +1,106 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.spill_aggregator import SpillingAggregator
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    # Skewed keys, so some partitions are much larger than others
+    return make_frame(
+        'region', 'amount', 'units', rows=20_000, missing=0,
+        customer=lambda rng, rows: np.minimum(rng.zipf(1.3, rows), 5000),
+        month=lambda rng, rows: rng.integers(1, 13, rows),
+    )
+
+def chunks(df: pd.DataFrame, size: int = 1000):
+    for offset in range(0, len(df), size):
+        yield df.iloc[offset:offset + size]
+
+GROUP_BY = {'operation': 'group_by', 'parameters': {
+    'group_by': ['customer', 'region'],
+    'aggregations': {'total': {'amount': 'sum'}, 'mean': 'units', 'count': 'size'},
+}}
+PIVOT = {'operation': 'pivot', 'parameters': {
+    'index': 'customer', 'columns': 'month', 'values': 'units', 'aggfunc': 'sum',
+}}
+
+def in_memory(df: pd.DataFrame, stage: dict) -> pd.DataFrame:
+    processor = DataProcessorAgent({})
+    if stage['operation'] == 'group_by':
+        return processor._group_data(df, stage['parameters'])
+    return processor._pivot_data(df, stage['parameters'])
+
+@pytest.mark.parametrize('stage', [GROUP_BY, PIVOT], ids=['group_by', 'pivot'])
+def test_spilled_result_matches_in_memory(tmp_path, df, stage):
+    aggregator = SpillingAggregator(DataProcessorAgent({}), memory_budget_mb=0.5, spill_directory=str(tmp_path))
+    result = aggregator.aggregate(chunks(df), stage)
+    
+    assert aggregator.stats['spilled']
+    assert aggregator.stats['partitions'] >= 2
+    assert aggregator.stats['spilled_bytes'] > 0
+    pd.testing.assert_frame_equal(result, in_memory(df, stage), check_dtype=False)
+    # Spill files are removed once the result is built
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize('stage,chunk_size,workers', [
+    (GROUP_BY, 250, 2),
+    (PIVOT, 500, 1),
+], ids=['group_by', 'pivot'])
+def test_oversized_partitions_are_split_again(tmp_path, df, stage, chunk_size, workers):
+    # The first chunks are a small share of the input, so the partition count is underestimated
+    aggregator = SpillingAggregator(
+        DataProcessorAgent({}), memory_budget_mb=2, spill_directory=str(tmp_path), workers=workers
+    )
+    result = aggregator.aggregate(chunks(df, chunk_size), stage)
+    
+    assert aggregator.stats['repartitioned'] > 0
+    pd.testing.assert_frame_equal(result, in_memory(df, stage), check_dtype=False)
+
+def test_input_within_budget_is_aggregated_in_memory(tmp_path, df):
+    aggregator = SpillingAggregator(DataProcessorAgent({}), memory_budget_mb=512, spill_directory=str(tmp_path))
+    result = aggregator.aggregate(chunks(df), GROUP_BY)
+    
+    assert not aggregator.stats['spilled']
+    pd.testing.assert_frame_equal(result, in_memory(df, GROUP_BY))
+
+def test_int_and_float_key_chunks_hash_alike(tmp_path, df):
+    # A chunk with a missing key infers float for the column, its neighbours int
+    pieces = [
+        chunk.astype({'customer': 'float64'}) if i % 2 else chunk
+        for i, chunk in enumerate(chunks(df))
+    ]
+    stage = {'operation': 'group_by', 'parameters': {'group_by': 'customer', 'aggregations': {'total': {'units': 'sum'}}}}
+    
+    aggregator = SpillingAggregator(DataProcessorAgent({}), memory_budget_mb=0.2, spill_directory=str(tmp_path))
+    result = aggregator.aggregate(iter(pieces), stage)
+    
+    assert aggregator.stats['spilled']
+    # Every customer lands in one partition and so appears once
+    assert result['customer'].is_unique
+    expected = DataProcessorAgent({})._group_data(df, stage['parameters'])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_memory_budget_streams_the_node_and_reports_spill_stats(tmp_path, df):
+    agent = DataProcessorAgent({})
+    input_data = {
+        'data': df.to_dict('records'),
+        'operation': 'group_by',
+        'parameters': {
+            **GROUP_BY['parameters'], 'memory_budget_mb': 0.5, 'chunk_size': 1000, 'spill_directory': str(tmp_path)
+        }
+    }
+    context = SimpleNamespace(workflow_id='test', execution_id='test', user_id='test')
+    result = asyncio.run(agent.execute(input_data, context))
+    
+    metadata = result['output']['metadata']
+    assert metadata['streaming'] is True
+    assert metadata['spill']['spilled']
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(result['output']['data']), in_memory(df, GROUP_BY), check_dtype=False
+    )
@@ -0,0 +1,13 @@
+import os
+
+from benchmarks.startup_benchmark import DEFAULT_BUDGET_SECONDS, measure
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_api_imports_within_budget_without_lazy_modules(monkeypatch):
+    # The probe imports main.py, so it runs from the backend directory
+    monkeypatch.chdir(BACKEND)
+    result = measure(runs=1)
+    
+    assert result['loaded'] == []
+    assert result['seconds'] < DEFAULT_BUDGET_SECONDS
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.agents.data_processor import DataProcessorAgent
+from app.agents.window_functions import parse_windows
+
+@pytest.fixture(scope='module')
+def df(make_frame) -> pd.DataFrame:
+    df = make_frame(
+        'store', 'amount', 'units', missing=0.1,
+        region=lambda rng, rows: rng.choice(['north', 'south', 'east', None], rows),
+        day=lambda rng, rows: rng.permutation(rows),
+    )
+    return df.set_axis(pd.Index(np.arange(len(df)) * 2 + 5))
+
+def reference(df: pd.DataFrame, parameters: dict, window: dict) -> pd.Series:
+    """One window column computed partition by partition with plain pandas calls"""
+    
+    partition_by = parameters.get('partition_by') or []
+    partition_by = partition_by if isinstance(partition_by, list) else [partition_by]
+    order_by = parameters.get('order_by') or []
+    order_by = order_by if isinstance(order_by, list) else [order_by]
+    function = window['function']
+    frame = window.get('frame', 'default')
+    min_periods = window.get('min_periods', 1)
+    
+    parts = df.groupby(partition_by, dropna=False, sort=False) if partition_by else [(None, df)]
+    results = []
+    for _, part in parts:
+        if order_by:
+            part = part.sort_values(order_by, ascending=parameters.get('ascending', True), kind='stable')
+        if function == 'row_number':
+            results.append(pd.Series(np.arange(1, len(part) + 1), index=part.index))
+            continue
+        series = part[window['column']]
+        if function == 'rank':
+            results.append(series.rank(method=window.get('method', 'min'), ascending=window.get('ascending', True)))
+        elif function in ('lag', 'lead', 'diff'):
+            periods = window.get('periods', 1)
+            if function == 'diff':
+                results.append(series.diff(periods))
+            else:
+                results.append(series.shift(periods if function == 'lag' else -periods))
+        else:
+            if frame == 'default':
+                frame = {'preceding': None} if order_by else {'preceding': None, 'following': None}
+            preceding, following = frame.get('preceding', 0), frame.get('following', 0)
+            reverse = preceding == 0 and following != 0
+            if reverse:
+                series = series.iloc[::-1]
+                preceding, following = following, 0
+            if preceding is None and following is None:
+                values = series.agg(function) if series.count() >= min_periods else np.nan
+                aggregated = pd.Series(values, index=series.index, dtype=float)
+                if function == 'count':
+                    aggregated = pd.Series(series.count(), index=series.index)
+            elif function == 'count':
+                size = len(series) if preceding is None else preceding + following + 1
+                aggregated = series.notna().rolling(size, min_periods=1, center=bool(following)).sum()
+            elif preceding is None:
+                aggregated = getattr(series.expanding(min_periods), function)()
+            else:
+                rolling = series.rolling(preceding + following + 1, min_periods=min_periods, center=bool(following))
+                aggregated = getattr(rolling, function)()
+            results.append(aggregated.iloc[::-1] if reverse else aggregated)
+    return pd.concat(results).reindex(df.index)
+
+def window(df: pd.DataFrame, parameters: dict) -> pd.DataFrame:
+    return DataProcessorAgent({})._window_data(df, parameters)
+
+AGGREGATE_CASES = {
+    'running': {},
+    'running-min-periods': {'min_periods': 3},
+    'whole-partition': {'frame': {'preceding': None, 'following': None}},
+    'whole-partition-min-periods': {'frame': {'preceding': None, 'following': None}, 'min_periods': 600},
+    'rolling': {'frame': {'preceding': 6}},
+    'rolling-min-periods': {'frame': {'preceding': 4}, 'min_periods': 3},
+    'reverse-running': {'frame': {'preceding': 0, 'following': None}},
+    'reverse-rolling': {'frame': {'following': 3}},
+    'centered': {'frame': {'preceding': 2, 'following': 2}},
+}
+
+@pytest.mark.parametrize('function', ['sum', 'mean', 'min', 'max', 'count', 'std'])
+@pytest.mark.parametrize('case', AGGREGATE_CASES.keys())
+def test_aggregates_match_per_partition_pandas(df, case, function):
+    parameters = {'partition_by': 'region', 'order_by': 'day', 'windows': [
+        {'function': function, 'column': 'amount', 'target_column': 'result', **AGGREGATE_CASES[case]}
+    ]}
+    result = window(df, parameters)
+    
+    expected = reference(df, parameters, parameters['windows'][0])
+    pd.testing.assert_series_equal(result['result'], expected, check_dtype=False, check_names=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(result[df.columns], df)
+
+@pytest.mark.parametrize('spec', [
+    {'function': 'lag', 'column': 'amount'},
+    {'function': 'lead', 'column': 'amount', 'periods': 3},
+    {'function': 'diff', 'column': 'units', 'periods': 2},
+    {'function': 'row_number'},
+    {'function': 'rank', 'column': 'amount', 'method': 'dense', 'ascending': False},
+    {'function': 'rank', 'column': 'units', 'method': 'average'},
+    {'function': 'rank', 'column': 'units', 'method': 'first'},
+], ids=['lag', 'lead', 'diff', 'row_number', 'rank-dense', 'rank-average', 'rank-first'])
+def test_navigation_and_ranking_match_per_partition_pandas(df, spec):
+    parameters = {
+        'partition_by': ['region', 'store'],
+        'order_by': ['units', 'day'],
+        'ascending': [False, True],
+        'windows': [{**spec, 'target_column': 'result'}]
+    }
+    result = window(df, parameters)
+    
+    expected = reference(df, parameters, parameters['windows'][0])
+    pd.testing.assert_series_equal(result['result'], expected, check_dtype=False, check_names=False)
+
+def test_without_partition_or_order_windows_cover_the_whole_frame(df):
+    result = window(df, {'windows': [
+        {'function': 'sum', 'column': 'amount'},
+        {'function': 'row_number'},
+        {'function': 'mean', 'column': 'amount', 'frame': {'preceding': 2}, 'target_column': 'smooth'},
+    ]})
+    
+    np.testing.assert_allclose(result['amount_sum'], df['amount'].sum(), rtol=1e-12)
+    assert result['row_number'].tolist() == list(range(1, len(df) + 1))
+    pd.testing.assert_series_equal(
+        result['smooth'], df['amount'].rolling(3, min_periods=1).mean(), check_names=False
+    )
+
+def test_rank_defaults_to_the_single_order_column(df):
+    result = window(df, {'partition_by': 'store', 'order_by': 'day', 'ascending': False, 'windows': [{'function': 'rank'}]})
+    expected = df.groupby('store')['day'].rank(method='min', ascending=False)
+    pd.testing.assert_series_equal(result['rank'], expected, check_names=False)
+
+@pytest.mark.parametrize('parameters,message', [
+    ({'windows': []}, 'at least one'),
+    ({'windows': [{'function': 'median', 'column': 'amount'}]}, 'Unsupported window function'),
+    ({'windows': [{'function': 'sum'}]}, 'needs a column'),
+    ({'windows': [{'function': 'rank', 'column': 'amount', 'method': 'top'}]}, 'Unsupported rank method'),
+    ({'order_by': ['day', 'units'], 'windows': [{'function': 'rank'}]}, 'single column'),
+    ({'order_by': ['day', 'units'], 'ascending': [True], 'windows': [{'function': 'row_number'}]}, 'one value per'),
+    ({'windows': [{'function': 'sum', 'column': 'amount', 'frame': {'preceding': -1}}]}, 'non-negative'),
+    ({'windows': [{'function': 'sum', 'column': 'amount', 'frame': {'preceding': 2, 'following': 1}}]}, 'centered'),
+    ({'windows': [{'function': 'lag', 'column': 'amount'}, {'function': 'lag', 'column': 'amount'}]}, 'distinct'),
+])
+def test_invalid_window_parameters_are_rejected(parameters, message):
+    with pytest.raises(ValueError, match=message):
+        parse_windows(parameters)
+
+def test_unknown_columns_are_rejected(df):
+    with pytest.raises(ValueError, match="Unknown column 'price'"):
+        window(df, {'order_by': 'price', 'windows': [{'function': 'row_number'}]})